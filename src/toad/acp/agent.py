@@ -5,16 +5,16 @@ from datetime import datetime
 import json
 import os
 from pathlib import Path
-from typing import Any, cast, NamedTuple
-from copy import deepcopy
+from time import perf_counter
+from typing import Any, NamedTuple
 
 import rich.repr
 
 from textual.content import Content
 from textual.message import Message
-from textual.message_pump import MessagePump
 
 from toad import jsonrpc
+from toad import json_codec
 import toad
 from toad.agent_schema import Agent as AgentData
 from toad.agent import AgentBase, AgentReady, AgentFail
@@ -22,13 +22,26 @@ from toad.acp import protocol
 from toad.acp import api
 from toad.acp.api import API
 from toad.acp import messages
+from toad.acp.aggregator import UpdateAggregator
 from toad.acp.prompt import build as build_prompt
+from toad.acp.file_service import FileService
+from toad.acp.reader import FrameReader
+from toad.acp.stderr import StderrReader
+from toad.acp.tool_calls import ToolCallStore
+from toad.acp.trace import TraceWriter
+from toad.acp.writer import FrameWriter
 from toad.db import DB
+from toad.log_sink import LogSink
 from toad import paths
 from toad import constants
 from toad.answer import Answer
+from toad.protocol import MessageTarget
 
 PROTOCOL_VERSION = 1
+LARGE_FRAME_SIZE = 1024 * 1024
+"""Frames from the agent at least this size are logged with their parse time."""
+MAX_PENDING_MESSAGES = 1000
+"""Maximum number of messages held for an agent started without a message target."""
 
 
 class Mode(NamedTuple):
@@ -74,24 +87,42 @@ class Agent(AgentBase):
         agent: AgentData,
         session_id: str | None,
         session_pk: int | None = None,
+        update_interval: float = 1 / 60,
+        *,
+        terminal: bool = True,
+        record_sessions: bool = True,
     ) -> None:
         """
 
         Args:
             project_root: Project root path.
             command: Command to launch agent.
+            update_interval: Time (in seconds) to gather agent message chunks, before
+                posting them to the conversation.
+            terminal: Offer terminals to the agent?
+            record_sessions: Record new sessions in the database (so they may be resumed)?
         """
         super().__init__(project_root)
 
         self._agent_data = agent
         self.session_id = session_id
+        self._terminal = terminal
+        self._record_sessions = record_sessions
 
-        self.server = jsonrpc.Server()
+        validation = jsonrpc.get_validation_mode(constants.ACP_VALIDATION)
+        self.server = jsonrpc.Server(validation=validation or "full")
         self.server.expose_instance(self)
 
         self._agent_task: asyncio.Task | None = None
         self._task: asyncio.Task | None = None
         self._process: asyncio.subprocess.Process | None = None
+        self._daemon_stream: asyncio.StreamWriter | None = None
+        self.writer: FrameWriter | None = None
+        """Writes frames to the agent's stdin."""
+        self.reader: FrameReader | None = None
+        """Reads frames from the agent's stdout."""
+        self.stderr: StderrReader | None = None
+        """Drains the agent's stderr."""
         self.done_event = asyncio.Event()
 
         self.agent_capabilities: protocol.AgentCapabilities = {
@@ -104,8 +135,16 @@ class Agent(AgentBase):
         }
         self.auth_methods: list[protocol.AuthMethod] = []
         self.session_pk: int | None = session_pk
-        self.tool_calls: dict[str, protocol.ToolCall] = {}
-        self._message_target: MessagePump | None = None
+        self.tool_calls = ToolCallStore()
+        self.file_service = FileService()
+        self._message_target: MessageTarget | None = None
+        self._pending_messages: list[Message] | None = None
+        self.messages_dropped = False
+        """Were messages dropped, because too many were posted before `attach`?"""
+        self._record_session_on_attach = False
+        self._update_aggregator = UpdateAggregator(
+            self._post_message, update_interval
+        )
 
         self._terminal_count: int = 0
 
@@ -116,6 +155,21 @@ class Agent(AgentBase):
                 self._log_file_path.unlink(missing_ok=True)
         else:
             self._log_file_path = paths.get_log() / log_filename
+        self._log_sink = LogSink(self._log_file_path)
+        if validation is None:
+            self.log(
+                f"[error] TOAD_ACP_VALIDATION should be one of "
+                f"{', '.join(jsonrpc.VALIDATION_MODES)}; not "
+                f"{constants.ACP_VALIDATION!r} (using full validation)"
+            )
+        self._trace: TraceWriter | None = None
+        if trace_path := constants.ACP_TRACE:
+            self._trace = TraceWriter(
+                paths.get_log()
+                / generate_datetime_filename(f"{agent['name']}", ".trace")
+                if trace_path.lower() in ("1", "true")
+                else Path(trace_path).expanduser().resolve()
+            )
 
     @property
     def command(self) -> str | None:
@@ -123,6 +177,17 @@ class Agent(AgentBase):
         acp_command = toad.get_os_matrix(self._agent_data["run_command"])
         return acp_command
 
+    @property
+    def client_capabilities(self) -> protocol.ClientCapabilities:
+        """The capabilities Toad advertises to the agent."""
+        return {
+            "fs": {
+                "readTextFile": True,
+                "writeTextFile": True,
+            },
+            "terminal": self._terminal,
+        }
+
     @property
     def supports_load_session(self) -> bool:
         """Does the agent support loading sessions?"""
@@ -132,50 +197,71 @@ class Agent(AgentBase):
         yield self.project_root_path
         yield self.command
 
-    def log(self, line: str) -> None:
+    def log(self, line: str | bytes) -> None:
         """Write text to the agent log file.
 
         Args:
-            line: Text to be logged.
+            line: Text (or UTF-8 encoded bytes) to be logged.
 
         """
-        if self._message_target is not None:
-            self._message_target.call_later(self._log, line)
+        self._log_sink.write(line)
 
-    async def _log(self, line: str) -> None:
-        """Write text to the agent log file.
-
-        Intended to be called from `log`
+    def _log_stderr(self, line: bytes) -> None:
+        """Write a line from the agent's stderr to the log.
 
         Args:
-            line: Text to be logged.
+            line: A line of output.
         """
-
-        if self._message_target is None:
-            return
-
-        def write_log(log_file_path: Path, line: str):
-            """Write log in a thread."""
-            try:
-                with log_file_path.open("at") as log_file:
-                    log_file.write(f"{line.rstrip()}\n")
-            except OSError:
-                pass
-
-        await asyncio.to_thread(write_log, self._log_file_path, line)
+        self.log(b"[stderr] %s" % line)
 
     def get_info(self) -> Content:
         agent_name = self._agent_data["name"]
         return Content(agent_name)
 
-    def start(self, message_target: MessagePump | None = None) -> None:
-        """Start the agent."""
+    @property
+    def is_finished(self) -> bool:
+        """Has the agent exited (or failed to start)?"""
+        return self._agent_task is not None and self._agent_task.done()
+
+    @property
+    def pid(self) -> int | None:
+        """The process ID of the agent, or `None` if it isn't running."""
+        return None if self._process is None else self._process.pid
+
+    def start(self, message_target: MessageTarget | None = None) -> None:
+        """Start the agent.
+
+        Args:
+            message_target: Target for messages. If `None`, messages are held until
+                a target is set with `attach` (used to start agents in advance). If
+                more than `MAX_PENDING_MESSAGES` are posted in the meantime, they are
+                dropped (see `messages_dropped`).
+        """
         self._message_target = message_target
-        try:
-            self._log_file_path.parent.mkdir(parents=True, exist_ok=True)
-        except OSError:
-            pass
+        if message_target is None:
+            self._pending_messages = []
+        self._log_sink.start()
+        if self._trace is not None:
+            self._trace.start()
         self._agent_task = asyncio.create_task(self._run_agent())
+        self._agent_task.add_done_callback(lambda _: self.done_event.set())
+
+    def attach(self, message_target: MessageTarget) -> None:
+        """Set the message target of an agent started without one.
+
+        Messages posted in the meantime are delivered to the new target.
+
+        Args:
+            message_target: Target for messages.
+        """
+        self._message_target = message_target
+        pending_messages = self._pending_messages or []
+        self._pending_messages = None
+        for message in pending_messages:
+            message_target.post_message(message)
+        if self._record_session_on_attach:
+            self._record_session_on_attach = False
+            asyncio.create_task(self._record_session())
 
     def send(self, request: jsonrpc.Request) -> None:
         """Send a request to the agent.
@@ -186,11 +272,12 @@ class Agent(AgentBase):
             request: JSONRPC request object.
 
         """
-        assert self._process is not None, "Process should be present here"
-
-        self.log(f"[client] {request.body}")
-        if (stdin := self._process.stdin) is not None:
-            stdin.write(b"%s\n" % request.body_json)
+        body_json = request.body_json
+        self.log(b"[client] %s" % body_json)
+        if self._trace is not None:
+            self._trace.record(">", body_json)
+        if self.writer is not None:
+            self.writer.write(body_json)
 
     def request(self) -> jsonrpc.Request:
         """Create a request object."""
@@ -199,6 +286,19 @@ class Agent(AgentBase):
     def post_message(self, message: Message) -> bool:
         """Post a message to the message target (the Conversation).
 
+        Args:
+            message: Message object.
+
+        Returns:
+            `True` if the message was posted successfully, or `False` if it wasn't.
+        """
+        # Deliver pending text first, so messages arrive in order
+        self._update_aggregator.flush()
+        return self._post_message(message)
+
+    def _post_message(self, message: Message) -> bool:
+        """Post a message to the message target, without flushing pending chunks.
+
         Args:
             message: Message object.
 
@@ -206,7 +306,15 @@ class Agent(AgentBase):
             `True` if the message was posted successfully, or `False` if it wasn't.
         """
         if (message_target := self._message_target) is None:
-            return False
+            if (pending_messages := self._pending_messages) is None:
+                return False
+            if len(pending_messages) >= MAX_PENDING_MESSAGES:
+                # The agent can no longer be attached, so release the messages
+                self._pending_messages = None
+                self.messages_dropped = True
+                return False
+            pending_messages.append(message)
+            return True
         return message_target.post_message(message)
 
     @jsonrpc.expose("session/update")
@@ -238,19 +346,19 @@ class Agent(AgentBase):
                 "sessionUpdate": "agent_message_chunk",
                 "content": {"type": type, "text": text},
             }:
-                self.post_message(messages.Update(type, text))
+                self._update_aggregator.add(messages.Update(type, text))
 
             case {
                 "sessionUpdate": "agent_thought_chunk",
                 "content": {"type": type, "text": text},
             }:
-                self.post_message(messages.Thinking(type, text))
+                self._update_aggregator.add(messages.Thinking(type, text))
 
             case {
                 "sessionUpdate": "tool_call",
                 "toolCallId": tool_call_id,
             }:
-                self.tool_calls[tool_call_id] = update
+                self.tool_calls.add(update)
                 self.post_message(messages.ToolCall(update))
 
             case {"sessionUpdate": "plan", "entries": entries}:
@@ -261,26 +369,21 @@ class Agent(AgentBase):
                 "toolCallId": tool_call_id,
             }:
                 if tool_call_id in self.tool_calls:
-                    current_tool_call = self.tool_calls[tool_call_id]
-                    for key, value in update.items():
-                        if value is not None:
-                            current_tool_call[key] = value
-
+                    current_tool_call = self.tool_calls.update(tool_call_id, update)
                     self.post_message(
-                        messages.ToolCallUpdate(deepcopy(current_tool_call), update)
+                        messages.ToolCallUpdate(current_tool_call, update)
                     )
                 else:
                     # The agent can send a tool call update, without previously sending the tool call *rolls eyes*
-                    current_tool_call: protocol.ToolCall = {
-                        "sessionUpdate": "tool_call",
-                        "toolCallId": tool_call_id,
-                        "title": "Tool call",
-                    }
-                    for key, value in update.items():
-                        if value is not None:
-                            current_tool_call[key] = value
-
-                    self.tool_calls[tool_call_id] = current_tool_call
+                    current_tool_call = self.tool_calls.update(
+                        tool_call_id,
+                        update,
+                        default={
+                            "sessionUpdate": "tool_call",
+                            "toolCallId": tool_call_id,
+                            "title": "Tool call",
+                        },
+                    )
                     self.post_message(messages.ToolCall(current_tool_call))
 
             case {
@@ -319,13 +422,9 @@ class Agent(AgentBase):
 
         permission_tool_call = toolCall.copy()
         permission_tool_call.pop("sessionUpdate", None)
-        tool_call = cast(protocol.ToolCall, permission_tool_call)
-        if tool_call_id in self.tool_calls:
-            self.tool_calls[tool_call_id] |= tool_call
-        else:
-            self.tool_calls[tool_call_id] = deepcopy(tool_call)
-
-        tool_call = deepcopy(self.tool_calls[tool_call_id])
+        tool_call = self.tool_calls.update(
+            tool_call_id, permission_tool_call, skip_none=False
+        )
 
         message = messages.RequestPermission(options, tool_call, result_future)
         self.post_message(message)
@@ -342,7 +441,7 @@ class Agent(AgentBase):
         return result
 
     @jsonrpc.expose("fs/read_text_file")
-    def rpc_read_text_file(
+    async def rpc_read_text_file(
         self,
         sessionId: str,
         path: str,
@@ -354,15 +453,9 @@ class Agent(AgentBase):
         # https://agentclientprotocol.com/protocol/file-system#reading-files
         read_path = self.project_root_path / path
         try:
-            text = read_path.read_text(encoding="utf-8", errors="ignore")
+            text = await self.file_service.read_text(read_path, line, limit)
         except IOError:
             text = ""
-        if line is not None:
-            line = max(0, line - 1)
-            if limit is None:
-                text = "\n".join(text.splitlines()[line:])
-            else:
-                text = "\n".join(text.splitlines()[line : line + limit])
         return {"content": text}
 
     @jsonrpc.expose("fs/write_text_file")
@@ -463,6 +556,41 @@ class Agent(AgentBase):
         return_code, signal = result_future.result()
         return {"exitCode": return_code, "signal": signal}
 
+    async def _connect_daemon(
+        self, command: str
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter] | None:
+        """Connect to the agent via a shared agent daemon.
+
+        Args:
+            command: Command to run the agent.
+
+        Returns:
+            Streams to and from the agent, or `None` if the daemon isn't available.
+        """
+        from toad.acp import daemon
+
+        socket_path = (
+            daemon.get_socket_path()
+            if constants.ACP_DAEMON.lower() in ("1", "true")
+            else Path(constants.ACP_DAEMON).expanduser()
+        )
+        try:
+            streams = await daemon.connect(
+                socket_path,
+                self._agent_data["identity"],
+                command,
+                self.project_root_path,
+                self.client_capabilities,
+            )
+        except daemon.DaemonError as error:
+            self.post_message(AgentFail("Agent daemon failed", details=str(error)))
+            raise
+        except (OSError, json_codec.DecodeError) as error:
+            self.log(f"[daemon] unable to connect to {str(socket_path)!r}; {error}")
+            return None
+        self.log(f"[daemon] connected to {str(socket_path)!r}")
+        return streams
+
     async def _run_agent(self) -> None:
         """Task to communicate with the agent subprocess."""
 
@@ -476,56 +604,85 @@ class Agent(AgentBase):
             )
             return
 
-        try:
-            process = self._process = await asyncio.create_subprocess_shell(
-                command,
-                stdin=PIPE,
-                stdout=PIPE,
-                stderr=PIPE,
-                env=env,
-                cwd=str(self.project_root_path),
-                limit=10 * 1024 * 1024,
+        process: asyncio.subprocess.Process | None = None
+        stderr: StderrReader | None = None
+        daemon_streams = None
+        if constants.ACP_DAEMON:
+            from toad.acp.daemon import DaemonError
+
+            try:
+                daemon_streams = await self._connect_daemon(command)
+            except DaemonError:
+                return
+
+        if daemon_streams is not None:
+            agent_output, agent_input = daemon_streams
+            self._daemon_stream = agent_input
+        else:
+            try:
+                process = self._process = await asyncio.create_subprocess_shell(
+                    command,
+                    stdin=PIPE,
+                    stdout=PIPE,
+                    stderr=PIPE,
+                    env=env,
+                    cwd=str(self.project_root_path),
+                )
+            except Exception as error:
+                self.post_message(
+                    AgentFail("Failed to start agent", details=str(error))
+                )
+                return
+
+            assert process.stdout is not None
+            assert process.stdin is not None
+            assert process.stderr is not None
+
+            stderr = self.stderr = StderrReader(
+                process.stderr,
+                log=self._log_stderr if constants.ACP_LOG_STDERR else None,
             )
-        except Exception as error:
-            self.post_message(AgentFail("Failed to start agent", details=str(error)))
-            return
+            stderr.start()
+            agent_output = process.stdout
+            agent_input = process.stdin
 
+        reader = self.reader = FrameReader(agent_output)
+        writer = self.writer = FrameWriter(agent_input)
+        writer.start()
         self._task = asyncio.create_task(self.run())
 
-        assert process.stdout is not None
-        assert process.stdin is not None
-
         tasks: set[asyncio.Task] = set()
 
         async def call_jsonrpc(request: jsonrpc.JSONObject | jsonrpc.JSONList) -> None:
             try:
                 if (result := await self.server.call(request)) is not None:
-                    result_json = json.dumps(result).encode("utf-8")
-                    if process.stdin is not None:
-                        process.stdin.write(b"%s\n" % result_json)
+                    result_json = json_codec.encode(result)
+                    if self._trace is not None:
+                        self._trace.record(">", result_json)
+                    await writer.send(result_json)
             finally:
                 if (task := asyncio.current_task()) is not None:
                     tasks.discard(task)
 
-        while line := await process.stdout.readline():
-            # This line should contain JSON, which may be:
+        async for frame in reader:
+            # This frame should contain JSON, which may be:
             #   A) a JSONRPC request
             #   B) a JSONRPC response to a previous request
-            if not line.strip():
-                continue
-
-            try:
-                line_str = line.decode("utf-8")
-            except Exception as error:
-                self.log(f"[error] Unable to decode utf-8 from agent: {error}")
-                continue
-
-            self.log(f"[agent] {line_str}")
+            self.log(b"[agent] %s" % frame)
+            if self._trace is not None:
+                self._trace.record("<", frame)
+            parse_start = perf_counter()
             try:
-                agent_data: jsonrpc.JSONType = json.loads(line_str)
+                agent_data: jsonrpc.JSONType = json_codec.decode(frame)
             except Exception as error:
                 self.log(f"[error] failed to decode JSON from agent: {error}")
                 continue
+            parse_time = perf_counter() - parse_start
+            reader.statistics.add_parse_time(parse_time)
+            if frame.nbytes >= LARGE_FRAME_SIZE:
+                self.log(
+                    f"[frame] {frame.nbytes} bytes parsed in {parse_time * 1000:.1f}ms"
+                )
 
             if isinstance(agent_data, dict):
                 if "result" in agent_data or "error" in agent_data:
@@ -543,24 +700,33 @@ class Agent(AgentBase):
                     API.process_response(agent_data)
                     continue
 
-            if not isinstance(agent_data, dict):
+            if not isinstance(agent_data, (dict, list)):
                 self.log("[error] Invalid JSON from agent {agent_data!r}")
                 continue
 
-            # By this point we know it is a JSON RPC call
-            assert isinstance(agent_data, dict)
+            # By this point we know it is a JSON RPC call (or batch of calls)
             tasks.add(asyncio.create_task(call_jsonrpc(agent_data)))
 
-        if process.returncode:
-            assert process.stderr is not None
-            fail_details = (await process.stderr.read()).decode("utf-8", "replace")
-            self.post_message(
-                AgentFail(
-                    f"Agent returned a failure code: [b]{process.returncode}",
-                    details=fail_details,
+        if process is not None and stderr is not None:
+            await stderr.wait(timeout=5)
+            if process.returncode:
+                self.post_message(
+                    AgentFail(
+                        f"Agent returned a failure code: [b]{process.returncode}",
+                        details=stderr.text,
+                    )
                 )
-            )
-
+            stderr.stop()
+        elif self._daemon_stream is not None:
+            # The daemon closed the connection (we didn't)
+            self._daemon_stream = None
+            self.post_message(AgentFail("Agent daemon closed the connection"))
+
+        reader.close()
+        await writer.close()
+        await self._log_sink.close()
+        if self._trace is not None:
+            await self._trace.close()
         self._process = None
 
     async def stop(self) -> None:
@@ -571,6 +737,14 @@ class Agent(AgentBase):
 
         if self._process is not None:
             self._process.terminate()
+        elif (daemon_stream := self._daemon_stream) is not None:
+            # Other clients may share the agent, so disconnect rather than terminate
+            self._daemon_stream = None
+            daemon_stream.close()
+
+        await self._log_sink.close()
+        if self._trace is not None:
+            await self._trace.close()
 
     async def run(self) -> None:
         """The main logic of the Agent."""
@@ -631,13 +805,7 @@ class Agent(AgentBase):
         with self.request():
             initialize_response = api.initialize(
                 PROTOCOL_VERSION,
-                {
-                    "fs": {
-                        "readTextFile": True,
-                        "writeTextFile": True,
-                    },
-                    "terminal": True,
-                },
+                self.client_capabilities,
                 {
                     "name": toad.NAME,
                     "title": toad.TITLE,
@@ -665,7 +833,30 @@ class Agent(AgentBase):
         assert response is not None
         self.session_id = response["sessionId"]
 
-        if self.supports_load_session:
+        if self._message_target is None:
+            # Started in advance; don't record a session until it is used
+            self._record_session_on_attach = True
+        else:
+            await self._record_session()
+
+        if (modes := response.get("modes", None)) is not None:
+            current_mode = modes["currentModeId"]
+            available_modes = modes["availableModes"]
+            modes_update = {
+                mode["id"]: Mode(
+                    mode["id"], mode["name"], mode.get("description", None)
+                )
+                for mode in available_modes
+            }
+            self.post_message(messages.SetModes(current_mode, modes_update))
+
+    async def _record_session(self) -> None:
+        """Record a new session in the database, if the agent can resume sessions."""
+        if (
+            self._record_sessions
+            and self.supports_load_session
+            and self.session_id is not None
+        ):
             db = DB()
             self.session_pk = await db.session_new(
                 "New Session",
@@ -679,17 +870,6 @@ class Agent(AgentBase):
                 },
             )
 
-        if (modes := response.get("modes", None)) is not None:
-            current_mode = modes["currentModeId"]
-            available_modes = modes["availableModes"]
-            modes_update = {
-                mode["id"]: Mode(
-                    mode["id"], mode["name"], mode.get("description", None)
-                )
-                for mode in available_modes
-            }
-            self.post_message(messages.SetModes(current_mode, modes_update))
-
     async def acp_load_session(self) -> None:
         assert self.session_id is not None, "Session id must be set"
         cwd = str(self.project_root_path)
@@ -730,6 +910,7 @@ class Agent(AgentBase):
         with self.request():
             session_prompt = api.session_prompt(prompt, self.session_id)
         result = await session_prompt.wait()
+        self._update_aggregator.flush()
         assert result is not None
         return result.get("stopReason")
 
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, TYPE_CHECKING
+
+from textual.message import Message
+
+if TYPE_CHECKING:
+    from toad.acp import messages
+
+
+type ChunkMessage = messages.Update | messages.Thinking
+
+
+class UpdateAggregator:
+    """Merges consecutive agent message and thought chunks.
+
+    Agents may send text a token at a time. Rather than post a message for every chunk,
+    the aggregator gathers consecutive chunks of the same kind for up to `interval`
+    seconds, and posts them as a single message.
+
+    """
+
+    def __init__(self, post: Callable[[Message], bool], interval: float) -> None:
+        """
+
+        Args:
+            post: Callable to post a message.
+            interval: Maximum time (in seconds) to hold on to chunks, or 0 to post immediately.
+        """
+        self._post = post
+        self.interval = interval
+        self._pending_type: type[ChunkMessage] | None = None
+        self._pending_content_type = ""
+        self._pending_text: list[str] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    def add(self, message: ChunkMessage) -> None:
+        """Add a chunk.
+
+        Args:
+            message: An agent message or thought message.
+        """
+        if self.interval <= 0:
+            self._post(message)
+            return
+        if self._pending_text and (
+            type(message) is not self._pending_type
+            or message.type != self._pending_content_type
+        ):
+            self.flush()
+        self._pending_type = type(message)
+        self._pending_content_type = message.type
+        self._pending_text.append(message.text)
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.interval, self.flush
+            )
+
+    def flush(self) -> None:
+        """Post any pending chunks."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending_text:
+            return
+        assert self._pending_type is not None
+        text = "".join(self._pending_text)
+        self._pending_text.clear()
+        self._post(self._pending_type(self._pending_content_type, text))
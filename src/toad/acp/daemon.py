@@ -0,0 +1,631 @@
+"""
+A daemon which shares agent processes between Toad instances.
+
+Toad instances connect to the daemon over a Unix socket, and identify the agent
+they want to run. Instances which request the same agent (identity and command) in
+the same project, with the same client capabilities, share a single agent process.
+The agent is initialized once, so instances which advertise different capabilities
+(a client without terminals, for example) get an agent process of their own. The daemon rewrites request IDs so
+that responses are returned to the instance that made the request, and routes calls
+from the agent to the instance that owns the session.
+
+The first frame on a connection is a handshake; after that the connection carries
+newline delimited JSON-RPC, exactly as the agent's stdio would.
+
+"""
+
+import asyncio
+from contextlib import suppress
+from itertools import count
+import json
+import os
+from pathlib import Path
+import socket
+from typing import Any, Callable, NamedTuple
+
+import rich.repr
+
+from toad import json_codec
+from toad import paths
+from toad.acp.reader import FrameReader
+from toad.acp.stderr import StderrReader
+from toad.acp.writer import FrameWriter
+from toad.log_sink import LogSink
+
+DAEMON_PROTOCOL = 2
+"""Version of the daemon handshake."""
+
+INTERNAL_ERROR = -32603
+
+
+class DaemonError(Exception):
+    """The daemon could not run the agent."""
+
+
+class AgentKey(NamedTuple):
+    """Identifies agent processes which may be shared."""
+
+    identity: str
+    command: str
+    project_root: str
+    capabilities: str
+    """Client capabilities (as canonical JSON)."""
+
+
+class PendingRequest(NamedTuple):
+    """A request from a client, waiting for a response from the agent."""
+
+    client: "DaemonClient"
+    request_id: int | str
+    method: str
+
+
+def encode_capabilities(capabilities: object) -> str:
+    """Encode client capabilities, so that equal capabilities compare equal.
+
+    Args:
+        capabilities: Client capabilities.
+
+    Returns:
+        Canonical JSON.
+    """
+    return json.dumps(capabilities, sort_keys=True, separators=(",", ":"))
+
+
+def get_socket_path() -> Path:
+    """Get the default path to the daemon socket.
+
+    Returns:
+        Path to socket.
+    """
+    return paths.get_state() / "agents.sock"
+
+
+async def connect(
+    socket_path: Path,
+    identity: str,
+    command: str,
+    project_root: Path,
+    client_capabilities: dict[str, Any],
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Connect to an agent via the daemon.
+
+    Args:
+        socket_path: Path to the daemon socket.
+        identity: Agent identity.
+        command: Command to run the agent.
+        project_root: Project root path.
+        client_capabilities: Capabilities the client will send in `initialize`.
+
+    Raises:
+        OSError: If the daemon isn't running.
+        DaemonError: If the daemon failed to run the agent.
+
+    Returns:
+        Streams which carry JSON-RPC to and from the agent.
+    """
+    reader, writer = await asyncio.open_unix_connection(str(socket_path))
+    handshake = {
+        "toad_daemon": DAEMON_PROTOCOL,
+        "identity": identity,
+        "command": command,
+        "project_root": str(project_root),
+        "client_capabilities": client_capabilities,
+    }
+    writer.write(json_codec.encode(handshake) + b"\n")
+    await writer.drain()
+    response = json_codec.decode(await reader.readline())
+    if not isinstance(response, dict) or response.get("toad_daemon") != DAEMON_PROTOCOL:
+        writer.close()
+        raise DaemonError("Unexpected handshake response from daemon")
+    if error := response.get("error"):
+        writer.close()
+        raise DaemonError(str(error))
+    return reader, writer
+
+
+@rich.repr.auto
+class DaemonClient:
+    """A Toad instance connected to the daemon."""
+
+    def __init__(
+        self,
+        client_id: int,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """
+
+        Args:
+            client_id: Unique ID for the client.
+            reader: Stream from the client.
+            writer: Stream to the client.
+        """
+        self.id = client_id
+        self.reader = FrameReader(reader)
+        self.writer = FrameWriter(writer)
+        self._stream_writer = writer
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield self.id
+
+    def send(self, message: Any) -> None:
+        """Send a JSON-RPC message to the client.
+
+        Args:
+            message: Message object.
+        """
+        self.writer.write(json_codec.encode(message))
+
+    async def close(self) -> None:
+        """Close the connection."""
+        await self.writer.close()
+        self.reader.close()
+        with suppress(OSError):
+            self._stream_writer.close()
+
+
+@rich.repr.auto
+class SharedAgent:
+    """An agent process shared by one or more clients."""
+
+    def __init__(
+        self,
+        key: AgentKey,
+        log: Callable[[str | bytes], None],
+        on_exit: Callable[["SharedAgent"], None],
+    ) -> None:
+        """
+
+        Args:
+            key: Agent key.
+            log: Callable to write to the daemon log.
+            on_exit: Callable invoked when the agent process exits.
+        """
+        self.key = key
+        self._log = log
+        self._on_exit = on_exit
+        self.clients: set[DaemonClient] = set()
+        self._process: asyncio.subprocess.Process | None = None
+        self._writer: FrameWriter | None = None
+        self._task: asyncio.Task | None = None
+        self._request_ids = count(1)
+        self._pending: dict[int, PendingRequest] = {}
+        self._sessions: dict[str, DaemonClient] = {}
+        self._initialize_result: Any = None
+        self._initialize_waiters: list[tuple[DaemonClient, int | str]] | None = None
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield self.key.identity
+        yield "project_root", self.key.project_root
+        yield "clients", len(self.clients)
+
+    @property
+    def pid(self) -> int | None:
+        """Process ID of the agent."""
+        return None if self._process is None else self._process.pid
+
+    async def start(self) -> None:
+        """Start the agent process.
+
+        Raises:
+            DaemonError: If the process could not be started.
+        """
+        PIPE = asyncio.subprocess.PIPE
+        env = os.environ.copy()
+        env["TOAD_CWD"] = self.key.project_root
+        try:
+            process = self._process = await asyncio.create_subprocess_shell(
+                self.key.command,
+                stdin=PIPE,
+                stdout=PIPE,
+                stderr=PIPE,
+                env=env,
+                cwd=self.key.project_root,
+            )
+        except Exception as error:
+            raise DaemonError(f"Failed to start agent; {error}") from None
+        assert process.stdin is not None
+        self._writer = FrameWriter(process.stdin)
+        self._writer.start()
+        self._task = asyncio.create_task(self._run(), name=f"agent {self.key.identity}")
+
+    def _log_stderr(self, line: bytes) -> None:
+        self._log(b"[%s stderr] %s" % (self.key.identity.encode(), line))
+
+    async def _run(self) -> None:
+        """Read and route frames from the agent."""
+        process = self._process
+        assert process is not None
+        assert process.stdout is not None
+        assert process.stderr is not None
+        stderr = StderrReader(process.stderr, log=self._log_stderr)
+        stderr.start()
+        reader = FrameReader(process.stdout)
+        try:
+            async for frame in reader:
+                try:
+                    data = json_codec.decode(frame)
+                except json_codec.DecodeError as error:
+                    self._log(f"[error] failed to decode JSON from agent: {error}")
+                    continue
+                if isinstance(data, list):
+                    for message in data:
+                        if isinstance(message, dict):
+                            self._route_from_agent(message, None)
+                elif isinstance(data, dict):
+                    self._route_from_agent(data, frame)
+        finally:
+            reader.close()
+            await stderr.wait(timeout=5)
+            stderr.stop()
+            if self._writer is not None:
+                await self._writer.close()
+            await process.wait()
+            self._log(
+                f"[daemon] agent {self.key.identity!r} exited with code {process.returncode}"
+            )
+            self._on_exit(self)
+
+    def _send_to_agent(self, message: Any) -> None:
+        if self._writer is not None:
+            self._writer.write(json_codec.encode(message))
+
+    def _reply(
+        self, client: DaemonClient, request_id: int | str, response: dict[str, Any]
+    ) -> None:
+        """Send a response to a client, with the client's request ID."""
+        client.send({**response, "id": request_id})
+
+    def _route_from_agent(self, message: dict[str, Any], frame: memoryview | None) -> None:
+        """Route a message from the agent to the appropriate client.
+
+        Args:
+            message: Decoded message.
+            frame: Raw frame (forwarded without encoding if possible), or `None`.
+        """
+        if "method" not in message:
+            # A response to a client request
+            request_id = message.get("id")
+            if not isinstance(request_id, int) or (
+                pending := self._pending.pop(request_id, None)
+            ) is None:
+                self._log(f"[daemon] dropped response with unknown id {request_id!r}")
+                return
+            if pending.method == "initialize":
+                self._complete_initialize(message)
+            elif pending.method == "session/new" and isinstance(
+                result := message.get("result"), dict
+            ):
+                if isinstance(session_id := result.get("sessionId"), str):
+                    self._sessions[session_id] = pending.client
+            self._reply(pending.client, pending.request_id, message)
+            return
+
+        client = self._get_session_client(message.get("params"))
+        if client is None:
+            self._log(f"[daemon] no client for {message['method']!r}")
+            if "id" in message:
+                self._send_to_agent(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": message["id"],
+                        "error": {
+                            "code": INTERNAL_ERROR,
+                            "message": "No client is connected for this session",
+                        },
+                    }
+                )
+            return
+        if frame is None:
+            client.send(message)
+        else:
+            client.writer.write(bytes(frame))
+
+    def _get_session_client(self, params: object) -> DaemonClient | None:
+        """Get the client which owns the session in the given parameters.
+
+        Args:
+            params: Call parameters.
+
+        Returns:
+            A client, or `None` if no client owns the session.
+        """
+        if isinstance(params, dict) and isinstance(
+            session_id := params.get("sessionId"), str
+        ):
+            if (client := self._sessions.get(session_id)) is not None:
+                return client
+        if len(self.clients) == 1:
+            return next(iter(self.clients))
+        return None
+
+    def _complete_initialize(self, response: dict[str, Any]) -> None:
+        """Handle the agent's response to initialize.
+
+        Args:
+            response: Response from the agent.
+        """
+        waiters = self._initialize_waiters or []
+        self._initialize_waiters = None
+        if "result" in response:
+            self._initialize_result = response["result"]
+        for client, request_id in waiters:
+            self._reply(client, request_id, response)
+
+    def route_from_client(self, client: DaemonClient, message: dict[str, Any]) -> None:
+        """Route a message from a client to the agent.
+
+        Args:
+            client: Client that sent the message.
+            message: Decoded message.
+        """
+        method = message.get("method")
+        if not isinstance(method, str):
+            # A response to a call from the agent; the agent's IDs are unique
+            self._send_to_agent(message)
+            return
+
+        params = message.get("params")
+        if isinstance(params, dict) and isinstance(
+            session_id := params.get("sessionId"), str
+        ):
+            # The most recent client to use a session receives its updates
+            self._sessions[session_id] = client
+
+        if (request_id := message.get("id")) is None:
+            self._send_to_agent(message)
+            return
+
+        if method == "initialize":
+            capabilities = (
+                params.get("clientCapabilities") if isinstance(params, dict) else None
+            )
+            if encode_capabilities(capabilities) != self.key.capabilities:
+                # Capabilities must match those the agent is shared with
+                self._reply(
+                    client,
+                    request_id,
+                    {
+                        "jsonrpc": "2.0",
+                        "error": {
+                            "code": INTERNAL_ERROR,
+                            "message": "Client capabilities differ from the handshake",
+                        },
+                    },
+                )
+                return
+            if self._initialize_result is not None:
+                # The agent is already initialized
+                self._reply(
+                    client,
+                    request_id,
+                    {"jsonrpc": "2.0", "result": self._initialize_result},
+                )
+                return
+            if self._initialize_waiters is not None:
+                self._initialize_waiters.append((client, request_id))
+                return
+            self._initialize_waiters = []
+
+        agent_request_id = next(self._request_ids)
+        self._pending[agent_request_id] = PendingRequest(client, request_id, method)
+        self._send_to_agent({**message, "id": agent_request_id})
+
+    def add_client(self, client: DaemonClient) -> None:
+        """Add a client.
+
+        Args:
+            client: New client.
+        """
+        self.clients.add(client)
+
+    def remove_client(self, client: DaemonClient) -> None:
+        """Remove a client, and forget its sessions and pending requests.
+
+        Args:
+            client: Client to remove.
+        """
+        self.clients.discard(client)
+        self._sessions = {
+            session_id: session_client
+            for session_id, session_client in self._sessions.items()
+            if session_client is not client
+        }
+        self._pending = {
+            request_id: pending
+            for request_id, pending in self._pending.items()
+            if pending.client is not client
+        }
+        if self._initialize_waiters:
+            self._initialize_waiters = [
+                waiter for waiter in self._initialize_waiters if waiter[0] is not client
+            ]
+
+    async def stop(self) -> None:
+        """Stop the agent process."""
+        if self._process is not None and self._process.returncode is None:
+            with suppress(ProcessLookupError):
+                self._process.terminate()
+        if self._task is not None:
+            with suppress(asyncio.CancelledError):
+                await self._task
+
+
+@rich.repr.auto
+class AgentDaemon:
+    """Runs agents on behalf of Toad instances, sharing processes where possible."""
+
+    def __init__(
+        self,
+        socket_path: Path,
+        idle_timeout: float = 300.0,
+        log_path: Path | None = None,
+    ) -> None:
+        """
+
+        Args:
+            socket_path: Path to the Unix socket.
+            idle_timeout: Time (in seconds) to keep an agent with no clients.
+            log_path: Path to the daemon log.
+        """
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.agents: dict[AgentKey, SharedAgent] = {}
+        self._client_ids = count(1)
+        self._idle_handles: dict[AgentKey, asyncio.TimerHandle] = {}
+        self._start_lock = asyncio.Lock()
+        self._log_sink = LogSink(log_path or paths.get_log() / "daemon.txt")
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield self.socket_path
+        yield "agents", len(self.agents)
+
+    def log(self, line: str | bytes) -> None:
+        """Write to the daemon log.
+
+        Args:
+            line: Text (or UTF-8 encoded bytes) to log.
+        """
+        self._log_sink.write(line)
+
+    async def run(self) -> None:
+        """Run the daemon until cancelled."""
+        socket_path = self.socket_path
+        if socket_path.exists():
+            try:
+                _, writer = await asyncio.open_unix_connection(str(socket_path))
+            except OSError:
+                # Stale socket from a previous daemon
+                socket_path.unlink()
+            else:
+                writer.close()
+                raise DaemonError(f"A daemon is already running at {socket_path}")
+
+        self._log_sink.start()
+        server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # Create the socket without permissions for other users, so nobody else
+            # can connect before the mode is set
+            previous_umask = os.umask(0o077)
+            try:
+                server_socket.bind(str(socket_path))
+            finally:
+                os.umask(previous_umask)
+            with suppress(OSError):
+                socket_path.chmod(0o600)
+            server = await asyncio.start_unix_server(
+                self._handle_client, sock=server_socket
+            )
+        except BaseException:
+            server_socket.close()
+            raise
+        self.log(f"[daemon] listening on {socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await asyncio.gather(
+                *[agent.stop() for agent in list(self.agents.values())],
+                return_exceptions=True,
+            )
+            with suppress(OSError):
+                socket_path.unlink()
+            await self._log_sink.close()
+
+    async def _get_agent(self, key: AgentKey) -> SharedAgent:
+        """Get a running agent, starting one if required.
+
+        Args:
+            key: Agent key.
+
+        Returns:
+            A shared agent.
+        """
+        if (idle_handle := self._idle_handles.pop(key, None)) is not None:
+            idle_handle.cancel()
+        async with self._start_lock:
+            if (agent := self.agents.get(key)) is None:
+                agent = SharedAgent(key, self.log, self._on_agent_exit)
+                await agent.start()
+                self.agents[key] = agent
+                self.log(f"[daemon] started {key.identity!r} (pid={agent.pid})")
+        return agent
+
+    def _on_agent_exit(self, agent: SharedAgent) -> None:
+        if self.agents.get(agent.key) is agent:
+            del self.agents[agent.key]
+        for client in list(agent.clients):
+            asyncio.create_task(client.close())
+
+    def _release_agent(self, agent: SharedAgent) -> None:
+        """Stop an agent after the idle timeout, if it has no clients."""
+        if agent.clients or self.agents.get(agent.key) is not agent:
+            return
+
+        def stop_idle_agent() -> None:
+            self._idle_handles.pop(agent.key, None)
+            if not agent.clients:
+                self.log(f"[daemon] stopping idle agent {agent.key.identity!r}")
+                asyncio.create_task(agent.stop())
+
+        self._idle_handles[agent.key] = asyncio.get_running_loop().call_later(
+            self.idle_timeout, stop_idle_agent
+        )
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Handle a connection from a Toad instance."""
+
+        def send_handshake(response: dict[str, Any]) -> None:
+            writer.write(
+                json_codec.encode({"toad_daemon": DAEMON_PROTOCOL, **response}) + b"\n"
+            )
+
+        try:
+            handshake = json_codec.decode(await reader.readline())
+            if not isinstance(handshake, dict):
+                raise DaemonError("Invalid handshake")
+            if handshake.get("toad_daemon") != DAEMON_PROTOCOL:
+                raise DaemonError("Unsupported daemon protocol")
+            key = AgentKey(
+                str(handshake["identity"]),
+                str(handshake["command"]),
+                str(Path(str(handshake["project_root"])).resolve()),
+                encode_capabilities(handshake["client_capabilities"]),
+            )
+            agent = await self._get_agent(key)
+        except (KeyError, json_codec.DecodeError, DaemonError) as error:
+            send_handshake({"error": str(error)})
+            with suppress(ConnectionError):
+                await writer.drain()
+            writer.close()
+            return
+
+        client = DaemonClient(next(self._client_ids), reader, writer)
+        send_handshake({"pid": agent.pid})
+        client.writer.start()
+        agent.add_client(client)
+        self.log(
+            f"[daemon] client {client.id} attached to {key.identity!r} "
+            f"({len(agent.clients)} client(s))"
+        )
+        try:
+            async for frame in client.reader:
+                try:
+                    data = json_codec.decode(frame)
+                except json_codec.DecodeError as error:
+                    self.log(f"[error] failed to decode JSON from client: {error}")
+                    continue
+                if isinstance(data, list):
+                    for message in data:
+                        if isinstance(message, dict):
+                            agent.route_from_client(client, message)
+                elif isinstance(data, dict):
+                    agent.route_from_client(client, data)
+        finally:
+            agent.remove_client(client)
+            await client.close()
+            self.log(f"[daemon] client {client.id} detached from {key.identity!r}")
+            self._release_agent(agent)
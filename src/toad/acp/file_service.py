@@ -0,0 +1,188 @@
+from array import array
+import asyncio
+from collections import OrderedDict
+import mmap
+import os
+from pathlib import Path
+import re
+from threading import Lock
+from typing import NamedTuple
+
+import rich.repr
+
+LINE_BREAKS = re.compile(
+    rb"\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]"
+)
+"""The line breaks recognized by `str.splitlines`, encoded as UTF-8."""
+OTHER_LINE_BREAKS = (
+    b"\r",
+    b"\x0b",
+    b"\x0c",
+    b"\x1c",
+    b"\x1d",
+    b"\x1e",
+    b"\xc2\x85",
+    b"\xe2\x80\xa8",
+    b"\xe2\x80\xa9",
+)
+"""Line breaks other than a newline."""
+
+
+class IndexKey(NamedTuple):
+    """Identifies a version of a file."""
+
+    path: str
+    mtime_ns: int
+    size: int
+
+
+@rich.repr.auto
+class FileService:
+    """Serves text files to agents.
+
+    Reads happen in a thread, so they don't block the event loop. To serve a window of
+    lines, the service builds an index of line offsets (cached for unchanged files),
+    and reads only the bytes required. Large files are memory mapped.
+
+    """
+
+    def __init__(
+        self, max_indexes: int = 32, mmap_threshold: int = 4 * 1024 * 1024
+    ) -> None:
+        """
+
+        Args:
+            max_indexes: Maximum number of line indexes to cache.
+            mmap_threshold: Files at least this size are memory mapped.
+        """
+        self.max_indexes = max_indexes
+        self.mmap_threshold = mmap_threshold
+        self._indexes: OrderedDict[IndexKey, array] = OrderedDict()
+        self._lock = Lock()
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield "indexes", len(self._indexes)
+        yield "max_indexes", self.max_indexes
+
+    async def read_text(
+        self, path: Path, line: int | None = None, limit: int | None = None
+    ) -> str:
+        """Read text from a file.
+
+        Args:
+            path: Path to file.
+            line: First line to read (1 based), or `None` to read the whole file.
+            limit: Maximum number of lines to read, or `None` for no limit.
+
+        Raises:
+            OSError: If the file could not be read.
+
+        Returns:
+            Text.
+        """
+        return await asyncio.to_thread(self._read_text, path, line, limit)
+
+    def _read_text(self, path: Path, line: int | None, limit: int | None) -> str:
+        """Read text (in a thread)."""
+        if line is None:
+            return path.read_text(encoding="utf-8", errors="ignore")
+
+        with path.open("rb") as text_file:
+            stat = os.fstat(text_file.fileno())
+            key = IndexKey(str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+            size = stat.st_size
+            if not size:
+                return ""
+            if size >= self.mmap_threshold:
+                with mmap.mmap(
+                    text_file.fileno(), 0, access=mmap.ACCESS_READ
+                ) as file_map:
+                    offsets = self._get_index(key, file_map)
+                    start, end = self._get_range(offsets, size, line, limit)
+                    data = file_map[start:end]
+            else:
+                if (offsets := self._get_cached_index(key)) is None:
+                    file_data = text_file.read()
+                    offsets = self._get_index(key, file_data)
+                    start, end = self._get_range(offsets, size, line, limit)
+                    data = file_data[start:end]
+                else:
+                    start, end = self._get_range(offsets, size, line, limit)
+                    text_file.seek(start)
+                    data = text_file.read(end - start)
+
+        text = data.decode("utf-8", errors="ignore")
+        return "\n".join(text.splitlines())
+
+    def _get_index(self, key: IndexKey, data: bytes | mmap.mmap) -> array:
+        """Get the line index for a file, building it if necessary.
+
+        Args:
+            key: Index key.
+            data: File data.
+
+        Returns:
+            An array of the offsets of the start of each line.
+        """
+        if (offsets := self._get_cached_index(key)) is not None:
+            return offsets
+
+        offsets = array("Q", [0])
+        find = data.find
+        if any(find(line_break) != -1 for line_break in OTHER_LINE_BREAKS):
+            # Slower, but splits lines as `str.splitlines` does
+            offsets.extend(match.end() for match in LINE_BREAKS.finditer(data))
+        else:
+            append = offsets.append
+            position = find(b"\n")
+            while position != -1:
+                position += 1
+                append(position)
+                position = find(b"\n", position)
+        if offsets[-1] == len(data):
+            # File ends with a newline
+            offsets.pop()
+
+        with self._lock:
+            self._indexes[key] = offsets
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return offsets
+
+    def _get_cached_index(self, key: IndexKey) -> array | None:
+        """Get a line index from the cache.
+
+        Args:
+            key: Index key.
+
+        Returns:
+            Line offsets, or `None` if the index isn't cached.
+        """
+        with self._lock:
+            if (offsets := self._indexes.get(key)) is not None:
+                self._indexes.move_to_end(key)
+            return offsets
+
+    @classmethod
+    def _get_range(
+        cls, offsets: array, size: int, line: int, limit: int | None
+    ) -> tuple[int, int]:
+        """Get the byte range for a window of lines.
+
+        Args:
+            offsets: Line offsets.
+            size: Size of the file.
+            line: First line (1 based).
+            limit: Maximum number of lines, or `None` for no limit.
+
+        Returns:
+            A tuple of start and end offsets.
+        """
+        line_count = len(offsets)
+        first_line = max(0, line - 1)
+        if first_line >= line_count:
+            return size, size
+        start = offsets[first_line]
+        if limit is None or first_line + limit >= line_count:
+            return start, size
+        return start, offsets[first_line + max(0, limit)]
@@ -0,0 +1,208 @@
+import asyncio
+from contextlib import suppress
+from pathlib import Path
+from time import monotonic
+from typing import Iterable, NamedTuple
+
+import psutil
+import rich.repr
+
+from toad.agent_schema import Agent as AgentData
+from toad.acp.agent import Agent
+
+
+class PoolKey(NamedTuple):
+    """Identifies agents which are interchangeable."""
+
+    identity: str
+    project_root: str
+
+
+class PooledAgent(NamedTuple):
+    """An agent waiting in the pool."""
+
+    agent: Agent
+    started_time: float
+
+
+@rich.repr.auto
+class AgentPool:
+    """Keeps agent processes started in advance, so that a new conversation doesn't wait
+    for the agent to launch and initialize.
+
+    An agent taken from the pool is not replaced until the pool is warmed again. Agents
+    which exit, wait longer than `idle_timeout`, or post too many messages while waiting
+    are stopped, as are the oldest agents if the pool exceeds `max_memory`.
+
+    """
+
+    def __init__(
+        self,
+        max_agents: int = 2,
+        idle_timeout: float = 300.0,
+        max_memory: int = 1024 * 1024 * 1024,
+        update_interval: float = 1 / 60,
+    ) -> None:
+        """
+
+        Args:
+            max_agents: Maximum number of agents in the pool.
+            idle_timeout: Time (in seconds) before an unused agent is stopped.
+            max_memory: Maximum combined memory (RSS in bytes) of pooled agents.
+            update_interval: Update interval for agents (see `Agent`).
+        """
+        self.max_agents = max_agents
+        self.idle_timeout = idle_timeout
+        self.max_memory = max_memory
+        self.update_interval = update_interval
+        self._agents: dict[PoolKey, PooledAgent] = {}
+        self._maintenance_task: asyncio.Task | None = None
+        self._stop_tasks: set[asyncio.Task] = set()
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield "agents", len(self._agents)
+        yield "max_agents", self.max_agents
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._agents
+
+    @classmethod
+    def get_key(cls, project_root: Path, agent_data: AgentData) -> PoolKey:
+        """Get the pool key for an agent.
+
+        Args:
+            project_root: Project root path.
+            agent_data: Agent data.
+
+        Returns:
+            Pool key.
+        """
+        return PoolKey(agent_data["identity"], str(project_root.resolve()))
+
+    def warm(self, project_root: Path, agents: Iterable[AgentData]) -> None:
+        """Start agents (up to `max_agents`) which aren't already in the pool.
+
+        Args:
+            project_root: Project root path.
+            agents: Agents in order of priority.
+        """
+        for agent_data in agents:
+            if len(self._agents) >= self.max_agents:
+                break
+            key = self.get_key(project_root, agent_data)
+            if key in self._agents:
+                continue
+            agent = Agent(
+                project_root,
+                agent_data,
+                None,
+                update_interval=self.update_interval,
+            )
+            agent.start()
+            self._agents[key] = PooledAgent(agent, monotonic())
+
+        if self._agents and self._maintenance_task is None:
+            self._maintenance_task = asyncio.create_task(
+                self._maintain(), name="agent pool"
+            )
+
+    def take(self, project_root: Path, agent_data: AgentData) -> Agent | None:
+        """Take a running agent from the pool.
+
+        Args:
+            project_root: Project root path.
+            agent_data: Agent data.
+
+        Returns:
+            An agent (which should be attached to a message target), or `None` if
+                there is no suitable agent in the pool.
+        """
+        key = self.get_key(project_root, agent_data)
+        if (pooled_agent := self._agents.pop(key, None)) is None:
+            return None
+        agent = pooled_agent.agent
+        if agent.is_finished or agent.messages_dropped:
+            self._stop_agent(agent)
+            return None
+        return agent
+
+    def _stop_agent(self, agent: Agent) -> None:
+        """Stop an agent in the background."""
+        task = asyncio.create_task(agent.stop(), name="stop pooled agent")
+        self._stop_tasks.add(task)
+        task.add_done_callback(self._stop_tasks.discard)
+
+    @classmethod
+    def get_memory(cls, pid: int) -> int:
+        """Get the memory used by a process and its children.
+
+        Args:
+            pid: Process ID.
+
+        Returns:
+            Resident set size in bytes.
+        """
+        try:
+            process = psutil.Process(pid)
+            processes = [process, *process.children(recursive=True)]
+        except psutil.Error:
+            return 0
+        memory = 0
+        for process in processes:
+            with suppress(psutil.Error):
+                memory += process.memory_info().rss
+        return memory
+
+    async def _get_memory(self) -> dict[PoolKey, int]:
+        """Get the memory used by each pooled agent."""
+        pids = {
+            key: pid
+            for key, pooled_agent in self._agents.items()
+            if (pid := pooled_agent.agent.pid) is not None
+        }
+
+        def get_memory() -> dict[PoolKey, int]:
+            return {key: self.get_memory(pid) for key, pid in pids.items()}
+
+        return await asyncio.to_thread(get_memory)
+
+    async def _maintain(self) -> None:
+        """Evict agents which have exited, expired, or exceed the memory budget."""
+        try:
+            while self._agents:
+                await asyncio.sleep(min(5.0, self.idle_timeout))
+                expire_time = monotonic() - self.idle_timeout
+                for key, (agent, started_time) in list(self._agents.items()):
+                    if (
+                        agent.is_finished
+                        or agent.messages_dropped
+                        or started_time < expire_time
+                    ):
+                        del self._agents[key]
+                        self._stop_agent(agent)
+
+                memory = await self._get_memory()
+                total_memory = sum(memory.values())
+                # Agents are stored in the order they were started
+                for key in list(self._agents):
+                    if total_memory <= self.max_memory:
+                        break
+                    if (pooled_agent := self._agents.pop(key, None)) is not None:
+                        total_memory -= memory.get(key, 0)
+                        self._stop_agent(pooled_agent.agent)
+        finally:
+            self._maintenance_task = None
+
+    async def close(self) -> None:
+        """Stop all agents in the pool."""
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+        agents = [pooled_agent.agent for pooled_agent in self._agents.values()]
+        self._agents.clear()
+        await asyncio.gather(
+            *[agent.stop() for agent in agents], *self._stop_tasks, return_exceptions=True
+        )
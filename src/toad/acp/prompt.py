@@ -1,17 +1,73 @@
-import base64
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from toad.acp import protocol
 from toad.prompt.extract import extract_paths_from_prompt
-from toad.prompt.resource import load_resource, ResourceError
+from toad.prompt.resource import (
+    get_resource_type,
+    load_resource,
+    Resource,
+    ResourceCache,
+    ResourceError,
+)
 
+MAX_RESOURCES_SIZE = 8 * 1024 * 1024
+"""Maximum number of bytes of resources to include in a single prompt."""
 
-def build(project_path: Path, prompt: str) -> list[protocol.ContentBlock]:
+MAX_WORKERS = 8
+"""Maximum number of threads to load resources."""
+
+resource_cache = ResourceCache()
+"""Resources loaded by previous prompts."""
+
+
+def _allocate(
+    project_path: Path, paths: list[Path], max_size: int
+) -> list[tuple[Path, int | None]]:
+    """Share the size budget between resources, in the order they appear in the prompt.
+
+    Args:
+        project_path: The project root.
+        paths: Resource paths.
+        max_size: Maximum number of bytes for all resources.
+
+    Returns:
+        A list of paths and the maximum size to read for each (`None` if there is no
+            room in the budget).
+    """
+    remaining = max_size
+    allocations: list[tuple[Path, int | None]] = []
+    for path in paths:
+        try:
+            size = (project_path / path).stat().st_size
+        except OSError:
+            # Let the loader report the error
+            size = 0
+        _, binary = get_resource_type(project_path / path)
+        if remaining <= 0 or (binary and size > remaining):
+            allocations.append((path, None))
+            continue
+        allocations.append((path, remaining))
+        remaining -= min(size, remaining)
+    return allocations
+
+
+def build(
+    project_path: Path,
+    prompt: str,
+    max_size: int = MAX_RESOURCES_SIZE,
+    cache: ResourceCache | None = resource_cache,
+) -> list[protocol.ContentBlock]:
     """Build the prompt structure and extract paths with the @ syntax.
 
+    Resources are loaded in parallel. Text which doesn't fit within `max_size` is
+    truncated, and resources which don't fit at all are replaced with a note.
+
     Args:
         project_path: The project root.
         prompt: The prompt text.
+        max_size: Maximum number of bytes of resources.
+        cache: Cache of resources, or `None` to always read files.
 
     Returns:
         A list of content blocks.
@@ -19,33 +75,66 @@ def build(project_path: Path, prompt: str) -> list[protocol.ContentBlock]:
     prompt_content: list[protocol.ContentBlock] = []
 
     prompt_content.append({"type": "text", "text": prompt})
-    for path, _, _ in extract_paths_from_prompt(prompt):
-        if path.endswith("/"):
-            continue
+    paths = list(
+        dict.fromkeys(
+            Path(path)
+            for path, _, _ in extract_paths_from_prompt(prompt)
+            if not path.endswith("/")
+        )
+    )
+    if not paths:
+        return prompt_content
+
+    def load(allocation: tuple[Path, int | None]) -> Resource | ResourceError | None:
+        path, path_max_size = allocation
+        if path_max_size is None:
+            return None
         try:
-            resource = load_resource(project_path, Path(path))
-        except ResourceError:
+            return load_resource(project_path, path, path_max_size, cache)
+        except ResourceError as error:
+            return error
+
+    allocations = _allocate(project_path, paths, max_size)
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_WORKERS, len(allocations)),
+        thread_name_prefix="load resource",
+    ) as executor:
+        resources = list(executor.map(load, allocations))
+
+    for path, resource in zip(paths, resources):
+        if resource is None:
+            prompt_content.append(
+                {
+                    "type": "text",
+                    "text": f"[@{path} was not included; prompt resources are limited to {max_size} bytes]",
+                }
+            )
+            continue
+        if isinstance(resource, ResourceError):
             # TODO: How should this be handled?
             continue
         uri = f"file://{resource.path.absolute().resolve()}"
         if resource.text is not None:
+            text = resource.text
+            if resource.truncated:
+                text = f"{text}\n[Truncated; showing {len(text.encode('utf-8'))} of {resource.size} bytes]"
             prompt_content.append(
                 {
                     "type": "resource",
                     "resource": {
                         "uri": uri,
-                        "text": resource.text,
+                        "text": text,
                         "mimeType": resource.mime_type,
                     },
                 }
             )
-        elif resource.data is not None:
+        elif resource.blob is not None:
             prompt_content.append(
                 {
                     "type": "resource",
                     "resource": {
                         "uri": uri,
-                        "blob": base64.b64encode(resource.data).decode("utf-8"),
+                        "blob": resource.blob,
                         "mimeType": resource.mime_type,
                     },
                 }
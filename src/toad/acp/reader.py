@@ -0,0 +1,209 @@
+import asyncio
+from contextlib import suppress
+from dataclasses import dataclass
+import mmap
+import re
+import tempfile
+from typing import BinaryIO
+
+import rich.repr
+
+NON_WHITESPACE = re.compile(rb"\S")
+"""Matches any byte which `bytes.strip` wouldn't strip."""
+
+
+@rich.repr.auto
+@dataclass
+class FrameStatistics:
+    """Statistics for frames read from an agent."""
+
+    frame_count: int = 0
+    """Number of frames read."""
+    byte_count: int = 0
+    """Total size of frames."""
+    largest_frame: int = 0
+    """Size of the largest frame."""
+    spill_count: int = 0
+    """Number of frames spilled to disk."""
+    parse_time: float = 0.0
+    """Total time spent parsing frames (in seconds)."""
+    slowest_parse: float = 0.0
+    """Longest time to parse a single frame (in seconds)."""
+
+    def add_frame(self, size: int) -> None:
+        """Record a frame.
+
+        Args:
+            size: Size of the frame in bytes.
+        """
+        self.frame_count += 1
+        self.byte_count += size
+        if size > self.largest_frame:
+            self.largest_frame = size
+
+    def add_parse_time(self, parse_time: float) -> None:
+        """Record the time taken to parse a frame.
+
+        Args:
+            parse_time: Time in seconds.
+        """
+        self.parse_time += parse_time
+        if parse_time > self.slowest_parse:
+            self.slowest_parse = parse_time
+
+
+class FrameReader:
+    """Reads newline delimited frames from a stream.
+
+    Frames are returned as memoryviews in to a reusable buffer, to avoid copying.
+    A frame is only valid until the next call to `read_frame`.
+
+    Frames larger than `spill_size` are written to a temporary file, and returned
+    as a view on to a memory map of that file, so there is no limit on frame size.
+
+    """
+
+    def __init__(
+        self,
+        stream: asyncio.StreamReader,
+        chunk_size: int = 256 * 1024,
+        spill_size: int = 16 * 1024 * 1024,
+    ) -> None:
+        """
+
+        Args:
+            stream: Stream to read from (typically the stdout of a process).
+            chunk_size: Maximum number of bytes to read at a time.
+            spill_size: Size of a partial frame before it is spilled to disk.
+        """
+        self._stream = stream
+        self.chunk_size = chunk_size
+        self.spill_size = spill_size
+        self.statistics = FrameStatistics()
+
+        self._buffer = bytearray()
+        self._start = 0
+        self._scan = 0
+        self._views: list[memoryview] = []
+        self._spill_file: BinaryIO | None = None
+        self._spill_map: mmap.mmap | None = None
+        self._eof = False
+
+    def __aiter__(self) -> "FrameReader":
+        return self
+
+    async def __anext__(self) -> memoryview:
+        if (frame := await self.read_frame()) is None:
+            raise StopAsyncIteration
+        return frame
+
+    def _release(self) -> None:
+        """Release the previous frame."""
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        if self._spill_map is not None:
+            self._spill_map.close()
+            self._spill_map = None
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def close(self) -> None:
+        """Release resources."""
+        self._release()
+        self._buffer.clear()
+
+    def _view(self, start: int, end: int) -> memoryview:
+        """Create a view on to the buffer."""
+        buffer_view = memoryview(self._buffer)
+        frame = buffer_view[start:end]
+        self._views.append(buffer_view)
+        self._views.append(frame)
+        return frame
+
+    def _spilled_view(self) -> memoryview:
+        """Create a view on to the spill file."""
+        assert self._spill_file is not None
+        self._spill_file.flush()
+        if not self._spill_file.tell():
+            return self._view(0, 0)
+        self._spill_map = mmap.mmap(
+            self._spill_file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+        frame = memoryview(self._spill_map)
+        self._views.append(frame)
+        return frame
+
+    def _compact(self) -> None:
+        """Discard consumed data from the buffer."""
+        if self._start:
+            del self._buffer[: self._start]
+            self._scan -= self._start
+            self._start = 0
+
+    def _spill(self) -> None:
+        """Move the partial frame in the buffer to a temporary file."""
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="toad-frame-")
+            self.statistics.spill_count += 1
+        self._spill_file.write(self._buffer)
+        self._buffer.clear()
+        self._scan = 0
+
+    @classmethod
+    def _is_blank(cls, frame: memoryview) -> bool:
+        """Check if a frame is empty, or only whitespace."""
+        # Searches the frame in place, and stops at the first non-whitespace byte
+        return NON_WHITESPACE.search(frame) is None
+
+    async def read_frame(self) -> memoryview | None:
+        """Read the next (non-blank) frame.
+
+        Returns:
+            A view on to the frame data (without the newline), or `None` at the end of the stream.
+        """
+        while (frame := await self._read_frame()) is not None:
+            if self._is_blank(frame):
+                continue
+            self.statistics.add_frame(frame.nbytes)
+            return frame
+        return None
+
+    async def _read_frame(self) -> memoryview | None:
+        self._release()
+        buffer = self._buffer
+        while True:
+            newline = buffer.find(b"\n", self._scan)
+            if newline != -1:
+                if self._spill_file is not None:
+                    self._spill_file.write(memoryview(buffer)[:newline])
+                    self._start = self._scan = newline + 1
+                    return self._spilled_view()
+                start = self._start
+                self._start = self._scan = newline + 1
+                return self._view(start, newline)
+
+            self._scan = len(buffer)
+            if self._eof:
+                if self._spill_file is not None:
+                    self._spill_file.write(memoryview(buffer)[self._start :])
+                    buffer.clear()
+                    self._start = self._scan = 0
+                    return self._spilled_view()
+                if self._start < len(buffer):
+                    start = self._start
+                    self._start = self._scan = len(buffer)
+                    return self._view(start, len(buffer))
+                return None
+
+            self._compact()
+            if self._spill_file is not None or len(buffer) >= self.spill_size:
+                self._spill()
+
+            with suppress(ConnectionError):
+                chunk = await self._stream.read(self.chunk_size)
+                if chunk:
+                    buffer += chunk
+                    continue
+            self._eof = True
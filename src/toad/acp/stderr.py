@@ -0,0 +1,112 @@
+import asyncio
+from contextlib import suppress
+from typing import Callable
+
+import rich.repr
+
+
+@rich.repr.auto
+class StderrReader:
+    """Continuously drains a stream (typically stderr) in to a bounded buffer.
+
+    Reading stderr as it is written prevents the process from blocking on a full pipe.
+    Only the most recent `max_size` bytes are retained.
+
+    """
+
+    def __init__(
+        self,
+        stream: asyncio.StreamReader,
+        max_size: int = 64 * 1024,
+        log: Callable[[bytes], None] | None = None,
+    ) -> None:
+        """
+
+        Args:
+            stream: Stream to read.
+            max_size: Maximum number of bytes to retain.
+            log: Optional callable to receive each complete line.
+        """
+        self._stream = stream
+        self.max_size = max_size
+        self._log = log
+        self._buffer = bytearray()
+        self._partial_line = bytearray()
+        self._task: asyncio.Task | None = None
+        self.byte_count = 0
+        """Total number of bytes read."""
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield "byte_count", self.byte_count
+        yield "max_size", self.max_size
+
+    def start(self) -> None:
+        """Start reading."""
+        self._task = asyncio.create_task(self._run(), name="stderr reader")
+
+    async def _run(self) -> None:
+        """Read the stream until EOF."""
+        while True:
+            try:
+                chunk = await self._stream.read(64 * 1024)
+            except ConnectionError:
+                break
+            if not chunk:
+                break
+            self.byte_count += len(chunk)
+            buffer = self._buffer
+            buffer += chunk
+            if (excess := len(buffer) - self.max_size) > 0:
+                del buffer[:excess]
+            if self._log is not None:
+                self._log_lines(chunk)
+        if self._log is not None and self._partial_line:
+            self._log(bytes(self._partial_line))
+            self._partial_line.clear()
+
+    def _log_lines(self, chunk: bytes) -> None:
+        """Send complete lines to the log callable."""
+        assert self._log is not None
+        partial_line = self._partial_line
+        partial_line += chunk
+        if (last_newline := partial_line.rfind(b"\n")) == -1:
+            if len(partial_line) > self.max_size:
+                self._log(bytes(partial_line))
+                partial_line.clear()
+            return
+        for line in partial_line[:last_newline].split(b"\n"):
+            self._log(bytes(line))
+        del partial_line[: last_newline + 1]
+
+    async def wait(self, timeout: float | None = None) -> None:
+        """Wait for the stream to close.
+
+        Args:
+            timeout: Maximum time to wait (in seconds), or `None` for no maximum.
+        """
+        if self._task is None:
+            return
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+
+    def stop(self) -> None:
+        """Stop reading."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def data(self) -> bytes:
+        """The most recent data read from the stream."""
+        return bytes(self._buffer)
+
+    @property
+    def text(self) -> str:
+        """The most recent data read from the stream, decoded as UTF-8.
+
+        If data was discarded, the text begins at the first complete line.
+        """
+        text = self._buffer.decode("utf-8", "replace")
+        if self.byte_count > len(self._buffer):
+            _, newline, text = text.partition("\n")
+        return text
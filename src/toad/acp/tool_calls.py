@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from typing import Any, Iterator, Mapping, cast
+
+import rich.repr
+
+from toad.acp import protocol
+
+
+@rich.repr.auto
+class ToolCallStore(Mapping[str, protocol.ToolCall]):
+    """Stores the latest version of tool calls.
+
+    Tool calls in the store are treated as immutable. An update creates a new version
+    of the tool call which shares unchanged values with the previous version, so it is
+    safe to hand a version to the UI without copying it.
+
+    The store holds at most `max_size` tool calls; the least recently updated are evicted.
+
+    """
+
+    def __init__(self, max_size: int = 512) -> None:
+        """
+
+        Args:
+            max_size: Maximum number of tool calls to store.
+        """
+        self.max_size = max(1, max_size)
+        self._tool_calls: OrderedDict[str, protocol.ToolCall] = OrderedDict()
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield "size", len(self._tool_calls)
+        yield "max_size", self.max_size
+
+    def __getitem__(self, tool_call_id: str) -> protocol.ToolCall:
+        return self._tool_calls[tool_call_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tool_calls)
+
+    def __len__(self) -> int:
+        return len(self._tool_calls)
+
+    def __contains__(self, tool_call_id: object) -> bool:
+        return tool_call_id in self._tool_calls
+
+    def _store(self, tool_call_id: str, tool_call: protocol.ToolCall) -> None:
+        """Store a version of a tool call, evicting old tool calls if required."""
+        tool_calls = self._tool_calls
+        tool_calls[tool_call_id] = tool_call
+        tool_calls.move_to_end(tool_call_id)
+        while len(tool_calls) > self.max_size:
+            tool_calls.popitem(last=False)
+
+    def add(self, tool_call: protocol.ToolCall) -> protocol.ToolCall:
+        """Add a new tool call.
+
+        Args:
+            tool_call: Tool call from the agent (must not be modified after adding).
+
+        Returns:
+            The stored tool call.
+        """
+        self._store(tool_call["toolCallId"], tool_call)
+        return tool_call
+
+    def update(
+        self,
+        tool_call_id: str,
+        changes: Mapping[str, Any],
+        *,
+        skip_none: bool = True,
+        default: protocol.ToolCall | None = None,
+    ) -> protocol.ToolCall:
+        """Create a new version of a tool call.
+
+        Args:
+            tool_call_id: ID of the tool call.
+            changes: Values to update.
+            skip_none: Ignore changes with a value of `None`?
+            default: Base tool call to use if the tool call isn't in the store.
+
+        Returns:
+            New version of the tool call.
+        """
+        current = self._tool_calls.get(tool_call_id, default)
+        tool_call = cast(dict[str, Any], {} if current is None else current.copy())
+        if skip_none:
+            tool_call.update(
+                (key, value) for key, value in changes.items() if value is not None
+            )
+        else:
+            tool_call.update(changes)
+        new_tool_call = cast(protocol.ToolCall, tool_call)
+        self._store(tool_call_id, new_tool_call)
+        return new_tool_call
@@ -0,0 +1,171 @@
+"""
+Timestamped traces of the frames exchanged with an agent.
+
+A trace is a text file with a header line, followed by one line per frame:
+
+    # toad trace 1
+    0.000412 > {"jsonrpc":"2.0","method":"initialize",...}
+    0.153027 < {"jsonrpc":"2.0","id":1,"result":{...}}
+
+Each line has the time (in seconds) since the trace started, the direction
+(`>` from Toad to the agent, `<` from the agent to Toad), and the frame.
+
+"""
+
+from itertools import chain
+import os
+from pathlib import Path
+import threading
+from time import perf_counter, sleep
+from typing import BinaryIO, Iterable, Iterator, Literal, NamedTuple
+
+import rich.repr
+
+from toad.log_sink import LogSink
+
+TRACE_HEADER = b"# toad trace 1"
+
+type Direction = Literal["<", ">"]
+
+LEGACY_FRAME_INTERVAL = 0.01
+"""Time between frames when replaying a log with no timing information."""
+
+
+class TraceRecord(NamedTuple):
+    """A frame in a trace."""
+
+    time: float
+    """Time since the start of the trace, in seconds."""
+    direction: Direction
+    """Direction of the frame."""
+    frame: bytes
+    """Frame data (without the newline)."""
+
+
+@rich.repr.auto
+class TraceWriter:
+    """Writes a trace of agent frames.
+
+    Lines are buffered and written from a thread by a `LogSink`.
+
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+
+        Args:
+            path: Path to the trace file.
+        """
+        self.path = path
+        self._sink = LogSink(path, max_size=2**62, retention=0)
+        self._start_time = perf_counter()
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield self.path
+
+    def start(self) -> None:
+        """Start writing the trace."""
+        self._start_time = perf_counter()
+        self._sink.start()
+        self._sink.write(TRACE_HEADER)
+
+    def record(self, direction: Direction, frame: bytes | memoryview) -> None:
+        """Record a frame.
+
+        Args:
+            direction: `">"` for frames sent to the agent, `"<"` for frames received.
+            frame: Frame data.
+        """
+        self._sink.write(
+            b"%.6f %s %s"
+            % (perf_counter() - self._start_time, direction.encode(), frame)
+        )
+
+    async def close(self) -> None:
+        """Flush and close the trace."""
+        await self._sink.close()
+
+
+def read_trace(trace_file: BinaryIO) -> Iterator[TraceRecord]:
+    """Read records from a trace, or from an agent log.
+
+    The file is streamed, so traces may be larger than memory. Agent logs have no timing
+    information, so frames are given times at a fixed interval.
+
+    Args:
+        trace_file: A trace file (or agent log) opened in binary mode.
+
+    Returns:
+        An iterator of records.
+    """
+    first_line = trace_file.readline()
+    if first_line.rstrip() == TRACE_HEADER:
+        for line in trace_file:
+            time, _, remainder = line.partition(b" ")
+            direction, _, frame = remainder.partition(b" ")
+            if direction not in (b"<", b">"):
+                continue
+            try:
+                frame_time = float(time)
+            except ValueError:
+                continue
+            yield TraceRecord(
+                frame_time,
+                "<" if direction == b"<" else ">",
+                frame.rstrip(b"\r\n"),
+            )
+        return
+
+    directions: dict[bytes, Direction] = {b"[agent]": "<", b"[client]": ">"}
+    frame_time = 0.0
+    for line in chain([first_line], trace_file):
+        sender, _, frame = line.partition(b" ")
+        if (direction := directions.get(sender)) is not None:
+            yield TraceRecord(frame_time, direction, frame.strip())
+            frame_time += LEGACY_FRAME_INTERVAL
+
+
+def _discard(input_file: BinaryIO) -> None:
+    """Read and discard data (so a writer doesn't block)."""
+    try:
+        while os.read(input_file.fileno(), 64 * 1024):
+            pass
+    except (OSError, ValueError):
+        pass
+
+
+def replay(
+    records: Iterable[TraceRecord],
+    output: BinaryIO,
+    speed: float = 1.0,
+    discard_input: BinaryIO | None = None,
+) -> int:
+    """Replay frames from the agent, with their original timing.
+
+    Args:
+        records: Trace records.
+        output: File to write frames.
+        speed: Speed multiplier, or 0 to replay as fast as possible.
+        discard_input: Optional file to read and discard (the client's frames).
+
+    Returns:
+        The number of frames written.
+    """
+    if discard_input is not None:
+        threading.Thread(target=_discard, args=(discard_input,), daemon=True).start()
+
+    frame_count = 0
+    start_time = perf_counter()
+    for record in records:
+        if record.direction != "<":
+            continue
+        if speed > 0:
+            # Sleep until the frame is due, so that errors don't accumulate
+            delay = start_time + record.time / speed - perf_counter()
+            if delay > 0:
+                output.flush()
+                sleep(delay)
+        output.write(record.frame + b"\n")
+        frame_count += 1
+    output.flush()
+    return frame_count
@@ -0,0 +1,127 @@
+import asyncio
+from contextlib import suppress
+
+import rich.repr
+
+
+@rich.repr.auto
+class FrameWriter:
+    """Writes newline delimited frames to a stream, from a background task.
+
+    Frames written in the same loop tick are coalesced in to a single write, and the
+    writer waits for the stream to drain before writing again.
+
+    """
+
+    def __init__(self, stream: asyncio.StreamWriter, max_queue: int = 1024) -> None:
+        """
+
+        Args:
+            stream: Stream to write to (typically the stdin of a process).
+            max_queue: Maximum number of pending frames before `send` will wait.
+        """
+        self._stream = stream
+        self.max_queue = max(1, max_queue)
+        self._pending: list[bytes] = []
+        self._pending_count = 0
+        self._wake = asyncio.Event()
+        self._capacity = asyncio.Event()
+        self._capacity.set()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+        self.bytes_written = 0
+        """Total bytes written to the stream."""
+        self.frames_written = 0
+        """Total frames written to the stream."""
+        self.write_count = 0
+        """Number of writes (each may contain many frames)."""
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield "queue_depth", self.queue_depth
+        yield "bytes_written", self.bytes_written
+        yield "frames_written", self.frames_written
+        yield "write_count", self.write_count
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of frames waiting to be written."""
+        return self._pending_count
+
+    def start(self) -> None:
+        """Start the writer task."""
+        self._task = asyncio.create_task(self._run(), name="frame writer")
+
+    def write(self, frame: bytes) -> None:
+        """Queue a frame to be written, without waiting.
+
+        Frames are written in order, but this method won't apply backpressure.
+        Use `send` where the caller can wait.
+
+        Args:
+            frame: Frame data (without a newline).
+        """
+        if self._closed:
+            return
+        self._pending.append(frame)
+        self._pending.append(b"\n")
+        self._pending_count += 1
+        if self._pending_count >= self.max_queue:
+            self._capacity.clear()
+        self._wake.set()
+
+    async def send(self, frame: bytes) -> None:
+        """Queue a frame to be written, waiting if the queue is full.
+
+        Args:
+            frame: Frame data (without a newline).
+        """
+        while not self._capacity.is_set() and not self._closed:
+            await self._capacity.wait()
+        self.write(frame)
+
+    async def _run(self) -> None:
+        """Write pending frames."""
+        stream = self._stream
+        try:
+            while True:
+                await self._wake.wait()
+                self._wake.clear()
+                if not self._pending:
+                    continue
+                data = b"".join(self._pending)
+                frame_count = self._pending_count
+                self._pending.clear()
+                self._pending_count = 0
+                stream.write(data)
+                self.bytes_written += len(data)
+                self.frames_written += frame_count
+                self.write_count += 1
+                self._capacity.set()
+                await stream.drain()
+        except (ConnectionError, RuntimeError):
+            # Process has gone away
+            pass
+        finally:
+            self._closed = True
+            self._capacity.set()
+
+    async def close(self) -> None:
+        """Flush pending frames, and stop the writer task."""
+        if self._pending and not self._closed:
+            data = b"".join(self._pending)
+            with suppress(ConnectionError, RuntimeError):
+                self._stream.write(data)
+                self.bytes_written += len(data)
+                self.frames_written += self._pending_count
+                self.write_count += 1
+                await self._stream.drain()
+        self._closed = True
+        self._pending.clear()
+        self._pending_count = 0
+        self._capacity.set()
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
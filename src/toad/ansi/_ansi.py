@@ -1,24 +1,39 @@
 from __future__ import annotations
 
 import io
-from itertools import accumulate
-import re2 as re
-
-from dataclasses import dataclass, field
+import pickle
+import zlib
+from array import array
+from time import perf_counter
+from itertools import accumulate, count
+import re as stdlib_re  # Faster than re2 for matching short sequences
+
+from dataclasses import dataclass, field, replace
 from functools import lru_cache
-from typing import Any, Awaitable, Callable, Iterable, Literal, Mapping, NamedTuple
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Mapping,
+    NamedTuple,
+)
 
 import rich.repr
 
 from textual import events
+from textual.cache import LRUCache
 from textual.color import Color
-from textual.content import Content, EMPTY_CONTENT
+from textual.content import Content, EMPTY_CONTENT, Span
 from textual.geometry import clamp
 from textual.style import Style, NULL_STYLE
 
 from toad.ansi._ansi_colors import ANSI_COLORS
 from toad.ansi._keys import TERMINAL_KEY_MAP, CURSOR_KEYS_APPLICATION
 from toad.ansi._control_codes import CONTROL_CODES
+from toad.ansi._fold_index import FoldIndex
 from toad.ansi._sgr_styles import SGR_STYLES
 from toad.ansi._stream_parser import (
     StreamParser,
@@ -28,6 +43,7 @@ from toad.ansi._stream_parser import (
     PatternCheck,
     ParseResult,
     Token,
+    TokenMatch,
 )
 
 from toad.dec import CHARSET_MAP
@@ -76,6 +92,22 @@ class FEPattern(Pattern):
     OSC_TERMINATORS = frozenset({"\x07", "\x9c"})
     DSC_TERMINATORS = frozenset({"\x9c"})
 
+    # Complete CSI and OSC sequences (after the ESC), for the fast path
+    MATCH_CSI = stdlib_re.compile(r"\[[^\x40-\x7e]*[\x40-\x7e]").match
+    MATCH_OSC = stdlib_re.compile(r"\][^\x07\x9c]*?(?:\x07|\x9c|\x1b\\)").match
+
+    def match(self, text: str, position: int) -> tuple[int, TokenMatch] | None:
+        character = text[position]
+        if character == "[":
+            if (match := self.MATCH_CSI(text, position)) is not None:
+                sequence = match.group(0)
+                return len(sequence), ("csi", sequence)
+        elif character == "]":
+            if (match := self.MATCH_OSC(text, position)) is not None:
+                sequence = match.group(0)
+                return len(sequence), ("osc", sequence)
+        return None
+
     def check(self) -> PatternCheck:
         sequence = io.StringIO()
         store = sequence.write
@@ -96,10 +128,11 @@ class FEPattern(Pattern):
                 OSC_TERMINATORS = self.OSC_TERMINATORS
                 while (character := (yield)) not in OSC_TERMINATORS:
                     store(character)
-                    if last_character == "\x1b" and character in {"\\", "\0x5c"}:
+                    if last_character == "\x1b" and character == "\\":
                         break
                     last_character = character
-                store(character)
+                else:
+                    store(character)
 
                 return ("osc", sequence.getvalue())
 
@@ -366,11 +399,169 @@ type ANSICommand = (
 )
 
 
+class SGR(NamedTuple):
+    """A decoded SGR (Select Graphic Rendition) sequence.
+
+    Not an `ANSICommand`: the stream combines it with the current style.
+    """
+
+    style: Style | None
+    """Style to add, or `None` to reset."""
+
+
+type CSIDecoder = Callable[[list[str]], ANSICommand | SGR | None]
+
+CSI_PATTERN = stdlib_re.compile(r"\[([<=>?]?)([0-9;]*)([!-/]*)([@-~])")
+"""Splits a CSI sequence in to private marker, parameters, intermediates, and final byte."""
+
+
+def _parameter(parameters: list[str], index: int = 0, default: int = 1) -> int:
+    """Get a numeric CSI parameter.
+
+    Args:
+        parameters: Parameters from the sequence.
+        index: Index of the parameter.
+        default: Value if the parameter is omitted.
+
+    Returns:
+        Parameter value.
+    """
+    if index < len(parameters) and (parameter := parameters[index]):
+        return int(parameter)
+    return default
+
+
+def _decode_sgr(parameters: list[str]) -> SGR:
+    return SGR(ANSIStream._parse_sgr(";".join(parameters)))
+
+
+def _decode_cursor_position(parameters: list[str]) -> ANSICursor:
+    # CUP - Cursor Position: ESC[n;mH
+    # HVP - Horizontal Vertical Position: ESC[n;mf
+    return ANSICursor(
+        absolute_x=_parameter(parameters, 1) - 1,
+        absolute_y=_parameter(parameters) - 1,
+    )
+
+
+def _decode_scroll_margin(parameters: list[str]) -> ANSIScrollMargin:
+    # DECSTBM - Set Top and Bottom Margins: ESC[t;br
+    if not parameters[0]:
+        return ANSIScrollMargin(None, None)
+    return ANSIScrollMargin(
+        _parameter(parameters) - 1, _parameter(parameters, 1) - 1
+    )
+
+
+def _decode_private_mode(parameters: list[str], enable: bool) -> ANSICommand | None:
+    if parameters == [""]:
+        return None
+    if (
+        len(parameters) == 1
+        and (features := ANSIStream.PRIVATE_MODES.get(parameters[0])) is not None
+    ):
+        return features[enable]
+    tracking: Literal["none"] | MOUSE_TRACKING_MODES | None = None
+    format: MOUSE_FORMAT | None = None
+    focus_events: bool | None = None
+    alternate_scroll: bool | None = None
+    for mode in parameters:
+        if mode == "1000":
+            tracking = "button" if enable else "none"
+        elif mode == "1002":
+            tracking = "drag" if enable else "none"
+        elif mode == "1003":
+            tracking = "all" if enable else "none"
+        elif mode == "1006":
+            format = "sgr"
+        elif mode == "1015":
+            format = "urxvt"
+        elif mode == "1004":
+            focus_events = enable
+        elif mode == "1007":
+            alternate_scroll = enable
+    return ANSIMouseTracking(
+        mode=tracking,
+        format=format,
+        focus_events=focus_events,
+        alternate_scroll=alternate_scroll,
+    )
+
+
+CSI_DECODERS: dict[tuple[str, str], CSIDecoder] = {
+    ("", "m"): _decode_sgr,
+    # CUU - Cursor Up: ESC[nA
+    ("", "A"): lambda parameters: ANSICursor(delta_y=-_parameter(parameters)),
+    # CUD - Cursor Down: ESC[nB
+    ("", "B"): lambda parameters: ANSICursor(delta_y=+_parameter(parameters)),
+    # CUF - Cursor Forward: ESC[nC
+    ("", "C"): lambda parameters: ANSICursor(delta_x=+_parameter(parameters)),
+    # CUB - Cursor Back: ESC[nD
+    ("", "D"): lambda parameters: ANSICursor(delta_x=-_parameter(parameters)),
+    # CNL - Cursor Next Line: ESC[nE
+    ("", "E"): lambda parameters: ANSICursor(
+        absolute_x=0, delta_y=+_parameter(parameters)
+    ),
+    # CPL - Cursor Previous Line: ESC[nF
+    ("", "F"): lambda parameters: ANSICursor(
+        absolute_x=0, delta_y=-_parameter(parameters)
+    ),
+    # CHA - Cursor Horizontal Absolute: ESC[nG
+    ("", "G"): lambda parameters: ANSICursor(absolute_x=_parameter(parameters) - 1),
+    ("", "H"): _decode_cursor_position,
+    ("", "f"): _decode_cursor_position,
+    # DCH - Delete Character: ESC[nP
+    ("", "P"): lambda parameters: ANSICursor(
+        clear_range=(0, _parameter(parameters) - 1), relative=True, erase=True
+    ),
+    # SU - Scroll Up: ESC[nS
+    ("", "S"): lambda parameters: ANSIScroll(-1, _parameter(parameters)),
+    # SD - Scroll Down: ESC[nT
+    ("", "T"): lambda parameters: ANSIScroll(+1, _parameter(parameters)),
+    # VPA - Vertical Position Absolute: ESC[nd
+    ("", "d"): lambda parameters: ANSICursor(absolute_y=_parameter(parameters) - 1),
+    # ECH - Erase Character: ESC[nX
+    ("", "X"): lambda parameters: ANSICursor(
+        clear_range=(0, _parameter(parameters) - 1), relative=True, erase=False
+    ),
+    # ED - Erase in Display: ESC[nJ
+    ("", "J"): lambda parameters: ANSIStream.CLEAR_SCREEN_MAP.get(parameters[0]),
+    # EL - Erase in Line: ESC[nK
+    ("", "K"): lambda parameters: ANSIStream.CLEAR_LINE_MAP.get(parameters[0]),
+    ("", "r"): _decode_scroll_margin,
+    # IRM - Insert / Replace Mode: ESC[4h / ESC[4l
+    ("", "h"): lambda parameters: (
+        ANSIStream.ENABLE_REPLACE_MODE if parameters[0] == "4" else None
+    ),
+    ("", "l"): lambda parameters: (
+        ANSIStream.DISABLE_REPLACE_MODE if parameters[0] == "4" else None
+    ),
+    # DSR - Device Status Report: ESC[6n
+    ("", "n"): lambda parameters: (
+        ANSIStream.CURSOR_POSITION_REQUEST if parameters[0] == "6" else None
+    ),
+    # DECSET / DECRST - private modes: ESC[?nh / ESC[?nl
+    ("?", "h"): lambda parameters: _decode_private_mode(parameters, True),
+    ("?", "l"): lambda parameters: _decode_private_mode(parameters, False),
+}
+"""Decoders for CSI sequences, keyed by private marker and final byte."""
+
+
 class ANSIStream:
     def __init__(self) -> None:
         self.parser = ANSIParser()
         self.style = NULL_STYLE
         self.show_cursor = True
+        self._token_handlers: dict[str, Callable[[str], ANSICommand | None]] = {
+            "content": ANSIContent,
+            "separator": self._on_separator,
+            "csi": self._on_csi,
+            "osc": self._on_osc,
+            "dec": self._on_dec,
+            "dec_invoke": self._on_dec_invoke,
+            "control": self._on_control,
+        }
+        """Token handlers, keyed by token type."""
 
     @classmethod
     @lru_cache(maxsize=1024)
@@ -423,10 +614,12 @@ class ANSIStream:
             `ANSICommand` instances.
         """
 
+        on_token = self.on_token
         for token in self.parser.feed(text):
-            if not isinstance(token, Token):
-                yield from self.on_token(token)
+            if not isinstance(token, Token) and (command := on_token(token)) is not None:
+                yield command
 
+    NEW_LINE = ANSINewLine()
     ANSI_SEPARATORS = {
         "\n": ANSICursor(delta_y=+1, absolute_x=0),
         "\r": ANSICursor(absolute_x=0),
@@ -476,229 +669,130 @@ class ANSIStream:
         "O": SHIFT_G3,
     }
 
+    CLEAR_SCREEN_MAP = {
+        "": CLEAR_SCREEN_CURSOR_TO_END,
+        "0": CLEAR_SCREEN_CURSOR_TO_END,
+        "1": CLEAR_SCREEN_CURSOR_TO_BEGINNING,
+        "2": CLEAR_SCREEN,
+        "3": CLEAR_SCREEN_SCROLLBACK,
+    }
+    CLEAR_LINE_MAP = {
+        "": CLEAR_LINE_CURSOR_TO_END,
+        "0": CLEAR_LINE_CURSOR_TO_END,
+        "1": CLEAR_LINE_CURSOR_TO_BEGINNING,
+        "2": CLEAR_LINE,
+    }
+    PRIVATE_MODES = {
+        "25": (HIDE_CURSOR, SHOW_CURSOR),
+        "1049": (DISABLE_ALTERNATE_SCREEN, ENABLE_ALTERNATE_SCREEN),
+        "2004": (DISABLE_BRACKETED_PASTE, ENABLE_BRACKETED_PASTE),
+        "12": (DISABLE_CURSOR_BLINK, ENABLE_CURSOR_BLINK),
+        "1": (
+            DISABLE_CURSOR_KEYS_APPLICATION_MODE,
+            ENABLE_CURSOR_KEYS_APPLICATION_MODE,
+        ),
+        "7": (DISABLE_AUTO_WRAP, ENABLE_AUTO_WRAP),
+    }
+    """Private modes with a single feature flag, mapped on to (reset, set) commands."""
+
+    CURSOR_POSITION_REQUEST = ANSICursorPositionRequest()
+    REVERSE_INDEX = ANSICursor(delta_y=-1, auto_scroll=True)
+    INDEX = ANSICursor(delta_y=+1, auto_scroll=True)
+
     @classmethod
     @lru_cache(maxsize=1024)
-    def _parse_csi(cls, csi: str) -> ANSICommand | None:
+    def _parse_csi(cls, csi: str) -> ANSICommand | SGR | None:
         """Parse CSI sequence in to an ansi segment.
 
+        Commands are immutable, so the same instance is returned for repeated sequences.
+
         Args:
             csi: CSI sequence.
 
         Returns:
             Ansi segment, or `None` if one couldn't be decoded.
         """
+        if (match := CSI_PATTERN.fullmatch(csi)) is None:
+            print("Unknown CSI", repr(csi))
+            return None
+        marker, parameters, intermediates, final = match.groups()
+        if intermediates or (decoder := CSI_DECODERS.get((marker, final))) is None:
+            print("Unknown CSI", repr(csi))
+            return None
+        if (command := decoder(parameters.split(";"))) is None:
+            print("Unknown CSI", repr(csi))
+        return command
+
+    def on_token(self, token: tuple[str, str]) -> ANSICommand | None:
+        """Process a token from the parser.
 
-        if match := re.fullmatch(r"\[(\d+)?(?:;)?(\d*)?(\w)", csi):
-            match_groups = match.groups(default="")
-            match match_groups:
-                case [lines, _, "A"]:
-                    # CUU - Cursor Up: ESC[nA
-                    return ANSICursor(delta_y=-int(lines or 1))
-                case [lines, _, "B"]:
-                    # CUD - Cursor Down: ESC[nB
-                    return ANSICursor(delta_y=+int(lines or 1))
-                case [cells, _, "C"]:
-                    # CUF - Cursor Forward: ESC[nC
-                    return ANSICursor(delta_x=+int(cells or 1))
-                case [cells, _, "D"]:
-                    # CUB - Cursor Back: ESC[nD
-                    return ANSICursor(delta_x=-int(cells or 1))
-                case [lines, _, "E"]:
-                    # CNL - Cursor Next Line: ESC[nE
-                    return ANSICursor(absolute_x=0, delta_y=+int(lines or 1))
-                case [lines, _, "F"]:
-                    # CPL - Cursor Previous Line: ESC[nF
-                    return ANSICursor(absolute_x=0, delta_y=-int(lines or 1))
-                case [cells, _, "G"]:
-                    # CHA - Cursor Horizontal Absolute: ESC[nG
-                    return ANSICursor(absolute_x=+int(cells or 1) - 1)
-                case [row, column, "H" | "f"]:
-                    # CUP - Cursor Position: ESC[n;mH
-                    # HVP - Horizontal Vertical Position: ESC[n;mf
-                    return ANSICursor(
-                        absolute_x=int(column or 1) - 1,
-                        absolute_y=int(row or 1) - 1,
-                    )
-                case [characters, _, "P"]:
-                    return ANSICursor(
-                        clear_range=(0, int(characters or 1) - 1),
-                        relative=True,
-                        erase=True,
-                    )
-                case [lines, _, "S"]:
-                    return ANSIScroll(-1, int(lines))
-                case [lines, _, "T"]:
-                    return ANSIScroll(+1, int(lines))
-                case [row, _, "d"]:
-                    # VPA - Vertical Position Absolute: ESC[nd
-                    return ANSICursor(absolute_y=int(row or 1) - 1)
-                case [characters, _, "X"]:
-                    return ANSICursor(
-                        clear_range=(0, int(characters or 1) - 1),
-                        relative=True,
-                        erase=False,
-                    )
-                case ["0" | "", _, "J"]:
-                    return cls.CLEAR_SCREEN_CURSOR_TO_END
-                case ["1", _, "J"]:
-                    return cls.CLEAR_SCREEN_CURSOR_TO_BEGINNING
-                case ["2", _, "J"]:
-                    return cls.CLEAR_SCREEN
-                case ["3", _, "J"]:
-                    return cls.CLEAR_SCREEN_SCROLLBACK
-                case ["0" | "", _, "K"]:
-                    return cls.CLEAR_LINE_CURSOR_TO_END
-                case ["1", _, "K"]:
-                    return cls.CLEAR_LINE_CURSOR_TO_BEGINNING
-                case ["2", _, "K"]:
-                    return cls.CLEAR_LINE
-                case [top, bottom, "r"]:
-                    return ANSIScrollMargin(
-                        int(top or "1") - 1 if top else None,
-                        int(bottom or "1") - 1 if top else None,
-                    )
-                case ["4", _, "h" | "l" as replace_mode]:
-                    return (
-                        cls.ENABLE_REPLACE_MODE
-                        if replace_mode == "h"
-                        else cls.DISABLE_REPLACE_MODE
-                    )
-
-                case ["6", _, "n"]:
-                    return ANSICursorPositionRequest()
-
-                case _:
-                    print("Unknown CSI (a)", repr(csi))
-                    return None
-
-        elif match := re.fullmatch(r"\[([0-9:;<=>?]*)([!-/]*)([@-~])", csi):
-            match match.groups(default=""):
-                case ["?25", "", "h"]:
-                    return cls.SHOW_CURSOR
-                case ["?25", "", "l"]:
-                    return cls.HIDE_CURSOR
-                case ["?1049", "", "h"]:
-                    return cls.ENABLE_ALTERNATE_SCREEN
-                case ["?1049", "", "l"]:
-                    return cls.DISABLE_ALTERNATE_SCREEN
-                case ["?2004", "", "h"]:
-                    return cls.ENABLE_BRACKETED_PASTE
-                case ["?2004", "", "l"]:
-                    return cls.DISABLE_BRACKETED_PASTE
-                case ["?12", "", "h"]:
-                    return cls.ENABLE_CURSOR_BLINK
-                case ["?12", "", "l"]:
-                    return cls.DISABLE_CURSOR_BLINK
-                case ["?1", "", "h"]:
-                    return cls.ENABLE_CURSOR_KEYS_APPLICATION_MODE
-                case ["?1", "", "l"]:
-                    return cls.DISABLE_CURSOR_KEYS_APPLICATION_MODE
-                case ["?7", "", "h"]:
-                    return cls.ENABLE_AUTO_WRAP
-                case ["?7", "", "l"]:
-                    return cls.DISABLE_AUTO_WRAP
-
-                # \x1b[22;0;0t
-                case [param1, param2, "t"]:
-                    print("TODO", "XTWINOPS", param1, param2)
-                    # 't' = XTWINOPS (Window manipulation)
-                    return None
-                case _:
-                    if match := re.fullmatch(r"\[\?([0-9;]+)([hl])", csi):
-                        modes = [m for m in match.group(1).split(";")]
-                        enable = match.group(2) == "h"
-                        tracking: Literal["none"] | MOUSE_TRACKING_MODES | None = None
-                        format: MOUSE_FORMAT | None = None
-                        focus_events: bool | None = None
-                        alternate_scroll: bool | None = None
-                        for mode in modes:
-                            if mode == "1000":
-                                tracking = "button" if enable else "none"
-                            elif mode == "1002":
-                                tracking = "drag" if enable else "none"
-                            elif mode == "1003":
-                                tracking = "all" if enable else "none"
-                            elif mode == "1006":
-                                format = "sgr"
-                            elif mode == "1015":
-                                format = "urxvt"
-                            elif mode == "1004":
-                                focus_events = enable
-                            elif mode == "1007":
-                                alternate_scroll = enable
-                        return ANSIMouseTracking(
-                            mode=tracking,
-                            format=format,
-                            focus_events=focus_events,
-                            alternate_scroll=alternate_scroll,
-                        )
-                    else:
-                        print("Unknown CSI (b)", repr(csi))
-                        return None
+        Args:
+            token: A pair of token type and text.
 
-        print("Unknown CSI (c)", repr(csi))
+        Returns:
+            An `ANSICommand`, or `None` if the token doesn't produce a command.
+        """
+        token_type, text = token
+        if (handler := self._token_handlers.get(token_type)) is None:
+            print("UNKNWON TOKEN", repr(token))
+            return None
+        return handler(text)
+
+    def _on_separator(self, separator: str) -> ANSICommand:
+        if separator == "\n":
+            return self.NEW_LINE
+        return self.ANSI_SEPARATORS[separator]
+
+    def _on_osc(self, osc: str) -> ANSICommand | None:
+        osc = osc.removesuffix("\x1b\\").rstrip("\x07\x9c")
+        command, separator, parameters = osc[1:].partition(";")
+        if not separator:
+            return None
+        if command == "8":
+            if link := parameters.rpartition(";")[2]:
+                self.style += Style(link=link)
+            else:
+                self.style = replace(self.style, link=None)
+        elif command == "2025":
+            current_directory = parameters.partition(";")[0]
+            self.current_directory = current_directory
+            return ANSIWorkingDirectory(current_directory)
         return None
 
-    def on_token(self, token: tuple[str, str]) -> Iterable[ANSICommand]:
-        match token:
-            case ["separator", separator]:
-                if separator == "\n":
-                    yield ANSINewLine()
-                else:
-                    yield self.ANSI_SEPARATORS[separator]
-
-            case ["osc", osc]:
-                match osc[1:].split(";"):
-                    case ["8", *_, link]:
-                        self.style += Style(link=link or None)
-                    case ["2025", current_directory, *_]:
-                        self.current_directory = current_directory
-                        yield ANSIWorkingDirectory(current_directory)
-
-            case ["csi", csi]:
-                if csi.endswith("m"):
-                    if (sgr_style := self._parse_sgr(csi[1:-1])) is None:
-                        self.style = NULL_STYLE
-                    else:
-                        self.style += sgr_style
-                        # Special case to use widget background rather
-                        # than theme background
-                        if (
-                            sgr_style.background is not None
-                            and sgr_style.background.ansi == -1
-                        ):
-                            self.style = (
-                                Style(foreground=self.style.foreground)
-                                + sgr_style.without_color
-                            )
-                    yield ANSIStyle(self.style)
-                else:
-                    if (ansi_segment := self._parse_csi(csi)) is not None:
-                        yield ansi_segment
-
-            case ["dec", dec]:
-                slot, character_set = list(dec)
-                yield ANSICharacterSet(DEC(DEC_SLOTS[slot], character_set))
-
-            case ["dec_invoke", dec_invoke]:
-                yield ANSICharacterSet(dec_invoke=self.DEC_INVOKE_MAP[dec_invoke[0]])
-
-            case ["control", code]:
-                if (control := CONTROL_CODES.get(code)) is not None:
-                    if control == "ri":  # control code
-                        yield ANSICursor(delta_y=-1, auto_scroll=True)
-                    elif control == "ind":
-                        yield ANSICursor(delta_y=+1, auto_scroll=True)
-                    else:
-                        print("CONTROL", repr(code), repr(control))
-                else:
-                    print("NOT HANDLED", code)
+    def _on_csi(self, csi: str) -> ANSICommand | None:
+        command = self._parse_csi(csi)
+        if type(command) is not SGR:
+            return command
+        if (sgr_style := command.style) is None:
+            self.style = NULL_STYLE
+        else:
+            self.style += sgr_style
+            # Special case to use widget background rather
+            # than theme background
+            if sgr_style.background is not None and sgr_style.background.ansi == -1:
+                self.style = (
+                    Style(foreground=self.style.foreground) + sgr_style.without_color
+                )
+        return ANSIStyle(self.style)
 
-            case ["content", text]:
-                yield ANSIContent(text)
+    def _on_dec(self, dec: str) -> ANSICommand:
+        slot, character_set = list(dec)
+        return ANSICharacterSet(DEC(DEC_SLOTS[slot], character_set))
 
-            case _:
-                print("UNKNWON TOKEN", repr(token))
+    def _on_dec_invoke(self, dec_invoke: str) -> ANSICommand:
+        return ANSICharacterSet(dec_invoke=self.DEC_INVOKE_MAP[dec_invoke[0]])
+
+    def _on_control(self, code: str) -> ANSICommand | None:
+        if (control := CONTROL_CODES.get(code)) is not None:
+            if control == "ri":  # control code
+                return self.REVERSE_INDEX
+            elif control == "ind":
+                return self.INDEX
+            else:
+                print("CONTROL", repr(code), repr(control))
+        else:
+            print("NOT HANDLED", code)
+        return None
 
 
 class LineFold(NamedTuple):
@@ -736,6 +830,9 @@ class LineRecord:
     updates: int = 0
     """An integer used for caching."""
 
+    fold_width: int | None = None
+    """The width used to fold the line, or `None` if it isn't known."""
+
 
 @rich.repr.auto
 class ScrollMargin(NamedTuple):
@@ -765,17 +862,514 @@ class ScrollMargin(NamedTuple):
         )
 
 
+def fold_line(line_no: int, line: Content, width: int, updates: int) -> list[LineFold]:
+    """Fold (wrap) a line.
+
+    Args:
+        line_no: Line number.
+        line: Line content.
+        width: Width to fold to.
+        updates: Updates count for the folds.
+
+    Returns:
+        A list of folds.
+    """
+    if not width:
+        return [LineFold(0, 0, 0, line, updates)]
+    line_length = line.cell_length
+    if line_length <= width:
+        return [LineFold(line_no, 0, 0, line, updates)]
+
+    folded_lines = line.fold(width)
+    offsets = [0, *accumulate(len(line) for line in folded_lines)][:-1]
+    folds = [
+        LineFold(line_no, line_offset, offset, folded_line, updates)
+        for line_offset, (offset, folded_line) in enumerate(zip(offsets, folded_lines))
+    ]
+    assert len(folds)
+    return folds
+
+
+@dataclass
+class CompactBlock:
+    """A block of lines in compact form."""
+
+    block_id: int
+    """Unique identifier (for caching)."""
+    data: bytes
+    """Plain text and packed style runs (optionally compressed)."""
+    compressed: bool
+    """Is `data` compressed with zlib?"""
+    styles: array[int]
+    """Background style of each line (indices in to the style table)."""
+    fold_widths: array[int]
+    """Fold width of each line, or -1 if it isn't known."""
+    fold_counts: array[int]
+    """Number of folds in each line."""
+    updates: array[int]
+    """Update counter of each line."""
+
+    @property
+    def size(self) -> int:
+        """Approximate size in bytes."""
+        return (
+            len(self.data)
+            + len(self.styles) * self.styles.itemsize
+            + len(self.fold_widths) * self.fold_widths.itemsize
+            + len(self.fold_counts) * self.fold_counts.itemsize
+            + len(self.updates) * self.updates.itemsize
+        )
+
+
+class DecodedBlock(NamedTuple):
+    """The contents of a `CompactBlock`, decoded."""
+
+    text: str
+    """Text of all lines, concatenated."""
+    text_offsets: list[int]
+    """Offset of each line within `text` (plus the end)."""
+    span_offsets: list[int]
+    """Offset of each line's spans within `spans` (plus the end)."""
+    spans: array[int]
+    """Start, end, and style index of spans."""
+
+
+@rich.repr.auto
+class CompactLines:
+    """The lines in a scrollback buffer, with older lines stored compactly.
+
+    Recent lines (at least `hot_lines`) are kept as `LineRecord` objects. Older lines
+    are packed in to blocks of plain text and style runs (optionally compressed with
+    zlib), and are rehydrated to `LineRecord` objects when they are accessed (typically
+    when scrolled in to view).
+
+    Has the same interface as the list of lines in a `Buffer`.
+
+    """
+
+    BLOCK_LINES = 256
+    """Number of lines in a compact block."""
+    HOT_LINES = 1000
+    """Default minimum number of recent lines which aren't compacted."""
+    REHYDRATED_LINES = 1024
+    """Maximum number of rehydrated lines to keep."""
+    DECODED_BLOCKS = 8
+    """Maximum number of decoded blocks to keep."""
+
+    def __init__(
+        self,
+        *,
+        max_lines: int | None = None,
+        max_bytes: int | None = None,
+        compress: bool = True,
+    ) -> None:
+        """
+
+        Args:
+            max_lines: Maximum number of lines, or `None` for no limit.
+            max_bytes: Maximum size of compacted lines in bytes, or `None` for no limit.
+            compress: Compress compacted lines?
+        """
+        self.hot_lines = self.HOT_LINES
+        """Minimum number of recent lines which aren't compacted."""
+        self.max_lines = max_lines
+        """Maximum number of lines, or `None` for no limit."""
+        self.max_bytes = max_bytes
+        """Maximum size of compacted lines in bytes, or `None` for no limit."""
+        self.compress = compress
+        """Compress compacted lines?"""
+        self._hot: list[LineRecord] = []
+        self._blocks: list[CompactBlock] = []
+        self._compact_bytes = 0
+        self._styles: list[Style | str] = []
+        self._style_ids: dict[Style | str, int] = {}
+        self._rehydrated: dict[int, tuple[LineRecord, Content, Style]] = {}
+        """Rehydrated lines, with their original content and style, in access order."""
+        self._decoded: LRUCache[int, DecodedBlock] = LRUCache(self.DECODED_BLOCKS)
+        self._block_ids = count()
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield "lines", len(self)
+        yield "compact_lines", self.compact_line_count
+        yield "compact_bytes", self._compact_bytes
+
+    def __len__(self) -> int:
+        return len(self._blocks) * self.BLOCK_LINES + len(self._hot)
+
+    def __getitem__(self, line_no: int) -> LineRecord:
+        compact_line_count = len(self._blocks) * self.BLOCK_LINES
+        if line_no >= compact_line_count:
+            # Recent lines (the usual case)
+            return self._hot[line_no - compact_line_count]
+        if line_no < 0:
+            line_no += compact_line_count + len(self._hot)
+            if line_no >= compact_line_count:
+                return self._hot[line_no - compact_line_count]
+            if line_no < 0:
+                raise IndexError("line number out of range")
+        rehydrated = self._rehydrated
+        if (cached := rehydrated.pop(line_no, None)) is not None:
+            rehydrated[line_no] = cached
+            return cached[0]
+        line_record = self._rehydrate(line_no)
+        rehydrated[line_no] = (line_record, line_record.content, line_record.style)
+        if len(rehydrated) > self.REHYDRATED_LINES:
+            evict_line_no = next(iter(rehydrated))
+            self._write_back(evict_line_no, *rehydrated.pop(evict_line_no))
+        return line_record
+
+    def __iter__(self) -> Iterator[LineRecord]:
+        for line_no in range(len(self._blocks) * self.BLOCK_LINES):
+            if (cached := self._rehydrated.get(line_no)) is not None:
+                yield cached[0]
+            else:
+                yield self._rehydrate(line_no)
+        yield from self._hot
+
+    def __delitem__(self, index: slice) -> None:
+        if not isinstance(index, slice) or index.stop is not None or index.step:
+            raise TypeError("only lines at the end may be deleted")
+        start = index.start or 0
+        self.truncate(max(0, start + len(self)) if start < 0 else start)
+
+    @property
+    def compact_line_count(self) -> int:
+        """Number of lines in compact form."""
+        return len(self._blocks) * self.BLOCK_LINES
+
+    @property
+    def compact_bytes(self) -> int:
+        """Approximate size of lines in compact form, in bytes."""
+        return self._compact_bytes
+
+    def append(self, line_record: LineRecord) -> None:
+        """Add a line to the end.
+
+        Args:
+            line_record: New line.
+        """
+        self._hot.append(line_record)
+        if len(self._hot) >= self.hot_lines + self.BLOCK_LINES:
+            self._compact()
+
+    def clear(self) -> None:
+        """Remove all lines."""
+        self._hot.clear()
+        self._blocks.clear()
+        self._compact_bytes = 0
+        self._styles.clear()
+        self._style_ids.clear()
+        self._rehydrated.clear()
+        self._decoded.clear()
+
+    def truncate(self, line_count: int) -> None:
+        """Remove lines from the end.
+
+        Args:
+            line_count: Number of lines to keep.
+        """
+        compact_line_count = self.compact_line_count
+        if line_count >= compact_line_count:
+            del self._hot[line_count - compact_line_count :]
+            return
+        # Remaining lines in the last compact block become recent lines
+        block_index = line_count // self.BLOCK_LINES
+        block_start = block_index * self.BLOCK_LINES
+        hot = [self[line_no] for line_no in range(block_start, line_count)]
+        self._flush_rehydrated(block_start)
+        for block in self._blocks[block_index:]:
+            self._compact_bytes -= block.size
+            self._decoded.discard(block.block_id)
+        del self._blocks[block_index:]
+        self._hot[:] = hot
+
+    def get_excess_lines(self) -> int:
+        """Get the number of lines to remove from the start, to keep within the budget.
+
+        Returns:
+            Number of lines (a multiple of `BLOCK_LINES`).
+        """
+        max_lines = self.max_lines
+        max_bytes = self.max_bytes
+        line_count = len(self)
+        compact_bytes = self._compact_bytes
+        excess_lines = 0
+        for block in self._blocks:
+            if (max_lines is None or line_count - excess_lines <= max_lines) and (
+                max_bytes is None or compact_bytes <= max_bytes
+            ):
+                break
+            excess_lines += self.BLOCK_LINES
+            compact_bytes -= block.size
+        return excess_lines
+
+    def remove_start(self, line_count: int) -> None:
+        """Remove lines from the start.
+
+        Args:
+            line_count: Number of lines to remove (a multiple of `BLOCK_LINES`).
+        """
+        block_count, remainder = divmod(line_count, self.BLOCK_LINES)
+        assert not remainder, "line count must be a multiple of BLOCK_LINES"
+        self._flush_rehydrated(len(self._blocks) * self.BLOCK_LINES)
+        for block in self._blocks[:block_count]:
+            self._compact_bytes -= block.size
+            self._decoded.discard(block.block_id)
+        del self._blocks[:block_count]
+        # Folds store their line number
+        for line_record in self._hot:
+            line_record.folds[:] = [
+                fold._replace(line_no=fold.line_no - line_count)
+                for fold in line_record.folds
+            ]
+
+    def _flush_rehydrated(self, line_count: int) -> None:
+        """Write back and discard rehydrated lines.
+
+        Args:
+            line_count: Lines before this line number are written back.
+        """
+        for line_no, (line_record, content, style) in self._rehydrated.items():
+            if line_no < line_count:
+                self._write_back(line_no, line_record, content, style)
+        self._rehydrated.clear()
+
+    def _get_style_id(self, style: Style | str) -> int:
+        if (style_id := self._style_ids.get(style)) is None:
+            style_id = self._style_ids[style] = len(self._styles)
+            self._styles.append(style)
+        return style_id
+
+    def _compact(self) -> None:
+        """Move the oldest recent lines in to a compact block."""
+        line_records = self._hot[: self.BLOCK_LINES]
+        del self._hot[: self.BLOCK_LINES]
+        block = self._encode(
+            [(line_record.content, line_record.style) for line_record in line_records],
+            array(
+                "i",
+                [
+                    -1 if line_record.fold_width is None else line_record.fold_width
+                    for line_record in line_records
+                ],
+            ),
+            array("I", [len(line_record.folds) for line_record in line_records]),
+            array("q", [line_record.updates for line_record in line_records]),
+        )
+        self._blocks.append(block)
+        self._compact_bytes += block.size
+
+    def _encode(
+        self,
+        lines: list[tuple[Content, Style]],
+        fold_widths: array[int],
+        fold_counts: array[int],
+        updates: array[int],
+    ) -> CompactBlock:
+        """Pack lines in to a compact block.
+
+        Args:
+            lines: Content and background style of each line.
+            fold_widths: Fold width of each line.
+            fold_counts: Number of folds in each line.
+            updates: Update counter of each line.
+
+        Returns:
+            A new compact block.
+        """
+        get_style_id = self._get_style_id
+        text_lengths = array("I")
+        span_counts = array("I")
+        spans = array("I")
+        for content, _style in lines:
+            text_lengths.append(len(content.plain))
+            span_counts.append(len(content.spans))
+            for start, end, span_style in content.spans:
+                spans.extend((start, end, get_style_id(span_style)))
+        text = "".join(content.plain for content, _style in lines)
+        data = pickle.dumps(
+            (text, text_lengths, span_counts, spans), pickle.HIGHEST_PROTOCOL
+        )
+        if self.compress:
+            data = zlib.compress(data, 1)
+        return CompactBlock(
+            next(self._block_ids),
+            data,
+            self.compress,
+            array("I", [get_style_id(style) for _content, style in lines]),
+            fold_widths,
+            fold_counts,
+            updates,
+        )
+
+    def _decode(self, block: CompactBlock) -> DecodedBlock:
+        """Unpack a compact block.
+
+        Args:
+            block: A compact block.
+
+        Returns:
+            The decoded block.
+        """
+        if (decoded := self._decoded.get(block.block_id)) is None:
+            data = zlib.decompress(block.data) if block.compressed else block.data
+            text, text_lengths, span_counts, spans = pickle.loads(data)
+            decoded = DecodedBlock(
+                text,
+                [0, *accumulate(text_lengths)],
+                [0, *accumulate(span_count * 3 for span_count in span_counts)],
+                spans,
+            )
+            self._decoded.set(block.block_id, decoded)
+        return decoded
+
+    def _get_line(self, block: CompactBlock, offset: int) -> tuple[Content, Style]:
+        """Get the content and background style of a line in a block.
+
+        Args:
+            block: A compact block.
+            offset: Offset of the line within the block.
+
+        Returns:
+            Content and style.
+        """
+        text, text_offsets, span_offsets, spans = self._decode(block)
+        styles = self._styles
+        content = Content(
+            text[text_offsets[offset] : text_offsets[offset + 1]],
+            [
+                Span(spans[index], spans[index + 1], styles[spans[index + 2]])
+                for index in range(span_offsets[offset], span_offsets[offset + 1], 3)
+            ],
+            strip_control_codes=False,
+        )
+        style = styles[block.styles[offset]]
+        assert isinstance(style, Style)
+        return content, style
+
+    def _rehydrate(self, line_no: int) -> LineRecord:
+        """Build a line record from its compact form.
+
+        Args:
+            line_no: Line number.
+
+        Returns:
+            Line record.
+        """
+        block_index, offset = divmod(line_no, self.BLOCK_LINES)
+        block = self._blocks[block_index]
+        content, style = self._get_line(block, offset)
+        fold_width = block.fold_widths[offset]
+        updates = block.updates[offset]
+        # Lines aren't folded if auto wrap was disabled, so only fold wrapped lines
+        if block.fold_counts[offset] == 1:
+            folds = [LineFold(line_no, 0, 0, content.expand_tabs(8), updates)]
+        else:
+            folds = fold_line(line_no, content.expand_tabs(8), fold_width, updates)
+        return LineRecord(
+            content,
+            style,
+            folds,
+            updates,
+            None if fold_width == -1 else fold_width,
+        )
+
+    def _write_back(
+        self, line_no: int, line_record: LineRecord, content: Content, style: Style
+    ) -> None:
+        """Write changes to a rehydrated line back to its compact block.
+
+        Args:
+            line_no: Line number.
+            line_record: Rehydrated line record.
+            content: Content when the line was rehydrated.
+            style: Style when the line was rehydrated.
+        """
+        block_index, offset = divmod(line_no, self.BLOCK_LINES)
+        if block_index >= len(self._blocks):
+            return
+        block = self._blocks[block_index]
+        fold_width = line_record.fold_width
+        block.fold_widths[offset] = -1 if fold_width is None else fold_width
+        block.fold_counts[offset] = len(line_record.folds)
+        block.updates[offset] = line_record.updates
+        if line_record.content is content and line_record.style is style:
+            return
+        lines = [
+            self._get_line(block, line_offset)
+            for line_offset in range(self.BLOCK_LINES)
+        ]
+        lines[offset] = (line_record.content, line_record.style)
+        new_block = self._encode(
+            lines, block.fold_widths, block.fold_counts, block.updates
+        )
+        self._blocks[block_index] = new_block
+        self._compact_bytes += new_block.size - block.size
+        self._decoded.discard(block.block_id)
+
+
+class FoldedLines:
+    """The folded lines in a buffer, indexed by fold (read only)."""
+
+    __slots__ = ["_buffer"]
+
+    def __init__(self, buffer: Buffer) -> None:
+        """
+
+        Args:
+            buffer: The buffer.
+        """
+        self._buffer = buffer
+
+    def __len__(self) -> int:
+        return self._buffer.fold_index.total
+
+    def __getitem__(self, fold: int) -> LineFold:
+        buffer = self._buffer
+        line_no, line_offset = buffer.fold_index.locate(fold)
+        return buffer.lines[line_no].folds[line_offset]
+
+    def __iter__(self) -> Iterator[LineFold]:
+        for line in self._buffer.lines:
+            yield from line.folds
+
+
+class LineToFold:
+    """The index of the first folded line, for each line in a buffer (read only)."""
+
+    __slots__ = ["_buffer"]
+
+    def __init__(self, buffer: Buffer) -> None:
+        """
+
+        Args:
+            buffer: The buffer.
+        """
+        self._buffer = buffer
+
+    def __len__(self) -> int:
+        return len(self._buffer.fold_index)
+
+    def __getitem__(self, line_no: int) -> int:
+        fold_index = self._buffer.fold_index
+        if line_no >= len(fold_index):
+            raise IndexError("line number out of range")
+        return fold_index.fold_start(line_no)
+
+
 @dataclass
 class Buffer:
     """A terminal buffer (scrollback or alternate)"""
 
     name: str = "buffer"
     """Name of the buffer (debugging aid)."""
-    lines: list[LineRecord] = field(default_factory=list)
+    lines: list[LineRecord] | CompactLines = field(default_factory=list)
     """unfolded lines."""
-    line_to_fold: list[int] = field(default_factory=list)
-    """An index from folded lines on to unfolded lines."""
-    folded_lines: list[LineFold] = field(default_factory=list)
+    fold_index: FoldIndex = field(default_factory=FoldIndex)
+    """Number of folds in each line, for mapping between lines and folded lines."""
+    line_to_fold: LineToFold = field(init=False)
+    """An index from unfolded lines on to folded lines."""
+    folded_lines: FoldedLines = field(init=False)
     """Folded lines."""
     scroll_margin: ScrollMargin = ScrollMargin(None, None)
     """Scroll margins"""
@@ -787,7 +1381,15 @@ class Buffer:
     """The longest line in the buffer."""
     updates: int = 0
     """Updates count (used in caching)."""
+    trimmed_folds: int = 0
+    """Total number of folded lines removed from the start of the buffer."""
     _updated_lines: set[int] | None = None
+    _reflow_line: int = -1
+    """The next line to refold in a background reflow, or -1 if there is no reflow pending."""
+
+    def __post_init__(self) -> None:
+        self.line_to_fold = LineToFold(self)
+        self.folded_lines = FoldedLines(self)
 
     @property
     def line_count(self) -> int:
@@ -797,7 +1399,7 @@ class Buffer:
     @property
     def height(self) -> int:
         """Height of the buffer (number of folded lines)."""
-        height = len(self.folded_lines)
+        height = self.fold_index.total
         if (
             height == 1
             and not self.lines[-1].content.plain
@@ -815,8 +1417,8 @@ class Buffer:
     def cursor(self) -> tuple[int, int]:
         """The cursor offset within the un-folded lines."""
 
-        if self.cursor_line >= len(self.folded_lines):
-            return (len(self.folded_lines), 0)
+        if self.cursor_line >= (fold_count := self.fold_index.total):
+            return (fold_count, 0)
         cursor_folded_line = self.folded_lines[self.cursor_line]
         cursor_line_offset = cursor_folded_line.line_offset
         line_no = cursor_folded_line.line_no
@@ -880,21 +1482,58 @@ class Buffer:
             updates: the initial updates index.
 
         """
-        del self.lines[:]
-        del self.line_to_fold[:]
-        del self.folded_lines[:]
+        self.lines.clear()
+        self.fold_index.clear()
+        self._reflow_line = -1
         self.cursor_line = 0
         self.cursor_offset = 0
         self.max_line_width = 0
         self.updates = updates
 
+    def append_line(self, line_record: LineRecord) -> None:
+        """Add a line to the end of the buffer.
+
+        Args:
+            line_record: The new line.
+        """
+        self.lines.append(line_record)
+        self.fold_index.append(len(line_record.folds))
+
+    def truncate(self, line_count: int) -> None:
+        """Remove lines from the end of the buffer.
+
+        Args:
+            line_count: Number of lines to keep.
+        """
+        del self.lines[line_count:]
+        self.fold_index.truncate(line_count)
+        self._reflow_line = min(self._reflow_line, line_count - 1)
+
+    def trim(self) -> None:
+        """Remove lines from the start of the buffer, to keep within its budget.
+
+        Only applies if the lines are stored in a `CompactLines` object.
+
+        """
+        lines = self.lines
+        if not isinstance(lines, CompactLines) or not (
+            line_count := lines.get_excess_lines()
+        ):
+            return
+        fold_count = self.fold_index.fold_start(line_count)
+        lines.remove_start(line_count)
+        self.fold_index.remove_start(line_count)
+        self.cursor_line = max(0, self.cursor_line - fold_count)
+        if self._reflow_line >= 0:
+            self._reflow_line = max(-1, self._reflow_line - line_count)
+        self.trimmed_folds += fold_count
+        # Every folded line has moved
+        self._updated_lines = None
+
     def remove_last_line(self) -> None:
         if not self.lines:
             return
-        last_line_index = len(self.lines) - 1
-        del self.lines[-1]
-        del self.folded_lines[self.line_to_fold[last_line_index] :]
-        del self.line_to_fold[last_line_index]
+        self.truncate(len(self.lines) - 1)
         self.updates += 1
 
 
@@ -996,7 +1635,9 @@ class TerminalState:
         """Should content wrap?"""
         self.current_directory: str = ""
         """Current working directory."""
-        self.scrollback_buffer = Buffer("scrollback")
+        self.scrollback_lines = CompactLines()
+        """Scrollback buffer lines (bounded, with older lines stored compactly)."""
+        self.scrollback_buffer = Buffer("scrollback", self.scrollback_lines)
         """Scrollbar buffer lines."""
         self.alternate_buffer = Buffer("alternate")
         """Alternate buffer lines."""
@@ -1073,8 +1714,34 @@ class TerminalState:
         if height is not None:
             self.height = height
 
-        if previous_width != width:
+        if self.width != previous_width:
             self._reflow()
+        # Keep lines which may be on screen (or may be modified) as line records
+        self.scrollback_lines.hot_lines = max(
+            CompactLines.HOT_LINES, self.height * 2
+        )
+
+    def set_scrollback_limits(
+        self,
+        max_lines: int | None = None,
+        max_bytes: int | None = None,
+        compress: bool = True,
+    ) -> None:
+        """Set the budget for the scrollback buffer.
+
+        Lines are removed from the start of the scrollback buffer, in blocks of
+        `CompactLines.BLOCK_LINES`, to keep within the budget. Recent lines are always
+        kept, so the scrollback may not shrink below `CompactLines.hot_lines`.
+
+        Args:
+            max_lines: Maximum number of lines, or `None` for no limit.
+            max_bytes: Maximum size of older lines in bytes, or `None` for no limit.
+            compress: Compress older lines?
+        """
+        scrollback_lines = self.scrollback_lines
+        scrollback_lines.max_lines = max_lines
+        scrollback_lines.max_bytes = max_bytes
+        scrollback_lines.compress = compress
 
     def key_event_to_stdin(self, event: events.Key) -> str | None:
         """Get the stdin string for a key event.
@@ -1120,44 +1787,140 @@ class TerminalState:
                 break
             buffer.remove_last_line()
 
+    @property
+    def reflow_pending(self) -> bool:
+        """Are there lines which haven't been refolded since the last change of width?"""
+        return (
+            self.scrollback_buffer._reflow_line >= 0
+            or self.alternate_buffer._reflow_line >= 0
+        )
+
     def _reflow(self) -> None:
-        buffer = self.buffer
-        if not buffer.lines:
-            return
+        """Refold lines after a change of width.
+
+        To keep resizing responsive, only the lines on the screen and the cursor line are
+        refolded here. Other lines are refolded by `refold` as they are displayed, and by
+        `reflow` in the background.
+
+        """
+        for buffer in (self.scrollback_buffer, self.alternate_buffer):
+            if not buffer.lines:
+                continue
+            buffer._updated_lines = None
+            buffer._reflow_line = buffer.last_line_no
+            self._refold_screen(buffer)
+            fold_index = buffer.fold_index
+            if buffer.cursor_line < fold_index.total:
+                cursor_line_no, _ = fold_index.locate(buffer.cursor_line)
+                self._refold_line(buffer, cursor_line_no)
+
+    def _refold_screen(self, buffer: Buffer) -> None:
+        """Refold lines on the screen, if a reflow is pending.
 
-        buffer._updated_lines = None
-        # Unfolded cursor position
-        cursor_line, cursor_offset = buffer.cursor
+        Lines after `Buffer._reflow_line` are always folded to the current width. This
+        continues the reflow until that includes the screen, so that screen positions
+        are the same as they would be if the entire buffer had been refolded.
 
-        buffer.folded_lines.clear()
-        buffer.line_to_fold.clear()
+        Args:
+            buffer: Buffer to refold.
+        """
+        fold_index = buffer.fold_index
+        while (line_no := buffer._reflow_line) >= 0 and (
+            fold_index.fold_start(line_no + 1) > fold_index.total - self.height
+        ):
+            self._refold_line(buffer, line_no)
+            buffer._reflow_line -= 1
+
+    def _refold_line(self, buffer: Buffer, line_no: int) -> bool:
+        """Refold a line to the current width, if required.
+
+        Args:
+            buffer: Buffer containing the line.
+            line_no: Line number (unfolded).
+
+        Returns:
+            `True` if the line was refolded, `False` if it was already folded to the width.
+        """
+        line_record = buffer.lines[line_no]
         width = self.width
+        if line_record.fold_width == width:
+            return False
+        fold_index = buffer.fold_index
+        fold_start = fold_index.fold_start(line_no)
+        previous_fold_count = fold_index[line_no]
+        cursor_line = buffer.cursor_line
+        # Is the cursor below the last line?
+        cursor_past_end = cursor_line >= fold_index.total
+        # Unfolded cursor offset, if the cursor is in this line
+        cursor_offset: int | None = None
+        if fold_start <= cursor_line < fold_start + previous_fold_count:
+            cursor_fold = line_record.folds[cursor_line - fold_start]
+            cursor_offset = cursor_fold.offset + buffer.cursor_offset
 
-        for line_no, line_record in enumerate(buffer.lines):
-            line_expanded_tabs = line_record.content.expand_tabs(8)
-            line_record.folds[:] = self._fold_line(line_no, line_expanded_tabs, width)
-            line_record.updates = self.advance_updates()
-            buffer.line_to_fold.append(len(buffer.folded_lines))
-            buffer.folded_lines.extend(line_record.folds)
-
-        # After reflow, we need to work out where the cursor is within the folded lines
-        # cursor_line = min(cursor_line, len(buffer.lines) - 1)
-        if cursor_line >= len(buffer.lines):
-            buffer.cursor_line = len(buffer.lines)
-            buffer.cursor_offset = 0
-        else:
-            line = buffer.lines[cursor_line]
-            fold_cursor_line = buffer.line_to_fold[cursor_line]
+        line_record.folds[:] = self._fold_line(
+            line_no, line_record.content.expand_tabs(8), width
+        )
+        line_record.fold_width = width
+        line_record.updates = self.advance_updates()
+        fold_count = len(line_record.folds)
+        fold_index.set(line_no, fold_count)
 
-            fold_cursor_offset = 0
-            for fold in reversed(line.folds):
+        # Keep the cursor on the same character
+        if cursor_past_end:
+            buffer.cursor_line = fold_index.total
+            buffer.cursor_offset = 0
+        elif cursor_offset is not None:
+            for fold in reversed(line_record.folds):
                 if cursor_offset >= fold.offset:
-                    fold_cursor_line += fold.line_offset
-                    fold_cursor_offset = cursor_offset - fold.offset
+                    buffer.cursor_line = fold_start + fold.line_offset
+                    buffer.cursor_offset = cursor_offset - fold.offset
                     break
+        elif cursor_line >= fold_start + previous_fold_count:
+            buffer.cursor_line += fold_count - previous_fold_count
+        return True
 
-            buffer.cursor_line = fold_cursor_line
-            buffer.cursor_offset = fold_cursor_offset
+    def refold(self, buffer: Buffer, folded_line_no: int) -> bool:
+        """Refold the line containing a folded line, if it hasn't been refolded since the
+        width last changed.
+
+        Call this before displaying a folded line.
+
+        Args:
+            buffer: Buffer containing the line.
+            folded_line_no: Folded line number.
+
+        Returns:
+            `True` if the line was refolded (and lines below may have moved).
+        """
+        if buffer._reflow_line < 0:
+            return False
+        try:
+            line_no, _ = buffer.fold_index.locate(folded_line_no)
+        except IndexError:
+            return False
+        return self._refold_line(buffer, line_no)
+
+    def reflow(self, duration: float) -> bool:
+        """Refold lines which haven't been refolded since the width last changed,
+        working up from the end of the buffers.
+
+        Args:
+            duration: Maximum time to spend (in seconds), before returning.
+
+        Returns:
+            `True` if any lines were refolded.
+        """
+        end_time = perf_counter() + duration
+        refolded = False
+        # Current buffer first
+        for buffer in (self.buffer, self.scrollback_buffer, self.alternate_buffer):
+            while (line_no := buffer._reflow_line) >= 0:
+                for line_no in range(line_no, max(-1, line_no - 100), -1):
+                    refolded = self._refold_line(buffer, line_no) or refolded
+                buffer._reflow_line = line_no - 1
+                if perf_counter() >= end_time:
+                    return refolded
+        return refolded
 
     async def write(
         self, text: str, *, hide_output: bool = False
@@ -1185,6 +1948,7 @@ class TerminalState:
         else:
             for ansi_command in self._ansi_stream.feed(text):
                 await self._handle_ansi_command(ansi_command)
+        scrollback_buffer.trim()
 
         # Get deltas
         scrollback_updates = (
@@ -1227,12 +1991,10 @@ class TerminalState:
             buffer._updated_lines = None
             folded_cursor_line = buffer.cursor_line
             cursor_line, cursor_line_offset = buffer.cursor
-            while buffer.cursor_line >= len(buffer.folded_lines):
+            while buffer.cursor_line >= buffer.fold_index.total:
                 self.add_line(buffer, EMPTY_LINE)
             line = buffer.lines[cursor_line]
-            del buffer.lines[cursor_line + 1 :]
-            del buffer.line_to_fold[cursor_line + 1 :]
-            del buffer.folded_lines[folded_cursor_line + 1 :]
+            buffer.truncate(cursor_line + 1)
             self.update_line(buffer, cursor_line, line.content[:cursor_line_offset])
         else:
             # print(f"TODO: clear_buffer({clear!r})")
@@ -1248,7 +2010,10 @@ class TerminalState:
         buffer = self.buffer
         margin_top, margin_bottom = buffer.scroll_margin.get_line_range(self.height)
 
-        gutter_lines = max(0, buffer.height - self.height)
+        # Line number at the top of the screen
+        gutter_lines = 0
+        if (screen_start := max(0, buffer.height - self.height)) < buffer.fold_index.total:
+            gutter_lines, _ = buffer.fold_index.locate(screen_start)
 
         if direction == -1:
             # up (first in test)
@@ -1303,6 +2068,9 @@ class TerminalState:
         return content
 
     async def _handle_ansi_command(self, ansi_command: ANSICommand) -> None:
+        if self.buffer._reflow_line >= 0:
+            # Changing the screen may move unfolded lines on to it
+            self._refold_screen(self.buffer)
         if isinstance(ansi_command, ANSINewLine):
             if self.alternate_screen:
                 # New line behaves differently in alternate screen
@@ -1317,7 +2085,7 @@ class TerminalState:
             case ANSIContent(text):
                 buffer = self.buffer
                 folded_lines = buffer.folded_lines
-                while buffer.cursor_line >= len(folded_lines):
+                while buffer.cursor_line >= buffer.fold_index.total:
                     self.add_line(buffer, EMPTY_LINE)
                 folded_line = folded_lines[buffer.cursor_line]
                 previous_content = folded_line.content
@@ -1366,7 +2134,7 @@ class TerminalState:
             ):
                 buffer = self.buffer
                 folded_lines = buffer.folded_lines
-                while buffer.cursor_line >= len(folded_lines):
+                while buffer.cursor_line >= buffer.fold_index.total:
                     self.add_line(buffer, EMPTY_LINE)
 
                 if auto_scroll and delta_y is not None:
@@ -1544,22 +2312,7 @@ class TerminalState:
         updates = self._updates
         if not self.auto_wrap:
             return [LineFold(line_no, 0, 0, line, updates)]
-        if not width:
-            return [LineFold(0, 0, 0, line, updates)]
-        line_length = line.cell_length
-        if line_length <= width:
-            return [LineFold(line_no, 0, 0, line, updates)]
-
-        folded_lines = line.fold(width)
-        offsets = [0, *accumulate(len(line) for line in folded_lines)][:-1]
-        folds = [
-            LineFold(line_no, line_offset, offset, folded_line, updates)
-            for line_offset, (offset, folded_line) in enumerate(
-                zip(offsets, folded_lines)
-            )
-        ]
-        assert len(folds)
-        return folds
+        return fold_line(line_no, line, width, updates)
 
     def add_line(
         self, buffer: Buffer, content: Content, style: Style = NULL_STYLE
@@ -1572,14 +2325,14 @@ class TerminalState:
             style,
             self._fold_line(line_no, content, width),
             updates,
+            width,
         )
-        buffer.lines.append(line_record)
-        folds = line_record.folds
-        buffer.line_to_fold.append(len(buffer.folded_lines))
-        fold_count = len(buffer.folded_lines)
+        fold_count = buffer.fold_index.total
+        buffer.append_line(line_record)
         if buffer._updated_lines is not None:
-            buffer._updated_lines.update(range(fold_count, fold_count + len(folds)))
-        buffer.folded_lines.extend(folds)
+            buffer._updated_lines.update(
+                range(fold_count, fold_count + len(line_record.folds))
+            )
         buffer.updates = updates
 
     def update_line(
@@ -1607,20 +2360,15 @@ class TerminalState:
         line_record.folds[:] = self._fold_line(
             line_index, line_expanded_tabs, self.width
         )
+        line_record.fold_width = self.width
         line_record.updates = self.advance_updates()
 
+        fold_count = len(line_record.folds)
+        if buffer.fold_index[line_index] != fold_count:
+            buffer.fold_index.set(line_index, fold_count)
+            if line_index < buffer.last_line_no:
+                # Following lines have moved up or down
+                buffer._updated_lines = None
         if buffer._updated_lines is not None:
-            fold_start = buffer.line_to_fold[line_index]
-            buffer._updated_lines.update(
-                range(fold_start, fold_start + len(line_record.folds))
-            )
-
-        fold_line = buffer.line_to_fold[line_index]
-        del buffer.line_to_fold[line_index:]
-        del buffer.folded_lines[fold_line:]
-
-        for line_no in range(line_index, buffer.line_count):
-            line_record = buffer.lines[line_no]
-            buffer.line_to_fold.append(len(buffer.folded_lines))
-            for fold in line_record.folds:
-                buffer.folded_lines.append(fold)
+            fold_start = buffer.fold_index.fold_start(line_index)
+            buffer._updated_lines.update(range(fold_start, fold_start + fold_count))
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+import rich.repr
+
+
+@rich.repr.auto
+class FoldIndex:
+    """Maps between lines and folded lines (lines after wrapping).
+
+    Stores the number of folds per line in a Fenwick tree (binary indexed tree), so that
+    mapping in either direction, and changing the fold count of a line, is O(log n) in
+    the number of lines. Every line has at least one fold.
+
+    """
+
+    __slots__ = ["_counts", "_tree", "_total"]
+
+    def __init__(self, counts: Iterable[int] = ()) -> None:
+        """
+
+        Args:
+            counts: Initial fold counts, one per line.
+        """
+        self._counts: list[int] = []
+        """Number of folds in each line."""
+        self._tree: list[int] = [0]
+        """Fenwick tree (1 based)."""
+        self._total = 0
+        """Total number of folds."""
+        self.rebuild(counts)
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield "lines", len(self._counts)
+        yield "folds", self._total
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __getitem__(self, line_no: int) -> int:
+        return self._counts[line_no]
+
+    @property
+    def total(self) -> int:
+        """Total number of folds."""
+        return self._total
+
+    def rebuild(self, counts: Iterable[int]) -> None:
+        """Replace all lines, in O(n).
+
+        Args:
+            counts: Fold counts, one per line.
+        """
+        self._counts[:] = counts
+        tree = self._tree = [0, *self._counts]
+        size = len(tree)
+        for index in range(1, size):
+            if (parent := index + (index & -index)) < size:
+                tree[parent] += tree[index]
+        self._total = sum(self._counts)
+
+    def clear(self) -> None:
+        """Remove all lines."""
+        self._counts.clear()
+        del self._tree[1:]
+        self._total = 0
+
+    def append(self, count: int) -> None:
+        """Add a line to the end.
+
+        Args:
+            count: Number of folds in the new line.
+        """
+        tree = self._tree
+        index = len(tree)
+        # The new node covers the lines (index - lowbit(index), index], which are
+        # the new line plus the nodes beneath it.
+        value = count
+        lower = index - (index & -index)
+        child = index - 1
+        while child > lower:
+            value += tree[child]
+            child &= child - 1
+        tree.append(value)
+        self._counts.append(count)
+        self._total += count
+
+    def set(self, line_no: int, count: int) -> None:
+        """Set the number of folds in a line.
+
+        Args:
+            line_no: Line number.
+            count: New number of folds.
+        """
+        if not (delta := count - self._counts[line_no]):
+            return
+        self._counts[line_no] = count
+        self._total += delta
+        tree = self._tree
+        size = len(tree)
+        index = line_no + 1
+        while index < size:
+            tree[index] += delta
+            index += index & -index
+
+    def truncate(self, line_count: int) -> None:
+        """Remove lines from the end, leaving `line_count` lines.
+
+        Args:
+            line_count: Number of lines to keep.
+        """
+        if line_count >= len(self._counts):
+            return
+        self._total -= sum(self._counts[line_count:])
+        del self._counts[line_count:]
+        # Nodes only cover lines at or before their own index, so remaining nodes are valid.
+        del self._tree[line_count + 1 :]
+
+    def remove_start(self, line_count: int) -> None:
+        """Remove lines from the start, in O(n).
+
+        Args:
+            line_count: Number of lines to remove.
+        """
+        if line_count > 0:
+            self.rebuild(self._counts[line_count:])
+
+    def fold_start(self, line_no: int) -> int:
+        """Get the index of the first fold in a line.
+
+        Args:
+            line_no: Line number (may be equal to the number of lines).
+
+        Returns:
+            Fold index.
+        """
+        line_count = len(self._counts)
+        if line_no < 0:
+            line_no += line_count
+        if not 0 <= line_no <= line_count:
+            raise IndexError("line number out of range")
+        if self._total == line_count:
+            # No lines have wrapped
+            return line_no
+        if line_no == line_count - 1:
+            # Last line (the usual place for the cursor)
+            return self._total - self._counts[-1]
+        tree = self._tree
+        fold = 0
+        while line_no:
+            fold += tree[line_no]
+            line_no &= line_no - 1
+        return fold
+
+    def locate(self, fold: int) -> tuple[int, int]:
+        """Find the line containing a fold.
+
+        Args:
+            fold: Fold index.
+
+        Returns:
+            A tuple of the line number, and the offset of the fold within the line.
+        """
+        total = self._total
+        if fold < 0:
+            fold += total
+        if not 0 <= fold < total:
+            raise IndexError("fold index out of range")
+        line_count = len(self._counts)
+        if total == line_count:
+            # No lines have wrapped
+            return fold, 0
+        if fold >= (last_line_start := total - self._counts[-1]):
+            # Last line (the usual place for the cursor)
+            return line_count - 1, fold - last_line_start
+        tree = self._tree
+        line_no = 0
+        step = 1 << (line_count.bit_length() - 1)
+        while step:
+            if (next_line_no := line_no + step) <= line_count and (
+                tree[next_line_no] <= fold
+            ):
+                line_no = next_line_no
+                fold -= tree[next_line_no]
+            step >>= 1
+        return line_no, fold
@@ -1,5 +1,6 @@
 from functools import lru_cache
 import io
+import re as stdlib_re  # Faster than re2 for short searches of simple patterns
 import re2 as re
 
 import rich.repr
@@ -37,6 +38,22 @@ class Pattern[ValueType]:
         return False
         yield
 
+    def match(self, text: str, position: int) -> tuple[int, TokenMatch] | None:
+        """Match a complete sequence in a single step (an optional fast path).
+
+        Called before any characters are fed. If this returns `None`, characters are
+        fed one at a time to `check`.
+
+        Args:
+            text: Text to match.
+            position: Offset of the first character to match.
+
+        Returns:
+            A tuple of the number of characters consumed and the match, or `None` if
+                there is no complete sequence at `position`.
+        """
+        return None
+
 
 class StreamRead[ResultType]:
     pass
@@ -56,8 +73,8 @@ class ReadUntil[ResultType](StreamRead[ResultType]):
 
     def __init__(self, *characters: str) -> None:
         self.characters = characters
-        self._regex = re.compile(
-            "|".join(re.escape(character) for character in characters)
+        self._regex = stdlib_re.compile(
+            "|".join(stdlib_re.escape(character) for character in characters)
         )
 
     def __rich_repr__(self) -> rich.repr.Result:
@@ -102,10 +119,11 @@ class ReadPatterns[ResultType](StreamRead[ResultType]):
     def is_exhausted(self) -> bool:
         return not self.patterns
 
-    def feed(self, text: str) -> tuple[int, TokenMatch | None]:
+    def feed(self, text: str, position: int = 0) -> tuple[int, TokenMatch | None]:
         consumed = 0
         new_patterns = patterns = self.patterns
-        for character in text:
+        for index in range(position, len(text)):
+            character = text[index]
             consumed += 1
             for name, sequence_validator in patterns.items():
                 if (value := sequence_validator.feed(character)) is False:
@@ -114,7 +132,7 @@ class ReadPatterns[ResultType](StreamRead[ResultType]):
                 elif value:
                     return consumed, (name, value)
             patterns = self._patterns = new_patterns
-        self._text.write(text[:consumed])
+        self._text.write(text[position : position + consumed])
         return consumed, None
 
 
@@ -122,7 +140,7 @@ class ReadPatterns[ResultType](StreamRead[ResultType]):
 class ReadPattern[ResultType](StreamRead[ResultType]):
     """Special case for a single pattern."""
 
-    __slots__ = ["name", "pattern", "_text", "_exhaused"]
+    __slots__ = ["name", "pattern", "_text", "_exhaused", "_fed"]
 
     def __init__(self, start: str, name: str, pattern: Pattern) -> None:
         self.name = name
@@ -130,6 +148,7 @@ class ReadPattern[ResultType](StreamRead[ResultType]):
         self._text = io.StringIO()
         self._text.write(start)
         self._exhaused = False
+        self._fed = False
 
     @property
     def unconsumed_text(self) -> str:
@@ -143,18 +162,25 @@ class ReadPattern[ResultType](StreamRead[ResultType]):
     def is_exhausted(self) -> bool:
         return self._exhaused
 
-    def feed(self, text: str) -> tuple[int, TokenMatch | None]:
+    def feed(self, text: str, position: int = 0) -> tuple[int, TokenMatch | None]:
+        if not self._fed and position < len(text):
+            self._fed = True
+            if (match := self.pattern.match(text, position)) is not None:
+                # The whole sequence is in the text
+                self._exhaused = True
+                consumed, value = match
+                return consumed, ("pattern", value)
         consumed = 0
         feed = self.pattern.feed
-        for character in text:
+        for index in range(position, len(text)):
             consumed += 1
-            if (value := feed(character)) is False:
+            if (value := feed(text[index])) is False:
                 self._exhaused = True
                 break
             elif value:
                 self._exhaused = True
                 return consumed, ("pattern", value)
-        self._text.write(text[:consumed])
+        self._text.write(text[position : position + consumed])
         return consumed, None
 
 
@@ -253,14 +279,11 @@ class StreamParser[ParseType]:
         return ReadPatterns(start, **patterns)
 
     def feed(self, text: str) -> Iterable[Token | ParseType]:
-        sequences = text.splitlines(keepends=True)
-        # TODO: Cache
-        for sequence in sequences:
-            yield from self._feed(sequence)
-
-    def _feed(self, text: str) -> Iterable[Token | ParseType]:
         """Feed text in to parser.
 
+        The text is scanned in place. Runs of text between separators (for `read_until`)
+        are sent as a single token, and patterns only see the characters they consume.
+
         Args:
             text: Text from stream.
 
@@ -268,81 +291,97 @@ class StreamParser[ParseType]:
             A generator of tokens or the parse type.
 
         """
-        if not text or self._gen is None:
+        if not text:
+            return
+        if self._gen is None:
             yield EOFToken()
             return
 
-        def send(token: Token) -> Iterable[Token]:
-            try:
-                while True:
-                    new_token = self._gen.send(token)
-                    if isinstance(new_token, StreamRead):
-                        self._reading = new_token
-                        break
-                    else:
-                        token = new_token
-                        yield token
-
-            except StopIteration:
-                self._gen.close()
-                self._gen = None
+        send = self._send
+        position = 0
+        end = len(text)
 
-        while text:
-            if isinstance(self._reading, (ReadPattern, ReadPatterns)):
-                consumed, pattern_match = self._reading.feed(text)
+        while position < end and self._gen is not None:
+            reading = self._reading
 
+            if isinstance(reading, ReadUntil):
+                # Fast path for plain text
+                search = reading._regex.search
+                while position < end and self._reading is reading:
+                    if (match := search(text, position)) is None:
+                        yield from send(Token(text[position:]))
+                        position = end
+                    else:
+                        start, match_end = match.span(0)
+                        if start > position:
+                            yield from send(Token(text[position:start]))
+                            position = start
+                        else:
+                            yield from send(SeparatorToken(text[start:match_end]))
+                            position = match_end
+
+            elif isinstance(reading, (ReadPattern, ReadPatterns)):
+                consumed, pattern_match = reading.feed(text, position)
                 if pattern_match is not None:
                     name, value = pattern_match
+                    position += consumed
                     yield from send(PatternToken(name, value))
-                    text = text[consumed:]
+                elif reading.is_exhausted:
+                    position += consumed
+                    yield from send(Token(reading.unconsumed_text))
                 else:
-                    if self._reading.is_exhausted:
-                        unconsumed_text = self._reading.unconsumed_text
-                        yield from send(Token(unconsumed_text))
-                        text = text[consumed:]
-                    else:
-                        text = ""
+                    position = end
 
-            elif isinstance(self._reading, Read):
-                if self._reading.remaining:
-                    read_text = text[: self._reading.remaining]
+            elif isinstance(reading, Read):
+                if reading.remaining:
+                    read_text = text[position : position + reading.remaining]
                     read_text_length = len(read_text)
-                    self._reading.remaining -= read_text_length
-                    text = text[read_text_length:]
+                    reading.remaining -= read_text_length
+                    position += read_text_length
                     yield from send(Token(read_text))
                 else:
                     yield from send(Token(""))
 
-            elif isinstance(self._reading, ReadUntil):
-                if (match := self._reading._regex.search(text)) is not None:
-                    start, end = match.span(0)
-                    read_text = text[:start]
-
-                    if read_text:
-                        yield from send(Token(read_text))
-                        text = text[start:]
-                    else:
-                        yield from send(SeparatorToken(text[start:end]))
-                        text = text[end:]
-                else:
-                    yield from send(Token(text))
-                    text = ""
-
-            elif isinstance(self._reading, ReadRegex):
-                self._reading._buffer.write(text)
-                match_text = self._reading._buffer.getvalue()
-                if (
-                    match := re.search(self._reading.regex, match_text, re.VERBOSE)
-                ) is not None:
+            elif isinstance(reading, ReadRegex):
+                reading._buffer.write(text[position:])
+                match_text = reading._buffer.getvalue()
+                if (match := re.search(reading.regex, match_text, re.VERBOSE)) is not None:
                     token_text = match_text[: match.start(0)]
                     if token_text:
                         yield from send(Token(token_text))
-                    end = match.end(0)
+                    position += match.end(0)
                     yield from send(MatchToken(match.group(0), match))
-                    text = text[end:]
                 else:
                     yield from send(Token(match_text))
-                    text = ""
+                    position = end
+
+            else:
+                break
+
+    def _send(self, token: Token) -> Iterable[Token | ParseType]:
+        """Send a token to the parse generator.
+
+        Args:
+            token: Token to send.
+
+        Returns:
+            Results from the parser, up to the next read.
+        """
+        if (gen := self._gen) is None:
+            return
+        try:
+            while True:
+                new_token = gen.send(token)
+                if isinstance(new_token, StreamRead):
+                    self._reading = new_token
+                    break
+                else:
+                    token = new_token
+                    yield token
+
+        except StopIteration:
+            gen.close()
+            self._gen = None
 
     def parse(self) -> ParseResult[ParseType]:
         yield from ()
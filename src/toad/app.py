@@ -1,12 +1,12 @@
 from importlib.resources import files
 from datetime import datetime, timezone
-from functools import cached_property
+from functools import cached_property, partial
 import os
 from pathlib import Path
 import platform
 import json
 from time import monotonic
-from typing import Any, ClassVar, TYPE_CHECKING
+from typing import Any, ClassVar, Iterable, TYPE_CHECKING
 
 from rich import terminal_theme
 
@@ -14,11 +14,12 @@ from textual import on, work
 from textual.binding import Binding, BindingType
 from textual.content import Content
 from textual.reactive import var, reactive
-from textual.app import App
+from textual.app import App, SystemCommand
 from textual import events
 from textual.signal import Signal
 from textual.timer import Timer
 from textual.notifications import Notify
+from textual.screen import Screen
 
 import toad
 from toad.db import DB
@@ -34,6 +35,8 @@ if TYPE_CHECKING:
     from toad.screens.settings import SettingsScreen
     from toad.screens.store import StoreScreen
     from toad.db import DB
+    from toad.acp.pool import AgentPool
+    from toad.sessions import Sessions
 
 
 DRACULA_TERMINAL_THEME = terminal_theme.TerminalTheme(
@@ -240,6 +243,25 @@ class ToadApp(App, inherit_bindings=False):
             "Settings",
             tooltip="Settings screen",
         ),
+        Binding(
+            "ctrl+n",
+            "new_session",
+            "New session",
+            tooltip="Launch another agent, alongside the current session",
+        ),
+        Binding(
+            "f3",
+            "cycle_session(+1)",
+            "Next session",
+            tooltip="Switch to the next agent session",
+        ),
+        Binding(
+            "shift+f3",
+            "cycle_session(-1)",
+            "Previous session",
+            tooltip="Switch to the previous agent session",
+            show=False,
+        ),
     ]
     CSS_PATH = "toad.tcss"
     ALLOW_IN_MAXIMIZED_VIEW = ""
@@ -318,6 +340,53 @@ class ToadApp(App, inherit_bindings=False):
             self.settings_schema, self._settings, on_set_callback=self.setting_updated
         )
 
+    @cached_property
+    def agent_pool(self) -> AgentPool:
+        """Agents started in advance."""
+        from toad.acp.pool import AgentPool
+
+        settings = self.settings
+        return AgentPool(
+            max_agents=settings.get("agent.pool_size", int),
+            idle_timeout=settings.get("agent.pool_idle_timeout", int),
+            max_memory=settings.get("agent.pool_memory", int) * 1024 * 1024,
+            update_interval=settings.get("agent.update_interval", int) / 1000,
+        )
+
+    @cached_property
+    def sessions(self) -> Sessions:
+        """Agent sessions running in the app."""
+        from toad.sessions import Sessions
+
+        return Sessions(self)
+
+    async def warm_agent_pool(
+        self, project_path: Path, agents: dict[str, AgentData]
+    ) -> None:
+        """Start recently used agents in advance, if enabled in settings.
+
+        Args:
+            project_path: Project path.
+            agents: Known agents, keyed by identity.
+        """
+        if not self.settings.get("agent.pool", bool):
+            return
+        identities: list[str] = []
+        if sessions := await DB().session_get_recent(max_results=20):
+            identities.extend(session["agent_identity"] for session in sessions)
+        identities.extend(
+            identity.strip()
+            for identity in self.settings.get("launcher.agents", str).splitlines()
+        )
+        self.agent_pool.warm(
+            project_path,
+            [
+                agents[identity]
+                for identity in dict.fromkeys(identities)
+                if identity in agents
+            ],
+        )
+
     @cached_property
     def anon_id(self) -> str:
         """An anonymous ID for usage collection."""
@@ -592,12 +661,17 @@ class ToadApp(App, inherit_bindings=False):
         if mode := self._initial_mode:
             self.switch_mode(mode)
         else:
-            self.push_screen(self.get_main_screen())
+            await self.sessions.new(self.get_main_screen())
 
         self.update_terminal_title()
         self.set_timer(1, self.run_version_check)
         self.set_process_title()
 
+    async def on_unmount(self) -> None:
+        if "agent_pool" in self.__dict__:
+            await self.agent_pool.close()
+        await DB.close()
+
     @work(thread=True, exit_on_error=False)
     def set_process_title(self) -> None:
         try:
@@ -664,6 +738,45 @@ class ToadApp(App, inherit_bindings=False):
             scrollbar=ToadApp.scrollbar,
         )
 
+    def get_system_commands(self, screen: Screen) -> Iterable[SystemCommand]:
+        yield from super().get_system_commands(screen)
+        current_mode = self.current_mode
+        for mode, session_screen in self.sessions:
+            title = session_screen.title or "New session"
+            if mode == current_mode:
+                yield SystemCommand(
+                    f"Close session: {title}",
+                    "Close this session, and stop its agent",
+                    partial(self.sessions.close, mode),
+                )
+            else:
+                yield SystemCommand(
+                    f"Switch session: {title}",
+                    "Switch to another agent session",
+                    partial(self.sessions.switch, mode),
+                )
+
+    def check_action(self, action: str, parameters: tuple[object, ...]) -> bool | None:
+        if action == "new_session":
+            return self.current_mode != "store"
+        if action == "cycle_session":
+            return len(self.sessions) > 1 or (
+                len(self.sessions) == 1 and self.sessions.current is None
+            )
+        return True
+
+    async def action_new_session(self) -> None:
+        """Return to the store, to launch another agent."""
+        await self.switch_mode("store")
+
+    async def action_cycle_session(self, direction: int) -> None:
+        """Switch to the next or previous session.
+
+        Args:
+            direction: `+1` for the next session, `-1` for the previous session.
+        """
+        await self.sessions.cycle(direction)
+
     @work
     async def action_settings(self) -> None:
         await self.push_screen_wait("settings")
@@ -0,0 +1,468 @@
+"""
+Run prompts against an ACP agent without the UI.
+
+Agent messages are written as JSON lines, one object per event, with a "type" key
+and the index of the prompt that produced it.
+
+Permission requests are answered from a policy file (JSON), for example:
+
+    {
+        "default": "reject",
+        "rules": [
+            {"kind": "read", "answer": "allow"},
+            {"kind": "edit", "title": "*.md", "answer": "allow"}
+        ]
+    }
+
+Rules are checked in order. A rule matches if its (optional) "kind" is the tool kind,
+and its (optional) "title" glob matches the tool call title.
+
+"""
+
+import asyncio
+from dataclasses import dataclass
+from fnmatch import fnmatch
+import json
+from pathlib import Path
+from time import perf_counter
+from typing import Any, BinaryIO, Callable, Iterable, Literal, NamedTuple
+
+import rich.repr
+from textual.message import Message
+
+from toad import json_codec
+from toad.agent import AgentFail, AgentReady
+from toad.agent_schema import Agent as AgentData
+from toad.answer import Answer
+from toad.acp import messages
+from toad.acp import protocol
+from toad.acp.agent import Agent
+from toad import jsonrpc
+
+type PolicyAnswer = Literal["allow", "reject"]
+
+
+class PolicyError(Exception):
+    """The permission policy is invalid."""
+
+
+class BatchPrompt(NamedTuple):
+    """A prompt to run."""
+
+    index: int
+    text: str
+
+
+@dataclass(frozen=True)
+class PermissionRule:
+    """A rule to answer permission requests."""
+
+    answer: PolicyAnswer
+    kind: str | None = None
+    title: str | None = None
+
+    def matches(self, tool_call: protocol.ToolCallUpdatePermissionRequest) -> bool:
+        """Does this rule match a tool call?
+
+        Args:
+            tool_call: The tool call requesting permission.
+
+        Returns:
+            `True` if the rule applies.
+        """
+        if self.kind is not None and tool_call.get("kind") != self.kind:
+            return False
+        if self.title is not None and not fnmatch(
+            tool_call.get("title") or "", self.title
+        ):
+            return False
+        return True
+
+
+@rich.repr.auto
+class PermissionPolicy:
+    """Answers permission requests without asking the user."""
+
+    def __init__(
+        self, rules: Iterable[PermissionRule] = (), default: PolicyAnswer = "reject"
+    ) -> None:
+        """
+
+        Args:
+            rules: Rules, checked in order.
+            default: Answer if no rules match.
+        """
+        self.rules = list(rules)
+        self.default = default
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield "rules", len(self.rules)
+        yield "default", self.default
+
+    @classmethod
+    def load(cls, path: Path) -> "PermissionPolicy":
+        """Load a policy from a JSON file.
+
+        Args:
+            path: Path to policy file.
+
+        Raises:
+            PolicyError: If the policy could not be read.
+
+        Returns:
+            Permission policy.
+        """
+        try:
+            policy = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as error:
+            raise PolicyError(f"Unable to read policy {str(path)!r}; {error}")
+        if not isinstance(policy, dict):
+            raise PolicyError("Policy should be a JSON object")
+        default = policy.get("default", "reject")
+        rules: list[PermissionRule] = []
+        for rule in policy.get("rules", []):
+            if not isinstance(rule, dict):
+                raise PolicyError("Policy rules should be JSON objects")
+            rules.append(
+                PermissionRule(
+                    cls._check_answer(rule.get("answer")),
+                    kind=rule.get("kind"),
+                    title=rule.get("title"),
+                )
+            )
+        return cls(rules, cls._check_answer(default))
+
+    @classmethod
+    def _check_answer(cls, answer: object) -> PolicyAnswer:
+        if answer == "allow" or answer == "reject":
+            return answer
+        raise PolicyError(f'Policy answer should be "allow" or "reject"; not {answer!r}')
+
+    def answer(
+        self,
+        options: list[protocol.PermissionOption],
+        tool_call: protocol.ToolCallUpdatePermissionRequest,
+    ) -> Answer | None:
+        """Answer a permission request.
+
+        Args:
+            options: Options offered by the agent.
+            tool_call: Tool call requesting permission.
+
+        Returns:
+            The selected option, or `None` if there is no suitable option.
+        """
+        policy_answer = next(
+            (rule.answer for rule in self.rules if rule.matches(tool_call)),
+            self.default,
+        )
+        # Prefer options that don't persist beyond this request
+        preferred_kinds = (
+            ("allow_once", "allow_always")
+            if policy_answer == "allow"
+            else ("reject_once", "reject_always")
+        )
+        for kind in preferred_kinds:
+            for option in options:
+                if option["kind"] == kind:
+                    return Answer(option["name"], option["optionId"], option["kind"])
+        return None
+
+
+def read_prompts(prompts_file: BinaryIO) -> list[BatchPrompt]:
+    """Read prompts.
+
+    Prompts are one per line. A line containing a JSON object is read as an object
+    with a "prompt" key, which may be used for prompts spanning multiple lines.
+
+    Args:
+        prompts_file: File containing prompts.
+
+    Returns:
+        A list of prompts.
+    """
+    prompts: list[BatchPrompt] = []
+    for line in prompts_file:
+        text = line.decode("utf-8", "replace").strip()
+        if not text:
+            continue
+        if text.startswith("{"):
+            try:
+                prompt = json.loads(text)
+            except ValueError:
+                pass
+            else:
+                if isinstance(prompt, dict) and isinstance(prompt.get("prompt"), str):
+                    text = prompt["prompt"]
+        prompts.append(BatchPrompt(len(prompts), text))
+    return prompts
+
+
+@rich.repr.auto
+class BatchSession:
+    """Receives messages from an agent, in place of a conversation widget.
+
+    This is the agent's message target (see `MessageTarget`).
+
+    """
+
+    def __init__(
+        self,
+        session_index: int,
+        emit: Callable[[dict[str, Any]], None],
+        policy: PermissionPolicy,
+    ) -> None:
+        """
+
+        Args:
+            session_index: Index of the session.
+            emit: Callable to write an event.
+            policy: Permission policy.
+        """
+        self.session_index = session_index
+        self._emit = emit
+        self.policy = policy
+        self.prompt_index: int | None = None
+        self.first_update_time: float | None = None
+        self.ready_event = asyncio.Event()
+        self.fail: AgentFail | None = None
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield self.session_index
+        yield "prompt_index", self.prompt_index
+
+    def emit(self, event_type: str, **data: Any) -> None:
+        """Write an event.
+
+        Args:
+            event_type: Type of event.
+            **data: Event data.
+        """
+        self._emit(
+            {
+                "type": event_type,
+                "session": self.session_index,
+                "prompt": self.prompt_index,
+                **data,
+            }
+        )
+
+    def post_message(self, message: Message) -> bool:
+        """Handle a message from the agent.
+
+        Args:
+            message: Message.
+
+        Returns:
+            `True` if the message was handled.
+        """
+        if isinstance(message, (messages.Update, messages.Thinking)):
+            if self.first_update_time is None:
+                self.first_update_time = perf_counter()
+            self.emit(
+                "message" if isinstance(message, messages.Update) else "thought",
+                content_type=message.type,
+                text=message.text,
+            )
+        elif isinstance(message, messages.ToolCall):
+            self.emit("tool_call", tool_call=message.tool_call)
+        elif isinstance(message, messages.ToolCallUpdate):
+            self.emit("tool_call_update", update=message.update)
+        elif isinstance(message, messages.Plan):
+            self.emit("plan", entries=message.entries)
+        elif isinstance(message, messages.RequestPermission):
+            answer = self.policy.answer(message.options, message.tool_call)
+            self.emit(
+                "permission",
+                tool_call_id=message.tool_call["toolCallId"],
+                title=message.tool_call.get("title"),
+                option_id=None if answer is None else answer.id,
+                kind=None if answer is None else answer.kind,
+            )
+            if answer is None:
+                message.result_future.set_exception(
+                    jsonrpc.JSONRPCError("No permission option allowed by policy")
+                )
+            else:
+                message.result_future.set_result(answer)
+        elif isinstance(message, messages.CreateTerminal):
+            # Terminals aren't offered, but refuse if the agent asks anyway
+            message.result_future.set_result(False)
+        elif isinstance(
+            message, (messages.GetTerminalState, messages.WaitForTerminalExit)
+        ):
+            message.result_future.set_exception(
+                KeyError(f"No terminal with id {message.terminal_id!r}")
+            )
+        elif isinstance(message, AgentFail):
+            self.fail = message
+            self.emit("fail", message=message.message, details=message.details)
+            self.ready_event.set()
+        elif isinstance(message, AgentReady):
+            self.ready_event.set()
+        return True
+
+
+@rich.repr.auto
+class BatchRunner:
+    """Runs prompts against one or more agent sessions."""
+
+    def __init__(
+        self,
+        project_root: Path,
+        agent_data: AgentData,
+        policy: PermissionPolicy,
+        output: BinaryIO,
+        *,
+        concurrency: int = 1,
+        session_per_prompt: bool = False,
+    ) -> None:
+        """
+
+        Args:
+            project_root: Project root path.
+            agent_data: Agent to run.
+            policy: Permission policy.
+            output: Binary file to write JSON lines.
+            concurrency: Maximum number of concurrent sessions.
+            session_per_prompt: Start a new session for every prompt? Otherwise each
+                session runs prompts in turn.
+        """
+        self.project_root = project_root
+        self.agent_data = agent_data
+        self.policy = policy
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.session_per_prompt = session_per_prompt
+        self._session_count = 0
+        self.failed_count = 0
+        """Number of prompts which failed."""
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield self.project_root
+        yield "concurrency", self.concurrency
+
+    def emit(self, event: dict[str, Any]) -> None:
+        """Write an event.
+
+        Args:
+            event: Event data.
+        """
+        self.output.write(json_codec.encode(event) + b"\n")
+        self.output.flush()
+
+    async def _start_session(self) -> tuple[Agent, BatchSession] | None:
+        """Start an agent, and wait for it to be ready.
+
+        Returns:
+            Agent and session, or `None` if the agent failed to start.
+        """
+        session = BatchSession(self._session_count, self.emit, self.policy)
+        self._session_count += 1
+        agent = Agent(
+            self.project_root,
+            self.agent_data,
+            None,
+            terminal=False,
+            record_sessions=False,
+        )
+        start_time = perf_counter()
+        agent.start(session)
+        ready_task = asyncio.create_task(session.ready_event.wait())
+        done_task = asyncio.create_task(agent.done_event.wait())
+        await asyncio.wait([ready_task, done_task], return_when=asyncio.FIRST_COMPLETED)
+        ready_task.cancel()
+        done_task.cancel()
+        if session.fail is not None or not session.ready_event.is_set():
+            if session.fail is None:
+                session.emit("fail", message="Agent exited", details="")
+            await agent.stop()
+            return None
+        session.emit(
+            "session",
+            session_id=agent.session_id,
+            elapsed=perf_counter() - start_time,
+        )
+        return agent, session
+
+    async def _run_prompt(
+        self, agent: Agent, session: BatchSession, prompt: BatchPrompt
+    ) -> None:
+        """Run a single prompt, and write the result."""
+        session.prompt_index = prompt.index
+        session.first_update_time = None
+        start_time = perf_counter()
+        prompt_task = asyncio.create_task(agent.send_prompt(prompt.text))
+        done_task = asyncio.create_task(agent.done_event.wait())
+        try:
+            # The prompt's response never arrives if the agent exits mid-turn
+            await asyncio.wait(
+                [prompt_task, done_task], return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:
+            prompt_task.cancel()
+            raise
+        finally:
+            done_task.cancel()
+        if not prompt_task.done():
+            prompt_task.cancel()
+            self.failed_count += 1
+            session.emit("error", message="Agent exited", data=None)
+            return
+        try:
+            stop_reason = prompt_task.result()
+        except jsonrpc.APIError as error:
+            self.failed_count += 1
+            session.emit("error", message=str(error), data=error.data)
+            return
+        except Exception as error:
+            # Don't let one prompt take down the other workers
+            self.failed_count += 1
+            session.emit("error", message=str(error) or repr(error), data=None)
+            return
+        end_time = perf_counter()
+        session.emit(
+            "result",
+            stop_reason=stop_reason,
+            elapsed=end_time - start_time,
+            first_update=(
+                None
+                if session.first_update_time is None
+                else session.first_update_time - start_time
+            ),
+        )
+
+    async def _worker(self, queue: asyncio.Queue[BatchPrompt]) -> None:
+        """Run prompts from the queue."""
+        agent_session: tuple[Agent, BatchSession] | None = None
+        try:
+            while not queue.empty():
+                prompt = queue.get_nowait()
+                if agent_session is None:
+                    if (agent_session := await self._start_session()) is None:
+                        self.failed_count += 1
+                        continue
+                agent, session = agent_session
+                await self._run_prompt(agent, session, prompt)
+                if self.session_per_prompt or agent.done_event.is_set():
+                    await agent.stop()
+                    agent_session = None
+        finally:
+            if agent_session is not None:
+                await agent_session[0].stop()
+
+    async def run(self, prompts: Iterable[BatchPrompt]) -> int:
+        """Run prompts.
+
+        Args:
+            prompts: Prompts to run.
+
+        Returns:
+            Number of prompts which failed.
+        """
+        queue: asyncio.Queue[BatchPrompt] = asyncio.Queue()
+        for prompt in prompts:
+            queue.put_nowait(prompt)
+        worker_count = min(self.concurrency, queue.qsize())
+        await asyncio.gather(*[self._worker(queue) for _ in range(worker_count)])
+        return self.failed_count
@@ -53,6 +53,39 @@ async def get_agent_data(launch_agent) -> Agent | None:
     return agents.get(launch_agent)
 
 
+def get_command_agent_data(command: str, title: str | None = None) -> Agent:
+    """Get agent data for an agent run from a command.
+
+    Args:
+        command: Command to run the agent.
+        title: Optional title, or `None` to use the command name.
+
+    Returns:
+        Agent data.
+    """
+    command_name = command.split(" ", 1)[0].lower()
+    identity = f"{command_name}.custom.batrachian.ai"
+
+    agent_data: Agent = {
+        "identity": identity,
+        "name": title or command.partition(" ")[0],
+        "short_name": "agent",
+        "url": "https://github.com/batrachianai/toad",
+        "protocol": "acp",
+        "type": "coding",
+        "author_name": "Will McGugan",
+        "author_url": "https://willmcgugan.github.io/",
+        "publisher_name": "Will McGugan",
+        "publisher_url": "https://willmcgugan.github.io/",
+        "description": "Agent launched from CLI",
+        "tags": [],
+        "help": "",
+        "run_command": {"*": command},
+        "actions": {},
+    }
+    return agent_data
+
+
 class DefaultCommandGroup(click.Group):
     def parse_args(self, ctx, args):
         if "--help" in args or "-h" in args:
@@ -194,28 +227,7 @@ def acp(
 
     from rich import print
 
-    from toad.agent_schema import Agent as AgentData
-
-    command_name = command.split(" ", 1)[0].lower()
-    identity = f"{command_name}.custom.batrachian.ai"
-
-    agent_data: AgentData = {
-        "identity": identity,
-        "name": title or command.partition(" ")[0],
-        "short_name": "agent",
-        "url": "https://github.com/batrachianai/toad",
-        "protocol": "acp",
-        "type": "coding",
-        "author_name": "Will McGugan",
-        "author_url": "https://willmcgugan.github.io/",
-        "publisher_name": "Will McGugan",
-        "publisher_url": "https://willmcgugan.github.io/",
-        "description": "Agent launched from CLI",
-        "tags": [],
-        "help": "",
-        "run_command": {"*": command},
-        "actions": {},
-    }
+    agent_data = get_command_agent_data(command, title)
     if serve:
         import shlex
         from textual_serve.server import Server
@@ -245,6 +257,95 @@ def acp(
     print("https://github.com/batrachianai/toad/discussions")
 
 
+@main.command("batch")
+@click.argument("prompts", metavar="PROMPTS", type=click.File("rb"), default="-")
+@click.option("-a", "--agent", metavar="AGENT", default=None, help="Installed agent")
+@click.option(
+    "-c", "--command", metavar="COMMAND", default=None, help="Command to run an ACP agent"
+)
+@click.option("-d", "--project-dir", metavar="PATH", default=".")
+@click.option(
+    "--policy",
+    metavar="PATH",
+    default=None,
+    help="JSON file with rules to answer permission requests (the default rejects)",
+)
+@click.option(
+    "-j",
+    "--concurrency",
+    metavar="N",
+    default=1,
+    type=int,
+    help="Number of sessions to run concurrently",
+)
+@click.option(
+    "--session-per-prompt",
+    is_flag=True,
+    help="Start a new session for every prompt",
+)
+@click.option(
+    "-o",
+    "--output",
+    metavar="PATH",
+    type=click.File("wb"),
+    default="-",
+    help="File to write JSON lines (defaults to stdout)",
+)
+def batch(
+    prompts,
+    agent: str | None,
+    command: str | None,
+    project_dir: str,
+    policy: str | None,
+    concurrency: int,
+    session_per_prompt: bool,
+    output,
+) -> None:
+    """Run prompts against an agent, without the UI.
+
+    Prompts are read one per line from PROMPTS (or stdin), and agent messages, tool
+    calls, and results are written as JSON lines.
+
+    toad batch -c "my-agent --acp" -j 4 prompts.txt > results.jsonl
+    """
+    import asyncio
+    from pathlib import Path
+
+    from toad.batch import BatchRunner, PermissionPolicy, PolicyError, read_prompts
+
+    check_directory(project_dir)
+    if command:
+        agent_data = get_command_agent_data(command)
+    elif agent:
+        if (agent_data := asyncio.run(get_agent_data(agent))) is None:
+            print(f"No agent called {agent!r}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        print("One of --agent or --command is required", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        permission_policy = (
+            PermissionPolicy() if policy is None else PermissionPolicy.load(Path(policy))
+        )
+    except PolicyError as error:
+        print(error, file=sys.stderr)
+        sys.exit(1)
+
+    runner = BatchRunner(
+        Path(project_dir).resolve(),
+        agent_data,
+        permission_policy,
+        output,
+        concurrency=concurrency,
+        session_per_prompt=session_per_prompt,
+    )
+    set_process_title("toad batch")
+    failed_count = asyncio.run(runner.run(read_prompts(prompts)))
+    if failed_count:
+        sys.exit(2)
+
+
 @main.command("settings")
 def settings() -> None:
     """Settings information."""
@@ -254,28 +355,79 @@ def settings() -> None:
 
 @main.command("replay")
 @click.argument("path", metavar="FILE")
-def replay(path: str) -> None:
-    """Replay interaction from a log file.
+@click.option(
+    "-x",
+    "--speed",
+    metavar="MULTIPLIER",
+    default=1.0,
+    type=float,
+    help="Replay speed (2 is twice as fast), or 0 to replay as fast as possible",
+)
+def replay(path: str, speed: float) -> None:
+    """Replay interaction from a trace or log file.
 
     This is a debugging aid. You probably won't need it unless you are building an agent.
 
     Run it in place of a command line to run an ACP agent:
 
-    toad acp "toad replay toad.log"
+    toad acp "toad replay agent.trace"
 
     This will replay the agents output, and Toad will update the conversation as it would a real agent.
+
+    Traces are recorded when the TOAD_ACP_TRACE environment variable is set, and replay
+    with their original timing. Agent logs (which have no timing) replay at a fixed rate.
     """
-    import time
+    from toad.acp.trace import read_trace, replay as replay_trace
 
-    stdout = sys.stdout.buffer
     with open(path, "rb") as replay_file:
-        for line in replay_file.readlines():
-            sender, space, json_line = line.partition(b" ")
-            if sender == b"[agent]":
-                stdout.write(json_line.strip() + b"\n")
-            time.sleep(0.01)
-            stdout.write(line)
-            stdout.flush()
+        replay_trace(
+            read_trace(replay_file),
+            sys.stdout.buffer,
+            speed=speed,
+            discard_input=sys.stdin.buffer,
+        )
+
+
+@main.command("daemon")
+@click.option(
+    "--socket",
+    "socket_path",
+    metavar="PATH",
+    default=None,
+    help="Path to the Unix socket (defaults to the Toad state directory)",
+)
+@click.option(
+    "--idle-timeout",
+    metavar="SECONDS",
+    default=300,
+    type=int,
+    help="Time to keep an agent running with no connected Toad instances",
+)
+def daemon(socket_path: str | None, idle_timeout: int) -> None:
+    """Run a daemon which shares agent processes between Toad instances.
+
+    Set the TOAD_ACP_DAEMON environment variable to connect:
+
+    TOAD_ACP_DAEMON=1 toad acp "my-agent --acp"
+
+    Instances running the same agent in the same project will share one agent process.
+    """
+    import asyncio
+    from pathlib import Path
+
+    from toad.acp.daemon import AgentDaemon, DaemonError, get_socket_path
+
+    path = Path(socket_path).expanduser() if socket_path else get_socket_path()
+    agent_daemon = AgentDaemon(path, idle_timeout=idle_timeout)
+    set_process_title("toad daemon")
+    print(f"Listening on {path}")
+    try:
+        asyncio.run(agent_daemon.run())
+    except DaemonError as error:
+        print(error)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
 
 
 @main.command("serve")
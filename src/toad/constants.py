@@ -56,3 +56,18 @@ ACP_INITIALIZE: Final[bool] = _get_environ_bool("TOAD_ACP_INITIALIZE", True)
 
 DEBUG: Final[bool] = _get_environ_bool("DEBUG", False)
 """Debug flag."""
+
+ACP_VALIDATION: Final[str] = get_environ("TOAD_ACP_VALIDATION", "full")
+"""Validation of agent calls; one of "full", "sampled", or "trusted"."""
+
+JSON_CODEC: Final[str] = get_environ("TOAD_JSON_CODEC", "auto")
+"""JSON codec for agent communication; one of "auto", "orjson", "msgspec", or "json"."""
+
+ACP_LOG_STDERR: Final[bool] = _get_environ_bool("TOAD_ACP_LOG_STDERR", True)
+"""Write agent stderr to the agent log?"""
+
+ACP_DAEMON: Final[str] = get_environ("TOAD_ACP_DAEMON", "")
+"""Path to a shared agent daemon socket (see `toad daemon`), "1" for the default path, or empty to run agents directly."""
+
+ACP_TRACE: Final[str] = get_environ("TOAD_ACP_TRACE", "")
+"""Path to write a timestamped trace of agent frames, "1" for the log directory, or empty to disable."""
@@ -1,6 +1,10 @@
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 import json
-from typing import cast, TypedDict
+from pathlib import Path
+from typing import AsyncIterator, ClassVar, cast, TypedDict
+from weakref import WeakSet
 from toad import paths
 
 import aiosqlite
@@ -31,14 +35,82 @@ class Session(TypedDict):
     """Text field containing JSON meta."""
 
 
+class _SharedConnection:
+    """A connection shared by all `DB` instances on an event loop."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lock = asyncio.Lock()
+        self.connection: aiosqlite.Connection | None = None
+        self.closed = False
+
+    async def get(self) -> aiosqlite.Connection:
+        """Get the connection, connecting on first use."""
+        if self.connection is None:
+            self.connection = await aiosqlite.connect(self.path)
+            self.connection.row_factory = aiosqlite.Row
+        return self.connection
+
+    async def close(self) -> None:
+        """Close the connection (and stop its thread), once current use has finished."""
+        async with self.lock:
+            self.closed = True
+            if (connection := self.connection) is not None:
+                self.connection = None
+                await connection.close()
+
+
 class DB:
-    """Toads database, for anything that isn't strictly configuration."""
+    """Toads database, for anything that isn't strictly configuration.
+
+    Instances on the same event loop share a single connection (and thread), so
+    concurrent sessions don't each open the database for every query. Call `DB.close`
+    before the event loop finishes. After that, queries on the loop use a connection
+    which is closed after each use, so nothing is left running at exit.
+
+    """
+
+    _shared: ClassVar[
+        dict[tuple[asyncio.AbstractEventLoop, Path], _SharedConnection]
+    ] = {}
+    _closed_loops: ClassVar[WeakSet[asyncio.AbstractEventLoop]] = WeakSet()
 
     def __init__(self):
         self.path = paths.get_state() / "toad.db"
 
-    def open(self) -> aiosqlite.Connection:
-        return aiosqlite.connect(self.path)
+    @asynccontextmanager
+    async def open(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Get exclusive use of the shared connection.
+
+        Returns:
+            An async context manager that yields the connection.
+        """
+        loop = asyncio.get_running_loop()
+        if loop not in self._closed_loops:
+            key = (loop, self.path)
+            if (shared := self._shared.get(key)) is None:
+                shared = self._shared[key] = _SharedConnection(self.path)
+            async with shared.lock:
+                if not shared.closed:
+                    yield await shared.get()
+                    return
+        # Shared connections have been closed, so don't leave a connection open
+        async with aiosqlite.connect(self.path) as connection:
+            connection.row_factory = aiosqlite.Row
+            yield connection
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close the shared connections for the running event loop.
+
+        Connections are not shared on the loop after this is called.
+        """
+        loop = asyncio.get_running_loop()
+        cls._closed_loops.add(loop)
+        for key, shared in list(cls._shared.items()):
+            if key[0] is loop:
+                del cls._shared[key]
+                await shared.close()
 
     async def create(self) -> bool:
         """Create the tables if requried."""
@@ -153,7 +225,6 @@ class DB:
         """
         try:
             async with self.open() as db:
-                db.row_factory = aiosqlite.Row
                 cursor = await db.execute("SELECT * from sessions WHERE id = ?", (id,))
                 row = await cursor.fetchone()
         except aiosqlite.Error:
@@ -167,7 +238,6 @@ class DB:
         """Get the most recent sessions."""
         try:
             async with self.open() as db:
-                db.row_factory = aiosqlite.Row
                 cursor = await db.execute(
                     """SELECT * from sessions
                     ORDER BY last_used DESC
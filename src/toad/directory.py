@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import asyncio
 from itertools import filterfalse
-from typing import Callable
+from typing import Callable, Hashable
 from time import time
 from os import PathLike
 from pathlib import Path
@@ -131,6 +131,69 @@ async def scan(
     return results
 
 
+class FileIndex:
+    """Recursive scans of project directories, shared by everything that searches paths.
+
+    Concurrent requests for the same directory wait on a single scan, and the result
+    is reused until a rescan is requested.
+
+    """
+
+    def __init__(self) -> None:
+        self._scans: dict[
+            tuple[Path, Hashable | None, bool], asyncio.Task[list[Path]]
+        ] = {}
+
+    async def scan(
+        self,
+        root: Path,
+        *,
+        path_filter: PathFilter | None = None,
+        add_directories: bool = False,
+        rescan: bool = False,
+    ) -> list[Path]:
+        """Get the paths in a directory, scanning if required.
+
+        Args:
+            root: Root directory to scan.
+            path_filter: Path filter object.
+            add_directories: Also collect directories?
+            rescan: Scan again, if there was a previous scan?
+
+        Returns:
+            A list of Paths (shared, and should not be modified).
+        """
+        # The paths depend on the filter, so scans are only shared by equal filters
+        key = (
+            root,
+            None if path_filter is None else path_filter.key,
+            add_directories,
+        )
+        scan_task = self._scans.get(key)
+        if (
+            scan_task is None
+            or scan_task.get_loop() is not asyncio.get_running_loop()
+            or (rescan and scan_task.done())
+        ):
+            self._scans[key] = scan_task = asyncio.create_task(
+                scan(root, path_filter=path_filter, add_directories=add_directories),
+                name=f"index {root!s}",
+            )
+        try:
+            # Shielded, so a cancelled caller doesn't cancel the scan for others
+            return await asyncio.shield(scan_task)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if self._scans.get(key) is scan_task:
+                del self._scans[key]
+            raise
+
+
+file_index = FileIndex()
+"""Directory scans shared by the app."""
+
+
 class Scan:
     """A scan of a single directory."""
 
@@ -0,0 +1,207 @@
+"""
+JSON encoding and decoding for the agent wire protocol.
+
+Uses orjson or msgspec if installed, falling back to the standard library.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import json
+from typing import ClassVar, TYPE_CHECKING
+
+from toad import constants
+
+if TYPE_CHECKING:
+    from toad.jsonrpc import JSONType
+
+
+type Buffer = bytes | bytearray | memoryview | str
+
+
+class DecodeError(ValueError):
+    """Data could not be decoded."""
+
+
+class EncodeError(ValueError):
+    """Data could not be encoded."""
+
+
+class Codec(ABC):
+    """Encodes and decodes JSON."""
+
+    name: ClassVar[str] = ""
+    """Name of the codec (used to select the codec)."""
+
+    @abstractmethod
+    def encode(self, data: JSONType) -> bytes:
+        """Encode data as JSON.
+
+        Args:
+            data: Data to encode.
+
+        Raises:
+            EncodeError: If the data could not be encoded.
+
+        Returns:
+            UTF-8 encoded JSON.
+        """
+
+    @abstractmethod
+    def decode(self, data: Buffer) -> JSONType:
+        """Decode JSON.
+
+        Args:
+            data: UTF-8 encoded JSON (or a string).
+
+        Raises:
+            DecodeError: If the data is not valid JSON.
+
+        Returns:
+            Decoded data.
+        """
+
+
+class StdlibCodec(Codec):
+    """Codec using the standard library `json` module."""
+
+    name = "json"
+
+    def encode(self, data: JSONType) -> bytes:
+        try:
+            return json.dumps(data).encode("utf-8")
+        except (TypeError, ValueError) as error:
+            raise EncodeError(str(error)) from None
+
+    def decode(self, data: Buffer) -> JSONType:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        try:
+            return json.loads(data)
+        except ValueError as error:
+            raise DecodeError(str(error)) from None
+
+
+class OrjsonCodec(Codec):
+    """Codec using orjson."""
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._dumps = orjson.dumps
+        # Stringify non-str keys, as the standard library does
+        self._dumps_option = orjson.OPT_NON_STR_KEYS
+        self._loads = orjson.loads
+        self._encode_error = orjson.JSONEncodeError
+        self._decode_error = orjson.JSONDecodeError
+
+    def encode(self, data: JSONType) -> bytes:
+        try:
+            return self._dumps(data, option=self._dumps_option)
+        except self._encode_error as error:
+            raise EncodeError(str(error)) from None
+
+    def decode(self, data: Buffer) -> JSONType:
+        try:
+            return self._loads(data)
+        except self._decode_error as error:
+            raise DecodeError(str(error)) from None
+
+
+class MsgspecCodec(Codec):
+    """Codec using msgspec.
+
+    Unlike the other codecs, dicts with bool or `None` keys raise `EncodeError`
+    (number keys are stringified).
+    """
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self._error = msgspec.MsgspecError
+
+    def encode(self, data: JSONType) -> bytes:
+        try:
+            return self._encoder.encode(data)
+        except (self._error, TypeError) as error:
+            raise EncodeError(str(error)) from None
+
+    def decode(self, data: Buffer) -> JSONType:
+        try:
+            return self._decoder.decode(data)
+        except self._error as error:
+            raise DecodeError(str(error)) from None
+
+
+CODECS: dict[str, type[Codec]] = {
+    codec.name: codec for codec in (OrjsonCodec, MsgspecCodec, StdlibCodec)
+}
+"""Codecs in order of preference."""
+
+
+def load_codec(name: str = "auto") -> Codec:
+    """Load a codec.
+
+    Args:
+        name: Name of the codec, or "auto" to pick the fastest available.
+
+    Returns:
+        A codec instance. Falls back to the standard library if the requested
+            codec isn't installed.
+    """
+    if name != "auto" and (codec_type := CODECS.get(name)) is not None:
+        try:
+            return codec_type()
+        except ImportError:
+            return StdlibCodec()
+    for codec_type in CODECS.values():
+        try:
+            return codec_type()
+        except ImportError:
+            continue
+    return StdlibCodec()
+
+
+_codec: Codec | None = None
+
+
+def get_codec() -> Codec:
+    """Get the default codec (configured with the `TOAD_JSON_CODEC` env var).
+
+    Returns:
+        A shared codec instance.
+    """
+    global _codec
+    if _codec is None:
+        _codec = load_codec(constants.JSON_CODEC)
+    return _codec
+
+
+def encode(data: JSONType) -> bytes:
+    """Encode JSON with the default codec.
+
+    Args:
+        data: Data to encode.
+
+    Returns:
+        UTF-8 encoded JSON.
+    """
+    return get_codec().encode(data)
+
+
+def decode(data: Buffer) -> JSONType:
+    """Decode JSON with the default codec.
+
+    Args:
+        data: UTF-8 encoded JSON.
+
+    Returns:
+        Decoded data.
+    """
+    return get_codec().decode(data)
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import asyncio
-import json
 from asyncio import Future, get_running_loop
 from dataclasses import dataclass
 from functools import wraps
@@ -9,15 +8,20 @@ import inspect
 from inspect import signature
 from enum import IntEnum
 import logging
-from types import TracebackType
+from types import NoneType, TracebackType, UnionType
+import typing
 import weakref
 
 import rich.repr
-from typing import Callable, ParamSpec, TypeVar
+from typing import Any, Callable, Coroutine, Literal, ParamSpec, TypeAliasType, TypeVar
 from typeguard import check_type, CollectionCheckStrategy, TypeCheckError
 
+from toad import json_codec
+
 
 type MethodType = Callable
+type ShapeCheck = Callable[[object], bool]
+type ValidationMode = Literal["full", "sampled", "trusted"]
 type JSONValue = str | int | float | bool | None
 type JSONType = dict[str, JSONType] | list[JSONType] | str | int | float | bool | None
 type JSONObject = dict[str, JSONType]
@@ -25,6 +29,25 @@ type JSONList = list[JSONType]
 
 log = logging.getLogger("jsonrpc")
 
+VALIDATION_MODES: tuple[ValidationMode, ...] = typing.get_args(ValidationMode.__value__)
+"""The accepted validation modes."""
+
+
+def get_validation_mode(mode: str) -> ValidationMode | None:
+    """Get a validation mode from a string (such as an environment variable).
+
+    Args:
+        mode: Name of the mode (case insensitive).
+
+    Returns:
+        The validation mode, or `None` if `mode` isn't a validation mode.
+    """
+    mode = mode.strip().lower()
+    for validation_mode in VALIDATION_MODES:
+        if mode == validation_mode:
+            return validation_mode
+    return None
+
 
 def expose(name: str = "", prefix: str = ""):
     """Expose a method."""
@@ -55,10 +78,151 @@ class ErrorCode(IntEnum):
     INTERNAL_ERROR = -32603
 
 
+def _always_valid(value: object) -> bool:
+    return True
+
+
+_shape_cache: dict[object, tuple[ShapeCheck, bool]] = {}
+
+
+def compile_shape_check(parameter_type: Any) -> tuple[ShapeCheck, bool]:
+    """Compile a fast (shallow) check for the given type.
+
+    The check verifies the outer shape of a value: primitive types, literals, and the
+    required keys of TypedDicts (including literal discriminators such as `"sessionUpdate"`).
+    Nested values are not inspected.
+
+    Args:
+        parameter_type: A type annotation.
+
+    Returns:
+        A tuple of a callable that returns `True` if the value has the expected shape,
+            and a boolean that is `True` if the shape check is a *complete* validation
+            (no need to defer to typeguard).
+    """
+    try:
+        return _shape_cache[parameter_type]
+    except (KeyError, TypeError):
+        pass
+    compiled = _compile_shape_check(parameter_type)
+    try:
+        _shape_cache[parameter_type] = compiled
+    except TypeError:
+        pass
+    return compiled
+
+
+def _compile_shape_check(parameter_type: Any) -> tuple[ShapeCheck, bool]:
+    if isinstance(parameter_type, TypeAliasType):
+        return compile_shape_check(parameter_type.__value__)
+
+    if parameter_type is Any or parameter_type is object:
+        return _always_valid, True
+
+    if parameter_type is None or parameter_type is NoneType:
+        return (lambda value: value is None), True
+
+    if parameter_type is float:
+        # Ints are acceptable where floats are expected
+        return (lambda value: isinstance(value, (int, float))), True
+
+    if parameter_type in (str, int, bool, dict, list):
+        return (lambda value: isinstance(value, parameter_type)), True
+
+    origin = typing.get_origin(parameter_type)
+
+    if origin is Literal:
+        return _compile_literal_check(typing.get_args(parameter_type)), True
+
+    if origin is UnionType or origin is typing.Union:
+        member_checks = [
+            compile_shape_check(member) for member in typing.get_args(parameter_type)
+        ]
+        exact = all(exact for _, exact in member_checks)
+        checks = tuple(check for check, _ in member_checks)
+        return (lambda value: any(check(value) for check in checks)), exact
+
+    if typing.is_typeddict(parameter_type):
+        return _compile_typed_dict_check(parameter_type), False
+
+    if origin is typing.Required or origin is typing.NotRequired:
+        return compile_shape_check(typing.get_args(parameter_type)[0])
+
+    if inspect.isclass(origin):
+        return (lambda value: isinstance(value, origin)), False
+
+    if inspect.isclass(parameter_type):
+        return (lambda value: isinstance(value, parameter_type)), True
+
+    return _always_valid, False
+
+
+def _compile_literal_check(literal_values: tuple[object, ...]) -> ShapeCheck:
+    """Compile a check for a literal.
+
+    Types are compared as well as values, as `1 == True` and `0 == False`.
+
+    Args:
+        literal_values: Values of the literal.
+
+    Returns:
+        A callable that checks a value is one of the literal values.
+    """
+    typed_values = frozenset(
+        (type(literal_value), literal_value) for literal_value in literal_values
+    )
+
+    def check_literal(value: object) -> bool:
+        try:
+            return (type(value), value) in typed_values
+        except TypeError:
+            # Unhashable, so not a literal
+            return False
+
+    return check_literal
+
+
+def _compile_typed_dict_check(typed_dict: Any) -> ShapeCheck:
+    """Compile a shape check for a TypedDict.
+
+    Args:
+        typed_dict: A TypedDict class.
+
+    Returns:
+        A callable that checks a value is a dict with the required keys.
+    """
+    required_keys = frozenset(typed_dict.__required_keys__)
+    try:
+        annotations = typing.get_type_hints(typed_dict)
+    except Exception:
+        annotations = {}
+    literal_keys: list[tuple[str, ShapeCheck]] = []
+    for key in required_keys:
+        annotation = annotations.get(key)
+        if typing.get_origin(annotation) is Literal:
+            literal_keys.append(
+                (key, _compile_literal_check(typing.get_args(annotation)))
+            )
+
+    def check_typed_dict(value: object) -> bool:
+        if not isinstance(value, dict) or not required_keys.issubset(value.keys()):
+            return False
+        for key, check_literal in literal_keys:
+            if not check_literal(value[key]):
+                return False
+        return True
+
+    return check_typed_dict
+
+
 @dataclass
 class Parameter:
     type: type
     default: JSONType | NoDefault
+    check_shape: ShapeCheck = _always_valid
+    """Fast check for the outer shape of a value."""
+    exact: bool = False
+    """Is `check_shape` a complete validation?"""
 
 
 @dataclass
@@ -67,6 +231,21 @@ class Method:
     callable: Callable
     parameters: dict[str, Parameter]
 
+    def __post_init__(self) -> None:
+        self.defaults: dict[str, JSONType | NoDefault] = {
+            name: parameter.default for name, parameter in self.parameters.items()
+        }
+        self.server_parameters: tuple[str, ...] = tuple(
+            name
+            for name, parameter in self.parameters.items()
+            if inspect.isclass(parameter.type) and issubclass(parameter.type, Server)
+        )
+        self.positional_parameters: list[tuple[str, Parameter]] = [
+            (name, parameter)
+            for name, parameter in self.parameters.items()
+            if name not in self.server_parameters
+        ]
+
 
 @rich.repr.auto
 class JSONRPCError(Exception):
@@ -118,8 +297,45 @@ class APIError(Exception):
 
 
 class Server:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        validation: ValidationMode = "full",
+        sample_interval: int = 100,
+        batch_concurrency: int = 16,
+    ) -> None:
+        """
+
+        Args:
+            validation: How thoroughly to validate parameters:
+                "full" validates every call completely,
+                "sampled" checks the shape of every call, and fully validates one in `sample_interval` calls,
+                "trusted" checks only the shape of parameters (for trusted peers).
+            sample_interval: Number of calls per full validation, when `validation` is "sampled".
+            batch_concurrency: Maximum number of calls in a batch to run concurrently.
+        """
+        if validation not in VALIDATION_MODES:
+            raise ValueError(
+                f"validation should be one of {VALIDATION_MODES!r}; not {validation!r}"
+            )
         self._methods: dict[str, Method] = {}
+        self.validation = validation
+        self.sample_interval = max(1, sample_interval)
+        self.batch_concurrency = max(1, batch_concurrency)
+        self._call_count = 0
+        self._notification_tasks: set[asyncio.Task] = set()
+
+    def _should_validate_deep(self) -> bool:
+        """Check if the next call should be fully validated.
+
+        Returns:
+            `True` to validate nested values, `False` to check only shape.
+        """
+        if self.validation == "trusted":
+            return False
+        if self.validation == "sampled":
+            self._call_count += 1
+            return self._call_count % self.sample_interval == 0
+        return True
 
     async def call(self, json: JSONObject | JSONList) -> JSONType:
         if isinstance(json, dict):
@@ -210,45 +426,45 @@ class Server:
                 "Invalid request; 'params' attribute should be a list or an object"
             )
 
-        arguments: dict[str, JSONType | Server | NoDefault] = {
-            name: parameter.default for name, parameter in method.parameters.items()
-        }
+        arguments: dict[str, JSONType | Server | NoDefault] = method.defaults.copy()
+        deep = self._should_validate_deep()
 
-        def validate(value: JSONType, parameter_type: type) -> None:
+        def validate(value: JSONType, parameter: Parameter) -> None:
             """Validate types."""
+            if not parameter.check_shape(value):
+                raise InvalidParams(
+                    f"Parameter is not the expected type ({parameter.type})",
+                    id=request_id,
+                )
+            if not deep or parameter.exact:
+                return
             try:
                 check_type(
                     value,
-                    parameter_type,
+                    parameter.type,
                     collection_check_strategy=CollectionCheckStrategy.ALL_ITEMS,
                 )
             except TypeCheckError as error:
                 raise InvalidParams(
-                    f"Parameter is not the expected type ({parameter_type}); {error}",
+                    f"Parameter is not the expected type ({parameter.type}); {error}",
                     id=request_id,
                 )
 
         if isinstance(params, list):
-            parameter_items = [
-                (name, parameter)
-                for name, parameter in method.parameters.items()
-                if not issubclass(parameter.type, Server)
-            ]
-            for (parameter_name, parameter), value in zip(parameter_items, params):
-                if issubclass(parameter.type, Server):
-                    value = self
-                else:
-                    validate(value, parameter.type)
+            for (parameter_name, parameter), value in zip(
+                method.positional_parameters, params
+            ):
+                validate(value, parameter)
                 arguments[parameter_name] = value
         else:
+            parameters = method.parameters
             for parameter_name, value in params.items():
-                if parameter := method.parameters.get(parameter_name):
-                    validate(value, parameter.type)
+                if parameter := parameters.get(parameter_name):
+                    validate(value, parameter)
                     arguments[parameter_name] = value
 
-        for name, parameter in method.parameters.items():
-            if inspect.isclass(parameter.type) and issubclass(parameter.type, Server):
-                arguments[name] = self
+        for name in method.server_parameters:
+            arguments[name] = self
 
         try:
             call_result = method.callable(**arguments)
@@ -274,13 +490,40 @@ class Server:
         return response_object
 
     async def _dispatch_batch(self, json: JSONList) -> list[JSONType]:
-        batch_results: list[JSONType] = []
+        """Dispatch a batch of calls concurrently.
+
+        Requests run concurrently (up to `batch_concurrency` at a time), and their
+        results are returned in the order of the batch. Notifications are dispatched
+        in the background and don't delay the response.
+
+        Args:
+            json: A list of JSONRPC call objects.
+
+        Returns:
+            A list of responses.
+        """
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def dispatch(request: JSONObject) -> JSONType | None:
+            async with semaphore:
+                return await self._dispatch_object(request)
+
+        pending_requests: list[Coroutine[Any, Any, JSONType | None]] = []
         for request in json:
             if not isinstance(request, dict):
                 continue
-            result = await self._dispatch_object(request)
-            if result is not None:
-                batch_results.append(result)
+            if "method" in request and not isinstance(request.get("id"), (int, str)):
+                task = asyncio.create_task(dispatch(request))
+                self._notification_tasks.add(task)
+                task.add_done_callback(self._notification_tasks.discard)
+            else:
+                pending_requests.append(dispatch(request))
+
+        batch_results: list[JSONType] = [
+            result
+            for result in await asyncio.gather(*pending_requests)
+            if result is not None
+        ]
         return batch_results
 
     def process_callable(
@@ -310,21 +553,24 @@ class Server:
                 name = callable.__name__
             name = f"{prefix}{name}"
 
-            parameters = {
-                name: Parameter(
-                    (
-                        eval(parameter.annotation)
-                        if isinstance(parameter.annotation, str)
-                        else parameter.annotation
-                    ),
+            parameters: dict[str, Parameter] = {}
+            for parameter_name, parameter in signature(callable).parameters.items():
+                parameter_type = (
+                    eval(parameter.annotation)
+                    if isinstance(parameter.annotation, str)
+                    else parameter.annotation
+                )
+                check_shape, exact = compile_shape_check(parameter_type)
+                parameters[parameter_name] = Parameter(
+                    parameter_type,
                     (
                         NO_DEFAULT
                         if parameter.default is inspect._empty
                         else parameter.default
                     ),
+                    check_shape,
+                    exact,
                 )
-                for name, parameter in signature(callable).parameters.items()
-            }
             self._methods[name] = Method(name, callable, parameters)
             return callable
 
@@ -419,10 +665,50 @@ class Request:
     @property
     def body_json(self) -> bytes:
         """Dump the body as encoded json."""
-        body_json = json.dumps(self.body).encode("utf-8")
+        body_json = json_codec.encode(self.body)
         return body_json
 
 
+def compile_binder(
+    func: Callable,
+) -> Callable[[tuple[object, ...], dict[str, object]], dict[str, JSONType]]:
+    """Compile a function to map call arguments on to parameter names.
+
+    Args:
+        func: A function (used as a signature for a remote method).
+
+    Returns:
+        A callable that takes positional and keyword arguments, and returns the call parameters.
+    """
+    func_name = func.__name__
+    parameter_names = tuple(signature(func).parameters)
+    parameter_count = len(parameter_names)
+    parameter_set = frozenset(parameter_names)
+
+    def bind_arguments(
+        args: tuple[object, ...], kwargs: dict[str, object]
+    ) -> dict[str, JSONType]:
+        if len(args) > parameter_count:
+            raise TypeError(
+                f"{func_name}() takes {parameter_count} positional arguments but {len(args)} were given"
+            )
+        call_parameters: dict[str, Any] = dict(zip(parameter_names, args))
+        if kwargs:
+            for parameter_name, arg in kwargs.items():
+                if parameter_name not in parameter_set:
+                    raise TypeError(
+                        f"{func_name}() got an unexpected keyword argument {parameter_name!r}"
+                    )
+                if parameter_name in call_parameters:
+                    raise TypeError(
+                        f"{func_name}() got multiple values for argument {parameter_name!r}"
+                    )
+                call_parameters[parameter_name] = arg
+        return call_parameters
+
+    return bind_arguments
+
+
 class API:
     def __init__(self) -> None:
         self._request_id = 0
@@ -481,15 +767,11 @@ class API:
             if not name:
                 name = func.__name__
             name = f"{prefix}{name}"
+            bind_arguments = compile_binder(func)
 
             @wraps(func)
             def wrapper(*args: P.args, **kwargs: P.kwargs) -> MethodCall[T]:
-                parameters = signature(func).parameters
-                call_parameters = {}
-                for arg, parameter_name in zip(args, parameters):
-                    call_parameters[parameter_name] = arg
-                for parameter_name, arg in kwargs:
-                    call_parameters[parameter_name] = arg
+                call_parameters = bind_arguments(args, kwargs)
                 if notification:
                     method_call = MethodCall(name, None, call_parameters)
                 else:
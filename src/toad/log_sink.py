@@ -0,0 +1,156 @@
+"""
+A buffered log file writer.
+"""
+
+import asyncio
+from contextlib import suppress
+from pathlib import Path
+from typing import BinaryIO
+
+import rich.repr
+
+
+@rich.repr.auto
+class LogSink:
+    """Writes lines to a log file in batches, from a thread.
+
+    Lines are held in memory, and flushed periodically or when the batch reaches a
+    given size. The log is rotated when it exceeds `max_size`.
+
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        flush_interval: float = 0.5,
+        flush_size: int = 64 * 1024,
+        max_size: int = 16 * 1024 * 1024,
+        retention: int = 3,
+    ) -> None:
+        """
+
+        Args:
+            path: Path to the log file.
+            flush_interval: Maximum time (in seconds) lines are held in memory.
+            flush_size: Size of batch (in bytes) which triggers a flush.
+            max_size: Size of the log file (in bytes) which triggers a rotation.
+            retention: Number of rotated log files to keep.
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_size = max_size
+        self.retention = retention
+
+        self._batch: list[bytes] = []
+        self._batch_size = 0
+        self._log_file: BinaryIO | None = None
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield self.path
+        yield "closed", self._closed, False
+
+    def start(self) -> None:
+        """Start the flush task."""
+        self._task = asyncio.create_task(self._run(), name=f"log sink {self.path}")
+
+    def write(self, line: str | bytes) -> None:
+        """Write a line to the log.
+
+        Args:
+            line: Text (or UTF-8 encoded bytes) to log.
+        """
+        if self._closed:
+            return
+        if isinstance(line, str):
+            line = line.encode("utf-8", "replace")
+        line = line.rstrip()
+        self._batch.append(line)
+        self._batch.append(b"\n")
+        self._batch_size += len(line) + 1
+        if self._batch_size >= self.flush_size:
+            self._flush_event.set()
+
+    async def _run(self) -> None:
+        """Flush the log periodically."""
+        while not self._closed:
+            with suppress(asyncio.TimeoutError):
+                async with asyncio.timeout(self.flush_interval):
+                    await self._flush_event.wait()
+            self._flush_event.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write pending lines to the log file."""
+        async with self._flush_lock:
+            if not self._batch:
+                return
+            data = b"".join(self._batch)
+            self._batch.clear()
+            self._batch_size = 0
+            await asyncio.to_thread(self._write, data)
+
+    async def close(self) -> None:
+        """Flush remaining lines, and close the log file."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is not None:
+            # Wake the flush task, so that it exits
+            self._flush_event.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        await asyncio.to_thread(self._close_file)
+
+    def _write(self, data: bytes) -> None:
+        """Write data to the log file (in a thread).
+
+        Args:
+            data: Data to write.
+        """
+        try:
+            if self._log_file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._log_file = self.path.open("ab")
+            self._log_file.write(data)
+            self._log_file.flush()
+            if self._log_file.tell() >= self.max_size:
+                self._rotate()
+        except OSError:
+            pass
+
+    def _close_file(self) -> None:
+        """Close the log file (in a thread)."""
+        if self._log_file is not None:
+            with suppress(OSError):
+                self._log_file.close()
+            self._log_file = None
+
+    def get_rotated_path(self, index: int) -> Path:
+        """Get the path of a rotated log file.
+
+        Args:
+            index: Index of rotation (1 is the most recent).
+
+        Returns:
+            Path to log file.
+        """
+        return self.path.with_name(f"{self.path.stem}.{index}{self.path.suffix}")
+
+    def _rotate(self) -> None:
+        """Rotate the log file (in a thread)."""
+        self._close_file()
+        for index in range(self.retention, 0, -1):
+            with suppress(OSError):
+                source_path = self.path if index == 1 else self.get_rotated_path(index - 1)
+                if source_path.exists():
+                    source_path.replace(self.get_rotated_path(index))
+        if not self.retention:
+            with suppress(OSError):
+                self.path.unlink(missing_ok=True)
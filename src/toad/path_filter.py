@@ -1,5 +1,5 @@
 from itertools import chain
-from typing import Iterable, Sequence
+from typing import Hashable, Iterable, Sequence
 from pathlib import Path
 import pathspec
 import pathspec.patterns
@@ -50,6 +50,21 @@ class PathFilter:
     def __rich_repr__(self) -> rich.repr.Result:
         yield (str(self._root),)
 
+    @property
+    def key(self) -> Hashable:
+        """A key which is equal for filters that match the same paths.
+
+        Filters with the same root and default path specs are equal, as other path
+        specs are loaded from the same .gitignore files.
+        """
+        return (
+            self._root,
+            tuple(
+                tuple(pattern.pattern for pattern in path_spec.patterns)
+                for path_spec in self._default_specs
+            ),
+        )
+
     @classmethod
     def from_git_root(cls, path: Path) -> PathFilter:
         """Load all path specs from parent directories up to the most recent directory with .git
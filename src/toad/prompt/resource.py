@@ -1,6 +1,10 @@
+import base64
+from collections import OrderedDict
 from dataclasses import dataclass
 import mimetypes
 from pathlib import Path
+from threading import Lock
+from typing import BinaryIO, NamedTuple
 
 
 @dataclass
@@ -9,7 +13,20 @@ class Resource:
     path: Path
     mime_type: str
     text: str | None
-    data: bytes | None
+    blob: str | None
+    """Base64 encoded data, for binary resources."""
+    size: int = 0
+    """Size of the file, in bytes."""
+    truncated: bool = False
+    """Was the text truncated?"""
+
+
+class ResourceKey(NamedTuple):
+    """Identifies a version of a file."""
+
+    path: str
+    mtime_ns: int
+    size: int
 
 
 class ResourceError(Exception):
@@ -24,12 +41,155 @@ class ResourceReadError(ResourceError):
     """Failed to read the resource."""
 
 
-def load_resource(root: Path, path: Path) -> Resource:
+class ResourceTooLarge(ResourceError):
+    """A binary resource is larger than the maximum size."""
+
+
+class ResourceCache:
+    """A cache of resources, for files which haven't changed since they were loaded.
+
+    The least recently used resources are discarded, when the cache exceeds `max_size`.
+
+    """
+
+    def __init__(self, max_size: int = 64 * 1024 * 1024) -> None:
+        """
+
+        Args:
+            max_size: Maximum size of cached text and data (in bytes).
+        """
+        self.max_size = max_size
+        self._resources: OrderedDict[ResourceKey, tuple[Resource, int | None]] = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._resources)
+
+    @classmethod
+    def _get_size(cls, resource: Resource) -> int:
+        return len(resource.text or "") + len(resource.blob or "")
+
+    def get(self, key: ResourceKey, max_size: int | None) -> Resource | None:
+        """Get a cached resource.
+
+        Args:
+            key: Resource key.
+            max_size: Maximum size the resource was loaded with.
+
+        Returns:
+            Resource, or `None` if it isn't cached.
+        """
+        with self._lock:
+            if (cached := self._resources.get(key)) is None:
+                return None
+            resource, resource_max_size = cached
+            if resource.truncated:
+                if resource_max_size != max_size:
+                    # Truncated with a different limit
+                    return None
+            elif max_size is not None and resource.size > max_size:
+                # Loaded in full, but larger than the current limit
+                return None
+            self._resources.move_to_end(key)
+            return resource
+
+    def add(self, key: ResourceKey, max_size: int | None, resource: Resource) -> None:
+        """Add a resource to the cache.
+
+        Args:
+            key: Resource key.
+            max_size: Maximum size the resource was loaded with.
+            resource: Resource.
+        """
+        resource_size = self._get_size(resource)
+        if resource_size > self.max_size:
+            return
+        with self._lock:
+            if (previous := self._resources.pop(key, None)) is not None:
+                self._size -= self._get_size(previous[0])
+            self._resources[key] = (resource, max_size)
+            self._size += resource_size
+            while self._size > self.max_size:
+                _, (evicted, _) = self._resources.popitem(last=False)
+                self._size -= self._get_size(evicted)
+
+
+def get_resource_type(path: Path) -> tuple[str, bool]:
+    """Get the type of a resource.
+
+    Args:
+        path: Path to resource.
+
+    Returns:
+        A tuple of the mime type, and a boolean that indicates if the resource is binary.
+    """
+    mime_type, encoding = mimetypes.guess_file_type(path)
+    if mime_type is None:
+        mime_type = "application/octet-stream"
+    return mime_type, encoding is not None
+
+
+def encode_base64(resource_file: BinaryIO, chunk_size: int = 3 * 256 * 1024) -> str:
+    """Base64 encode a file, a chunk at a time.
+
+    Args:
+        resource_file: File opened in binary mode.
+        chunk_size: Size of chunks to read (a multiple of 3, so chunks encode without padding).
+
+    Returns:
+        Base64 encoded data.
+    """
+    assert chunk_size % 3 == 0, "chunk size must be a multiple of 3"
+    encoded_chunks: list[str] = []
+    while chunk := resource_file.read(chunk_size):
+        encoded_chunks.append(base64.b64encode(chunk).decode("ascii"))
+    return "".join(encoded_chunks)
+
+
+def _read_text(resource_file: BinaryIO, max_size: int | None) -> tuple[str, bool]:
+    """Read text, up to a maximum size.
+
+    Args:
+        resource_file: File opened in binary mode.
+        max_size: Maximum number of bytes to read, or `None` for no maximum.
+
+    Returns:
+        A tuple of the text, and a boolean that indicates if the text was truncated.
+    """
+    if max_size is None:
+        data = resource_file.read()
+        truncated = False
+    else:
+        data = resource_file.read(max_size + 1)
+        truncated = len(data) > max_size
+        if truncated:
+            data = data[:max_size]
+            # Don't end on a partial line (or a partial character)
+            if (last_newline := data.rfind(b"\n")) != -1:
+                data = data[: last_newline + 1]
+    text = data.decode("utf-8", errors="replace")
+    # Translate newlines, as `Path.read_text` would
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, truncated
+
+
+def load_resource(
+    root: Path,
+    path: Path,
+    max_size: int | None = None,
+    cache: ResourceCache | None = None,
+) -> Resource:
     """Load a resource from the project directory.
 
     Args:
         root: The project root.
         path: Relative path within project.
+        max_size: Maximum number of bytes to read. Text is truncated to this size,
+            binary resources larger than this raise `ResourceTooLarge`.
+        cache: Optional cache of resources.
 
     Returns:
         A resource.
@@ -39,22 +199,31 @@ def load_resource(root: Path, path: Path) -> Resource:
     if not resource_path.is_relative_to(root):
         raise ResourceNotRelative("Resource path is not relative to project root.")
 
-    mime_type, encoding = mimetypes.guess_file_type(resource_path)
-    if mime_type is None:
-        mime_type = "application/octet-stream"
-
-    data: bytes | None
-    text: str | None
+    mime_type, binary = get_resource_type(resource_path)
 
     try:
-        if encoding is not None:
-            data = resource_path.read_bytes()
-            text = None
-        else:
-            data = None
-            text = resource_path.read_text(encoding, errors="replace")
+        with resource_path.open("rb") as resource_file:
+            stat = resource_path.stat()
+            key = ResourceKey(str(resource_path), stat.st_mtime_ns, stat.st_size)
+            if cache is not None and (
+                resource := cache.get(key, max_size)
+            ) is not None:
+                return resource
+            text: str | None = None
+            blob: str | None = None
+            truncated = False
+            if binary:
+                if max_size is not None and stat.st_size > max_size:
+                    raise ResourceTooLarge(
+                        f"{str(path)!r} is larger than {max_size} bytes"
+                    )
+                blob = encode_base64(resource_file)
+            else:
+                text, truncated = _read_text(resource_file, max_size)
     except FileNotFoundError:
         raise ResourceReadError(f"File not found {str(path)!r}")
+    except ResourceError:
+        raise
     except Exception as error:
         raise ResourceReadError(f"Failed to read {str(path)!r}; {error}")
 
@@ -63,6 +232,10 @@ def load_resource(root: Path, path: Path) -> Resource:
         resource_path,
         mime_type=mime_type,
         text=text,
-        data=data,
+        blob=blob,
+        size=stat.st_size,
+        truncated=truncated,
     )
+    if cache is not None:
+        cache.add(key, max_size, resource)
     return resource
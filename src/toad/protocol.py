@@ -1,5 +1,6 @@
 from typing import Protocol, runtime_checkable, Iterable
 
+from textual.message import Message
 from textual.widget import Widget
 
 from toad.menus import MenuItem
@@ -26,3 +27,8 @@ class ExpandProtocol(Protocol):
     def expand_block(self) -> None: ...
     def collapse_block(self) -> None: ...
     def is_block_expanded(self) -> bool: ...
+
+
+@runtime_checkable
+class MessageTarget(Protocol):
+    def post_message(self, message: Message) -> bool: ...
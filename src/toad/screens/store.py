@@ -462,7 +462,7 @@ class StoreScreen(Screen):
             column=ToadApp.column,
             column_width=ToadApp.column_width,
         )
-        await self.app.push_screen_wait(screen)
+        await self.app.sessions.new(screen)
 
     @on(LaunchAgent)
     def on_launch_agent(self, message: LaunchAgent) -> None:
@@ -484,6 +484,8 @@ class StoreScreen(Screen):
             with suppress(NoMatches):
                 first_grid = self.container.query(GridSelect).first()
                 first_grid.focus(scroll_visible=False)
+            project_path = Path(self.app.project_dir or "./").resolve().absolute()
+            await self.app.warm_agent_pool(project_path, self._agents)
 
     async def setting_updated(self, setting: tuple[str, object]) -> None:
         key, value = setting
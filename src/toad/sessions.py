@@ -0,0 +1,110 @@
+"""
+Agent sessions running side by side in a single app.
+
+Each session is a `MainScreen` (with its own conversation and agent), installed as
+an app mode. All sessions share the app's event loop, database connection, file index,
+and highlighter cache. Textual only lays out and paints the current screen, so
+sessions in the background cost little more than the messages their agents send.
+
+"""
+
+from __future__ import annotations
+
+from itertools import count
+from typing import TYPE_CHECKING, Iterator
+
+import rich.repr
+
+if TYPE_CHECKING:
+    from toad.app import ToadApp
+    from toad.screens.main import MainScreen
+
+
+@rich.repr.auto
+class Sessions:
+    """The agent sessions in the app."""
+
+    def __init__(self, app: ToadApp) -> None:
+        """
+
+        Args:
+            app: The app.
+        """
+        self.app = app
+        self._screens: dict[str, MainScreen] = {}
+        self._mode_numbers = count(1)
+
+    def __rich_repr__(self) -> rich.repr.Result:
+        yield "sessions", len(self._screens)
+        yield "current", self.current
+
+    def __len__(self) -> int:
+        return len(self._screens)
+
+    def __iter__(self) -> Iterator[tuple[str, MainScreen]]:
+        return iter(list(self._screens.items()))
+
+    @property
+    def current(self) -> str | None:
+        """Mode of the current session, or `None` if no session is displayed."""
+        mode = self.app.current_mode
+        return mode if mode in self._screens else None
+
+    async def new(self, screen: MainScreen) -> str:
+        """Add a session, and switch to it.
+
+        Args:
+            screen: The session's main screen.
+
+        Returns:
+            The mode of the new session.
+        """
+        mode = f"session-{next(self._mode_numbers)}"
+        self._screens[mode] = screen
+        self.app.add_mode(mode, lambda: screen)
+        await self.app.switch_mode(mode)
+        return mode
+
+    async def switch(self, mode: str) -> None:
+        """Switch to a session.
+
+        Args:
+            mode: Mode of the session.
+        """
+        if mode in self._screens:
+            await self.app.switch_mode(mode)
+
+    async def cycle(self, direction: int = +1) -> None:
+        """Switch to the next (or previous) session.
+
+        Args:
+            direction: `+1` for the next session, `-1` for the previous session.
+        """
+        if not (modes := list(self._screens)):
+            return
+        if (current := self.current) is None:
+            index = 0 if direction > 0 else -1
+        else:
+            index = (modes.index(current) + direction) % len(modes)
+        await self.switch(modes[index])
+
+    async def close(self, mode: str) -> None:
+        """Close a session, stopping its agent.
+
+        If the session is current, the app switches to the next session, or to the
+        store if it was the last session.
+
+        Args:
+            mode: Mode of the session.
+        """
+        if mode not in self._screens:
+            return
+        if mode == self.app.current_mode:
+            modes = list(self._screens)
+            modes.remove(mode)
+            if modes:
+                await self.app.switch_mode(modes[0])
+            else:
+                await self.app.switch_mode("store")
+        del self._screens[mode]
+        await self.app.remove_mode(mode)
@@ -207,6 +207,45 @@ SCHEMA: list[SchemaDict] = [
                 "help": "Show agent's 'thoughts' in the conversation?",
                 "type": "boolean",
             },
+            {
+                "key": "update_interval",
+                "title": "Update interval",
+                "help": "Time (in milliseconds) to gather streaming agent text before updating the conversation.\nLower values are smoother, higher values use less CPU. Set to 0 to disable.",
+                "type": "integer",
+                "default": 16,
+                "validate": [{"type": "minimum", "value": 0}],
+            },
+            {
+                "key": "pool",
+                "title": "Start agents in advance",
+                "help": "Start recently used agents in the background, so new conversations are ready sooner.\nThis uses additional memory while agents wait.",
+                "type": "boolean",
+                "default": False,
+            },
+            {
+                "key": "pool_size",
+                "title": "Agents to start in advance",
+                "help": "Maximum number of agents to start in advance.",
+                "type": "integer",
+                "default": 2,
+                "validate": [{"type": "minimum", "value": 1}],
+            },
+            {
+                "key": "pool_idle_timeout",
+                "title": "Idle timeout",
+                "help": "Time (in seconds) before an agent started in advance is stopped, if it isn't used.",
+                "type": "integer",
+                "default": 300,
+                "validate": [{"type": "minimum", "value": 10}],
+            },
+            {
+                "key": "pool_memory",
+                "title": "Memory limit",
+                "help": "Maximum memory (in megabytes) used by agents started in advance.",
+                "type": "integer",
+                "default": 1024,
+                "validate": [{"type": "minimum", "value": 64}],
+            },
             # {
             #     "key": "warn",
             #     "title": "Warning against dangerous commands?",
@@ -288,6 +327,37 @@ SCHEMA: list[SchemaDict] = [
             },
         ],
     },
+    {
+        "key": "terminal",
+        "title": "Terminal settings",
+        "help": "Customize terminals (shell commands and agent tool calls).",
+        "type": "object",
+        "fields": [
+            {
+                "key": "scrollback_lines",
+                "title": "Scrollback lines",
+                "help": "Maximum number of lines kept in the scrollback of each terminal.",
+                "type": "integer",
+                "default": 10000,
+                "validate": [{"type": "minimum", "value": 1000}],
+            },
+            {
+                "key": "scrollback_memory",
+                "title": "Scrollback memory limit",
+                "help": "Maximum memory (in megabytes) used by older lines in the scrollback of each terminal.",
+                "type": "integer",
+                "default": 16,
+                "validate": [{"type": "minimum", "value": 1}],
+            },
+            {
+                "key": "compress_scrollback",
+                "title": "Compress scrollback?",
+                "help": "Compress older lines in the scrollback, to reduce memory use. Scrolling back may be a little slower.",
+                "type": "boolean",
+                "default": True,
+            },
+        ],
+    },
     {
         "key": "diff",
         "title": "Diff view settings",
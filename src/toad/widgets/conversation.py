@@ -11,7 +11,7 @@ from typing import TYPE_CHECKING, Literal
 from pathlib import Path
 from time import monotonic
 
-from typing import Callable, Any
+from typing import Callable, Any, Iterable
 
 from rich.segment import Segment
 
@@ -26,6 +26,7 @@ from textual.content import Content
 from textual.geometry import clamp
 from textual.css.query import NoMatches
 from textual.message import Message
+from textual.screen import Screen
 from textual.widget import Widget
 from textual.widgets import Static
 from textual.widgets.markdown import MarkdownBlock, MarkdownFence
@@ -65,6 +66,7 @@ if TYPE_CHECKING:
     from toad.widgets.agent_response import AgentResponse
     from toad.widgets.agent_thought import AgentThought
     from toad.widgets.terminal_tool import TerminalTool
+    from toad.widgets.tool_call import ToolCall
 
 
 AGENT_FAIL_HELP = {
@@ -373,7 +375,10 @@ class Conversation(containers.Vertical):
         self.set_reactive(Conversation.project_path, project_path)
         self.set_reactive(Conversation.working_directory, str(project_path))
         self.agent_slash_commands: list[SlashCommand] = []
+        self.tool_calls: dict[str, ToolCall] = {}
+        """Tool call widgets, keyed by their (encoded) tool call ID."""
         self.terminals: dict[str, TerminalTool] = {}
+        """Agent terminals, keyed by terminal ID."""
         self._loading: Loading | None = None
         self._agent_response: AgentResponse | None = None
         self._agent_thought: AgentThought | None = None
@@ -992,12 +997,10 @@ class Conversation(containers.Vertical):
             self._agent_response = None
 
         tool_id = message.tool_id
-        try:
-            existing_tool_call: ToolCall | None = self.contents.get_child_by_id(
-                tool_id, ToolCall
-            )
-        except NoMatches:
-            await self.post(ToolCall(tool_call, id=message.tool_id))
+        if (existing_tool_call := self.get_tool_call(tool_id)) is None:
+            new_tool_call = ToolCall(tool_call, id=tool_id)
+            self.tool_calls[tool_id] = new_tool_call
+            await self.post(new_tool_call)
         else:
             existing_tool_call.tool_call = tool_call
 
@@ -1017,6 +1020,80 @@ class Conversation(containers.Vertical):
         self.agent_slash_commands = slash_commands
         self.update_slash_commands()
 
+    async def wait_for_screen(self, reason: str) -> None:
+        """Wait until this conversation's screen is current.
+
+        When the conversation is in a background session, the user is notified, and
+        screens aren't pushed until they switch to the session.
+
+        Args:
+            reason: Why the session needs attention.
+        """
+        screen = self.screen
+        if screen.is_current:
+            return
+        screen_current = asyncio.Event()
+
+        def screen_changed(current_screen: Screen) -> None:
+            if current_screen is screen:
+                screen_current.set()
+
+        self.app.screen_change_signal.subscribe(self, screen_changed)
+        self.app.notify(
+            f"{reason}; switch to the session to continue",
+            title=screen.title or "Session",
+        )
+        try:
+            await screen_current.wait()
+        finally:
+            self.app.screen_change_signal.unsubscribe(self)
+
+    @classmethod
+    def _get_block[BlockType: Widget](
+        cls, blocks: dict[str, BlockType], block_id: str
+    ) -> BlockType | None:
+        """Get a block from a registry, discarding it if it was removed.
+
+        Args:
+            blocks: Registry of blocks.
+            block_id: ID of the block.
+
+        Returns:
+            The block, or `None` if it isn't in the conversation.
+        """
+        if (block := blocks.get(block_id)) is None:
+            return None
+        if block.is_mounted and not block.is_attached:
+            # Removed from the DOM
+            del blocks[block_id]
+            return None
+        return block
+
+    def _unregister_blocks(self, widgets: Iterable[Widget]) -> None:
+        """Remove widgets from the tool call and terminal registries.
+
+        Args:
+            widgets: Widgets which are being removed.
+        """
+        for widget in widgets:
+            if (widget_id := widget.id) is None:
+                continue
+            if self.tool_calls.get(widget_id) is widget:
+                del self.tool_calls[widget_id]
+            if self.terminals.get(widget_id) is widget:
+                del self.terminals[widget_id]
+
+    def get_tool_call(self, tool_call_id: str) -> ToolCall | None:
+        """Get a tool call widget from its id.
+
+        Args:
+            tool_call_id: ID of the tool call (encoded as a widget ID).
+
+        Returns:
+            Tool call widget, or `None` if the tool call isn't in the conversation.
+        """
+        return self._get_block(self.tool_calls, tool_call_id)
+
     def get_terminal(self, terminal_id: str) -> TerminalTool | None:
         """Get a terminal from its id.
 
@@ -1026,13 +1103,8 @@ class Conversation(containers.Vertical):
         Returns:
             Terminal instance, or `None` if no terminal was found.
         """
-        from toad.widgets.terminal_tool import TerminalTool
-
-        try:
-            terminal = self.contents.query_one(f"#{terminal_id}", TerminalTool)
-        except NoMatches:
-            return None
-        if terminal.released:
+        terminal = self._get_block(self.terminals, terminal_id)
+        if terminal is None or terminal.released:
             return None
         return terminal
 
@@ -1076,12 +1148,14 @@ class Conversation(containers.Vertical):
             await terminal.start(width, height)
         except Exception as error:
             log(str(error))
+            self._unregister_blocks([terminal])
             message.result_future.set_result(False)
             return
 
         try:
             await self.post(terminal)
         except Exception:
+            self._unregister_blocks([terminal])
             message.result_future.set_result(False)
         else:
             message.result_future.set_result(True)
@@ -1217,6 +1291,9 @@ class Conversation(containers.Vertical):
                     sound="question",
                 )
                 permissions_screen = PermissionsScreen(options, diffs)
+                await self.wait_for_screen(
+                    f"{self.agent_title} would like to write files"
+                )
                 result = await self.app.push_screen_wait(permissions_screen)
                 self.app.terminal_alert(False)
                 result_future.set_result(result)
@@ -1349,11 +1426,28 @@ class Conversation(containers.Vertical):
                 assert self._agent_data is not None
                 from toad.acp.agent import Agent
 
+                if (
+                    self._agent_session_id is None
+                    and self.app.settings.get("agent.pool", bool)
+                    and (
+                        agent := self.app.agent_pool.take(
+                            self.project_path, self._agent_data
+                        )
+                    )
+                ):
+                    # Use an agent started in advance
+                    self.agent = agent
+                    agent.attach(self)
+                    return
+
                 self.agent = Agent(
                     self.project_path,
                     self._agent_data,
                     self._agent_session_id,
                     self._session_pk,
+                    update_interval=(
+                        self.app.settings.get("agent.update_interval", int) / 1000
+                    ),
                 )
                 self.agent.start(self)
 
@@ -1519,6 +1613,7 @@ class Conversation(containers.Vertical):
         contents.refresh(layout=True)
 
         if prune_children:
+            self._unregister_blocks(prune_children)
             await contents.remove_children(prune_children)
 
         self.call_later(self.window.anchor)
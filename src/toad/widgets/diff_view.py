@@ -2,8 +2,11 @@ from __future__ import annotations
 
 
 import asyncio
+from collections import OrderedDict
 import difflib
+from hashlib import blake2b
 from itertools import starmap
+from threading import Lock
 from typing import Iterable, Literal
 
 from rich.segment import Segment
@@ -198,6 +201,67 @@ def fill_lists[T](list_a: list[T], list_b: list[T], fill_value: T) -> None:
             list_a.extend([fill_value] * (b_length - a_length))
 
 
+class HighlightCache:
+    """A cache of syntax highlighted code, shared by diffs in all sessions.
+
+    Entries are keyed on a digest of the code, and the least recently used entries
+    are discarded when the total size of cached code exceeds `max_size`.
+
+    """
+
+    def __init__(self, max_size: int = 4 * 1024 * 1024) -> None:
+        """
+
+        Args:
+            max_size: Maximum total size of cached code (in characters).
+        """
+        self.max_size = max_size
+        self._cache: OrderedDict[
+            tuple[bytes, str | None, str | None], tuple[Content, int]
+        ] = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def highlight(self, code: str, language: str | None, path: str | None) -> Content:
+        """Syntax highlight code, or get it from the cache.
+
+        Args:
+            code: Code to highlight.
+            language: Language of the code.
+            path: Path to the file.
+
+        Returns:
+            Highlighted content.
+        """
+        digest = blake2b(code.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        key = (digest, language, path)
+        with self._lock:
+            if (cached := self._cache.get(key)) is not None:
+                self._cache.move_to_end(key)
+                return cached[0]
+        content = highlight.highlight(code, language=language, path=path)
+        size = len(code)
+        if size > self.max_size:
+            return content
+        with self._lock:
+            if (previous := self._cache.pop(key, None)) is not None:
+                self._size -= previous[1]
+            self._cache[key] = (content, size)
+            self._size += size
+            while self._size > self.max_size:
+                _, (_, evicted_size) = self._cache.popitem(last=False)
+                self._size -= evicted_size
+        return content
+
+
+highlight_cache = HighlightCache()
+"""Highlighted code, so the same file shown by several diffs (or sessions) is only
+highlighted once."""
+
+
 class DiffView(containers.VerticalGroup):
     """A formatted diff in unified or split format."""
 
@@ -361,11 +425,11 @@ class DiffView(containers.VerticalGroup):
             text_lines_a = self.code_before.splitlines()
             text_lines_b = self.code_after.splitlines()
 
-            code_a = highlight.highlight(
-                "\n".join(text_lines_a), language=language1, path=self.path1
+            code_a = highlight_cache.highlight(
+                "\n".join(text_lines_a), language1, self.path1
             )
-            code_b = highlight.highlight(
-                "\n".join(text_lines_b), language=language2, path=self.path2
+            code_b = highlight_cache.highlight(
+                "\n".join(text_lines_b), language2, self.path2
             )
 
             lines_a = code_a.split("\n")
@@ -334,7 +334,12 @@ class PathSearch(containers.VerticalGroup):
         self.input.focus()
 
     @work(exclusive=True)
-    async def refresh_paths(self):
+    async def refresh_paths(self, rescan: bool = False):
+        """Refresh the paths from the (shared) file index.
+
+        Args:
+            rescan: Scan the directory again, rather than using a previous scan?
+        """
         self.loading = True
         root = self.root
 
@@ -343,8 +348,8 @@ class PathSearch(containers.VerticalGroup):
             self.tree_view.path_filter = path_filter
             self.tree_view.clear()
             await self.tree_view.reload()
-            paths = await directory.scan(
-                root, path_filter=path_filter, add_directories=True
+            paths = await directory.file_index.scan(
+                root, path_filter=path_filter, add_directories=True, rescan=rescan
             )
 
             paths = [path.absolute() for path in paths]
@@ -637,7 +637,7 @@ class Prompt(containers.VerticalGroup):
 
     def project_directory_updated(self) -> None:
         """Called when there is may be new files"""
-        self.path_search.refresh_paths()
+        self.path_search.refresh_paths(rescan=True)
 
     @on(PromptTextArea.RequestShellMode)
     def on_request_shell_mode(self, event: PromptTextArea.RequestShellMode):
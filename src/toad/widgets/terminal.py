@@ -23,6 +23,10 @@ from toad.menus import MenuItem
 
 # Time required to double tab escape
 ESCAPE_TAP_DURATION = 400 / 1000
+# Time between background reflows, after a change of width
+REFLOW_INTERVAL = 1 / 60
+# Maximum time for each background reflow
+REFLOW_DURATION = 5 / 1000
 
 
 class Terminal(ScrollView, can_focus=True):
@@ -115,6 +119,9 @@ Tap escape *twice* to exit.
         self._write_to_stdin: Callable[[str], Awaitable] | None = None
         self._write_count = 0
         self._long_running_timer: Timer | None = None
+        self._reflow_timer: Timer | None = None
+        self._refolded = False
+        self._trimmed_folds = 0
 
     @property
     def is_finalized(self) -> bool:
@@ -231,8 +238,32 @@ Tap escape *twice* to exit.
         self.state.update_size(self._width, height)
         self._terminal_render_cache.clear()
         self.refresh()
+        if self.state.reflow_pending and self._reflow_timer is None:
+            self._reflow_timer = self.set_interval(REFLOW_INTERVAL, self._reflow)
+
+    def _reflow(self) -> None:
+        """Refold lines in the background, after a change of width."""
+        if self.state.reflow(REFLOW_DURATION):
+            self._update_from_state(None, None)
+        if not self.state.reflow_pending and self._reflow_timer is not None:
+            self._reflow_timer.stop()
+            self._reflow_timer = None
+
+    def _on_refold(self) -> None:
+        """Called after lines were refolded while rendering."""
+        self._refolded = False
+        self._update_from_state(None, None)
 
     def on_mount(self) -> None:
+        from toad.app import ToadApp
+
+        if isinstance(self.app, ToadApp):
+            settings = self.app.settings
+            self.state.set_scrollback_limits(
+                settings.get("terminal.scrollback_lines", int),
+                settings.get("terminal.scrollback_memory", int) * 1024 * 1024,
+                settings.get("terminal.compress_scrollback", bool),
+            )
         self.anchor()
         if self._get_terminal_dimensions is None:
             width, height = self.scrollable_content_region.size
@@ -289,8 +320,15 @@ Tap escape *twice* to exit.
         if self.state.alternate_screen:
             height += self.state.alternate_buffer.height
         self.virtual_size = Size(min(self.state.buffer.max_line_width, width), height)
+        trimmed_folds = self.state.scrollback_buffer.trimmed_folds
         if self._anchored and not self._anchor_released:
             self.scroll_y = self.max_scroll_y
+        elif trimmed_folds != self._trimmed_folds:
+            # Keep the same lines in view, when lines were removed from the scrollback
+            self.scroll_y = max(
+                0, self.scroll_y - (trimmed_folds - self._trimmed_folds)
+            )
+        self._trimmed_folds = trimmed_folds
 
         scroll_y = int(self.scroll_y)
         visible_lines = frozenset(range(scroll_y, scroll_y + height))
@@ -353,6 +391,11 @@ Tap escape *twice* to exit.
         if y >= buffer.height and state.alternate_screen:
             buffer_offset = buffer.height
             buffer = state.alternate_buffer
+        # Refold the line if it is displayed before the background reflow reaches it
+        if state.refold(buffer, y - buffer_offset) and not self._refolded:
+            # Lines below may have moved
+            self._refolded = True
+            self.call_later(self._on_refold)
         # Get the folded line, which as a one to one relationship with y
         try:
             folded_line_ = buffer.folded_lines[y - buffer_offset]
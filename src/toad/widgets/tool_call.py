@@ -9,6 +9,7 @@ from textual import getters
 
 from textual.content import Content
 from textual.reactive import var
+from textual.widget import Widget
 from textual.css.query import NoMatches
 from textual import containers
 from textual.widgets import Static, Markdown
@@ -73,6 +74,8 @@ class ToolCall(containers.VerticalGroup):
         classes: str | None = None,
     ) -> None:
         self._tool_call = tool_call
+        self._header: ToolCallHeader | None = None
+        self._content_widgets: list[tuple[protocol.ToolCallContent, Widget | None]] = []
         super().__init__(id=id, classes=classes)
 
     @property
@@ -81,8 +84,30 @@ class ToolCall(containers.VerticalGroup):
 
     @tool_call.setter
     def tool_call(self, tool_call: protocol.ToolCall):
+        previous_tool_call = self._tool_call
         self._tool_call = tool_call
-        self.refresh(recompose=True)
+        if tool_call is previous_tool_call or self._header is None:
+            # Not yet composed; compose will use the new tool call
+            return
+        # Tool calls are copied on write, so unchanged values are the same objects
+        check_expand = False
+        if (
+            tool_call.get("title") != previous_tool_call.get("title")
+            or tool_call.get("status") != previous_tool_call.get("status")
+            or tool_call.get("kind") != previous_tool_call.get("kind")
+        ):
+            self._header.update(self.tool_call_header_content)
+            self._header.tooltip = tool_call.get("title", "title")
+            check_expand = True
+        content = tool_call.get("content", None) or []
+        if content is not (previous_tool_call.get("content", None) or []):
+            had_content = self.has_content
+            self._update_content(content)
+            if self.has_content != had_content:
+                # May need to expand now content has arrived
+                check_expand = True
+        if check_expand:
+            self.call_after_refresh(self.check_expand)
 
     def get_block_menu(self) -> Iterable[MenuItem]:
         if self.expanded:
@@ -116,16 +141,64 @@ class ToolCall(containers.VerticalGroup):
         content: list[protocol.ToolCallContent] = tool_call.get("content", None) or []
         title = tool_call.get("title", "title")
 
-        self.has_content = False
-        content_update = list(self._compose_content(content))
+        self._content_widgets = [
+            (content_item, self._make_content_widget(content_item))
+            for content_item in content
+        ]
+        self._update_has_content()
 
-        yield (header := ToolCallHeader(self.tool_call_header_content, markup=False))
+        self._header = header = ToolCallHeader(
+            self.tool_call_header_content, markup=False
+        )
+        yield header
         header.tooltip = title
         with containers.VerticalGroup(id="tool-content"):
-            yield from content_update
+            for _, widget in self._content_widgets:
+                if widget is not None:
+                    yield widget
 
         self.call_after_refresh(self.check_expand)
 
+    def _update_content(self, content: list[protocol.ToolCallContent]) -> None:
+        """Update content widgets, creating widgets only for changed content.
+
+        Args:
+            content: New tool call content.
+        """
+        try:
+            container = self.query_one("#tool-content", containers.VerticalGroup)
+        except NoMatches:
+            return
+        previous_content_widgets = self._content_widgets
+        content_widgets: list[tuple[protocol.ToolCallContent, Widget | None]] = []
+        previous_widget: Widget | None = None
+        for index, content_item in enumerate(content):
+            if index < len(previous_content_widgets):
+                previous_item, widget = previous_content_widgets[index]
+                if content_item is previous_item or content_item == previous_item:
+                    content_widgets.append((content_item, widget))
+                    if widget is not None:
+                        previous_widget = widget
+                    continue
+                if widget is not None:
+                    widget.remove()
+            new_widget = self._make_content_widget(content_item)
+            content_widgets.append((content_item, new_widget))
+            if new_widget is not None:
+                if previous_widget is not None:
+                    container.mount(new_widget, after=previous_widget)
+                elif container.children:
+                    container.mount(new_widget, before=0)
+                else:
+                    container.mount(new_widget)
+                previous_widget = new_widget
+
+        for _, widget in previous_content_widgets[len(content) :]:
+            if widget is not None:
+                widget.remove()
+        self._content_widgets = content_widgets
+        self._update_has_content()
+
     def check_expand(self) -> None:
         """Check if the tool call should auto-expand."""
         if not self.has_content:
@@ -199,12 +272,24 @@ class ToolCall(containers.VerticalGroup):
         else:
             self.app.bell()
 
-    def _compose_content(
-        self, tool_call_content: list[protocol.ToolCallContent]
-    ) -> ComposeResult:
-        def compose_content_block(
-            content_block: protocol.ContentBlock,
-        ) -> ComposeResult:
+    def _update_has_content(self) -> None:
+        """Update `has_content` from the content widgets."""
+        self.has_content = any(
+            widget is not None or content_item.get("type") == "content"
+            for content_item, widget in self._content_widgets
+        )
+
+    def _make_content_widget(self, content: protocol.ToolCallContent) -> Widget | None:
+        """Make a widget for an item of tool call content.
+
+        Args:
+            content: Tool call content.
+
+        Returns:
+            A widget, or `None` if the content isn't displayed in the tool call.
+        """
+
+        def make_content_block(content_block: protocol.ContentBlock) -> Widget | None:
             match content_block:
                 # TODO: This may need updating
                 # Docs claim this should be "plain" text
@@ -215,38 +300,37 @@ class ToolCall(containers.VerticalGroup):
                 case {"type": "text", "text": text}:
                     if "\x1b" in text:
                         parsed_ansi_text = Text.from_ansi(text)
-                        yield TextContent(Content.from_rich_text(parsed_ansi_text))
+                        return TextContent(Content.from_rich_text(parsed_ansi_text))
                     elif "```" in text or re.search(
                         r"^#{1,6}\s.*$", text, re.MULTILINE
                     ):
-                        yield MarkdownContent(text)
+                        return MarkdownContent(text)
                     else:
-                        yield TextContent(text, markup=False)
-
-        for content in tool_call_content:
-            match content:
-                case {"type": "content", "content": sub_content}:
-                    yield from compose_content_block(sub_content)
-                    self.has_content = True
-                case {
-                    "type": "diff",
-                    "path": path,
-                    "oldText": old_text,
-                    "newText": new_text,
-                }:
-                    from toad.widgets.diff_view import DiffView
-
-                    yield (diff_view := DiffView(path, path, old_text or "", new_text))
-
-                    if isinstance(self.app, ToadApp):
-                        diff_view_setting = self.app.settings.get("diff.view", str)
-                        diff_view.split = diff_view_setting == "split"
-                        diff_view.auto_split = diff_view_setting == "auto"
-
-                    self.has_content = True
-
-                case {"type": "terminal", "terminalId": terminal_id}:
-                    pass
+                        return TextContent(text, markup=False)
+            return None
+
+        match content:
+            case {"type": "content", "content": sub_content}:
+                return make_content_block(sub_content)
+            case {
+                "type": "diff",
+                "path": path,
+                "oldText": old_text,
+                "newText": new_text,
+            }:
+                from toad.widgets.diff_view import DiffView
+
+                diff_view = DiffView(path, path, old_text or "", new_text)
+
+                if isinstance(self.app, ToadApp):
+                    diff_view_setting = self.app.settings.get("diff.view", str)
+                    diff_view.split = diff_view_setting == "split"
+                    diff_view.auto_split = diff_view_setting == "auto"
+                return diff_view
+
+            case {"type": "terminal", "terminalId": terminal_id}:
+                pass
+        return None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import asyncio
+from pathlib import Path
+import shlex
+import sys
+
+import pytest
+
+# The messages module imports the agent module (importing it first is circular)
+from toad.acp import messages  # noqa: F401
+from toad.acp import agent as agent_module
+from toad.acp.pool import AgentPool
+
+# An agent which floods the client with updates, once a session is created
+AGENT_SCRIPT = """\
+import json
+import sys
+
+
+def send(message):
+    sys.stdout.write(json.dumps({"jsonrpc": "2.0", **message}) + "\\n")
+    sys.stdout.flush()
+
+
+for line in sys.stdin:
+    request = json.loads(line)
+    method = request.get("method")
+    if method == "initialize":
+        send({"id": request["id"], "result": {"protocolVersion": 1}})
+    elif method == "session/new":
+        send({"id": request["id"], "result": {"sessionId": "session-1"}})
+        for _ in range(100):
+            update = {"sessionUpdate": "plan", "entries": []}
+            send(
+                {
+                    "method": "session/update",
+                    "params": {"sessionId": "session-1", "update": update},
+                }
+            )
+"""
+
+
+@pytest.fixture(autouse=True)
+def state_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+
+
+def test_idle_agent_pending_messages_bounded(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(agent_module, "MAX_PENDING_MESSAGES", 10)
+    script_path = tmp_path / "agent.py"
+    script_path.write_text(AGENT_SCRIPT)
+    agent_data = {
+        "identity": "flood.example.org",
+        "name": "Flood",
+        "run_command": {"*": f"{shlex.quote(sys.executable)} {script_path}"},
+    }
+
+    async def run() -> None:
+        pool = AgentPool(max_agents=1)
+        pool.warm(tmp_path, [agent_data])
+        agent = pool._agents[pool.get_key(tmp_path, agent_data)].agent
+        try:
+            for _ in range(100):
+                if agent.messages_dropped:
+                    break
+                assert len(agent._pending_messages or []) <= 10
+                await asyncio.sleep(0.05)
+            assert agent.messages_dropped
+            assert agent._pending_messages is None
+            # The agent can't be used, as messages were lost
+            assert pool.take(tmp_path, agent_data) is None
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
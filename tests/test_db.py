@@ -0,0 +1,44 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from toad.db import DB
+
+
+@pytest.fixture(autouse=True)
+def state_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+
+
+def test_close_stops_connection_thread() -> None:
+    async def run() -> None:
+        db = DB()
+        assert await db.create()
+        async with db.open() as connection:
+            thread = connection._thread
+        assert thread.is_alive()
+
+        await DB.close()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+    asyncio.run(run())
+
+
+def test_no_connection_left_open_after_close() -> None:
+    async def run() -> None:
+        db = DB()
+        assert await db.create()
+        await DB.close()
+
+        # As the agent does when it stops, after the app has closed the database
+        session_pk = await db.session_new("New Session", "Agent", "agent", "1")
+        assert session_pk is not None
+        assert await db.session_update_last_used(session_pk)
+        async with db.open() as connection:
+            thread = connection._thread
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+    asyncio.run(run())
@@ -0,0 +1,39 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from toad.acp.file_service import FileService
+
+TEXTS = {
+    "lf": "one\ntwo\n\nfour\nfive\n",
+    "crlf": "one\r\ntwo\r\n\r\nfour\r\nfive",
+    "cr": "one\rtwo\r\rfour\rfive\r",
+    "mixed": "one\r\ntwo\r\n\rfour\nfive\r\n\r\n",
+    "unicode": "one\x0btwo\x0c\x1cfour\x85five\u2028six\u2029seven\x1d\x1e",
+}
+
+
+def read_lines(path: Path, line: int, limit: int | None) -> str:
+    """Read a window of lines, by splitting the entire file."""
+    lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
+    line = max(0, line - 1)
+    if limit is None:
+        return "\n".join(lines[line:])
+    return "\n".join(lines[line : line + limit])
+
+
+@pytest.mark.parametrize("name", list(TEXTS))
+@pytest.mark.parametrize("mmap_threshold", [1, 4 * 1024 * 1024])
+def test_read_lines(tmp_path: Path, name: str, mmap_threshold: int) -> None:
+    path = tmp_path / f"{name}.txt"
+    path.write_bytes(TEXTS[name].encode("utf-8"))
+    file_service = FileService(mmap_threshold=mmap_threshold)
+
+    async def run() -> None:
+        for line in range(0, 10):
+            for limit in (None, 0, 1, 2, 5):
+                text = await file_service.read_text(path, line, limit)
+                assert text == read_lines(path, line, limit), (line, limit)
+
+    asyncio.run(run())
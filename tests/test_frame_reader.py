@@ -0,0 +1,36 @@
+import asyncio
+
+from toad.acp.reader import FrameReader
+
+
+async def read_frames(data: bytes, spill_size: int = 16 * 1024 * 1024) -> list[bytes]:
+    """Read all frames from data."""
+    stream = asyncio.StreamReader()
+    stream.feed_data(data)
+    stream.feed_eof()
+    reader = FrameReader(stream, chunk_size=1024, spill_size=spill_size)
+    frames = [bytes(frame) async for frame in reader]
+    reader.close()
+    return frames
+
+
+def test_skip_blank_frames() -> None:
+    data = b"".join(
+        [
+            b"\n",
+            b" \t\r\n",
+            b'{"id": 1}\n',
+            b" " * 100 + b"\n",
+            b"\t \r" * 10_000 + b"\n",
+            b'  {"id": 2}  \n',
+            b" " * 1000,
+        ]
+    )
+    frames = asyncio.run(read_frames(data))
+    assert frames == [b'{"id": 1}', b'  {"id": 2}  ']
+
+
+def test_skip_spilled_blank_frames() -> None:
+    data = b" " * 10_000 + b"\n" + b'{"id": 1}\n' + b"\r\t" * 10_000
+    frames = asyncio.run(read_frames(data, spill_size=4096))
+    assert frames == [b'{"id": 1}']
@@ -0,0 +1,52 @@
+import asyncio
+
+from toad.ansi._ansi import TerminalState
+
+
+def reflow(state: TerminalState) -> None:
+    """Finish a pending reflow."""
+    while state.reflow(0.1):
+        pass
+
+
+async def write_below_last_line(width: int) -> TerminalState:
+    """Write lines, then move the cursor below the last line."""
+    state = TerminalState(None, width=width, height=100)
+    await state.write("".join(f"line {line_no}\r\n" for line_no in range(58)))
+    await state.write("line 58\x1b[B")
+    return state
+
+
+def test_reflow_cursor_below_last_line() -> None:
+    async def run() -> None:
+        state = await write_below_last_line(5)
+        buffer = state.scrollback_buffer
+        assert buffer.cursor_line == buffer.fold_index.total
+
+        state.update_size(55)
+        reflow(state)
+
+        # The same as a full reflow: the cursor is pinned to the start of the line
+        # after the last line
+        assert buffer.cursor == (buffer.fold_index.total, 0)
+        assert buffer.cursor_line == buffer.fold_index.total == 59
+        assert buffer.cursor_offset == 0
+
+    asyncio.run(run())
+
+
+def test_reflow_cursor_below_last_line_before_reflow_completes() -> None:
+    async def run() -> None:
+        state = await write_below_last_line(5)
+        buffer = state.scrollback_buffer
+
+        # Only the screen is refolded here
+        state.update_size(55)
+        assert buffer.cursor_line == buffer.fold_index.total
+        assert buffer.cursor_offset == 0
+
+        reflow(state)
+        assert buffer.cursor_line == buffer.fold_index.total
+        assert buffer.cursor_offset == 0
+
+    asyncio.run(run())
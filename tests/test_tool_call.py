@@ -0,0 +1,60 @@
+import asyncio
+
+from textual import getters
+from textual.app import App, ComposeResult
+
+from toad.acp import protocol
+from toad.widgets.tool_call import ToolCall
+
+TOOL_CALL: protocol.ToolCall = {
+    "sessionUpdate": "tool_call",
+    "toolCallId": "run_shell_command-1",
+    "status": "completed",
+    "title": "Bar",
+    "content": [],
+}
+
+
+class RecordExpandToolCall(ToolCall):
+    """A tool call which records calls to `check_expand`."""
+
+    # Doesn't require the Toad app
+    app = getters.app(App)
+
+    def __init__(self, tool_call: protocol.ToolCall) -> None:
+        self.check_expand_count = 0
+        super().__init__(tool_call)
+
+    def check_expand(self) -> None:
+        self.check_expand_count += 1
+
+
+class ToolCallApp(App):
+    def compose(self) -> ComposeResult:
+        yield RecordExpandToolCall(TOOL_CALL)
+
+
+def test_check_expand_when_content_arrives() -> None:
+    async def run() -> None:
+        app = ToolCallApp()
+        async with app.run_test() as pilot:
+            tool_call = app.query_one(RecordExpandToolCall)
+            await pilot.pause()
+            assert not tool_call.has_content
+            check_expand_count = tool_call.check_expand_count
+
+            # Only the content changes
+            tool_call.tool_call = {
+                **TOOL_CALL,
+                "content": [
+                    {
+                        "type": "content",
+                        "content": {"type": "text", "text": "Hello"},
+                    }
+                ],
+            }
+            await pilot.pause()
+            assert tool_call.has_content
+            assert tool_call.check_expand_count == check_expand_count + 1
+
+    asyncio.run(run())
@@ -0,0 +1,144 @@
+"""
+Benchmark the terminal's ANSI processing, in MB/s.
+
+Text is fed in chunks (as it would be read from a pty) through each stage:
+
+- parser: `ANSIParser`, which splits text in to content and escape sequences
+- stream: `ANSIStream`, which decodes sequences in to commands
+- terminal: `TerminalState`, which applies commands to the buffers
+
+Run with:
+
+    uv run python tools/benchmark_ansi.py --size 8
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+from typing import Callable
+
+from toad.ansi._ansi import ANSIParser, ANSIStream, TerminalState
+
+CHUNK_SIZE = 64 * 1024
+
+
+def make_plain(size: int) -> str:
+    """Plain text, like the output of `cat` on a log file."""
+    lines: list[str] = []
+    total = 0
+    line_no = 0
+    while total < size:
+        line = f"2025-01-01 12:00:{line_no % 60:02d} INFO [worker-{line_no % 8}] processed request {line_no} in {line_no % 97}ms\n"
+        lines.append(line)
+        total += len(line)
+        line_no += 1
+    return "".join(lines)
+
+
+def make_color(size: int) -> str:
+    """Text with SGR colors, like `pytest -v` or a build log."""
+    lines: list[str] = []
+    total = 0
+    line_no = 0
+    while total < size:
+        line = (
+            f"tests/test_module_{line_no % 50}.py::test_case_{line_no} "
+            f"\x1b[32mPASSED\x1b[0m \x1b[1m[{line_no % 100:3d}%]\x1b[0m\r\n"
+        )
+        lines.append(line)
+        total += len(line)
+        line_no += 1
+    return "".join(lines)
+
+
+def make_tui(size: int) -> str:
+    """Cursor heavy output, like htop or a progress bar redrawing the screen."""
+    parts: list[str] = []
+    total = 0
+    frame = 0
+    while total < size:
+        for row in range(1, 25):
+            part = (
+                f"\x1b[{row};1H\x1b[K\x1b[3{row % 8}m{frame:6d}\x1b[0m "
+                f"cpu {row * 3 % 100:3d}% \x1b[7m{'|' * (row % 20)}\x1b[27m"
+            )
+            parts.append(part)
+            total += len(part)
+        frame += 1
+    return "".join(parts)
+
+
+WORKLOADS: dict[str, Callable[[int], str]] = {
+    "plain": make_plain,
+    "color": make_color,
+    "tui": make_tui,
+}
+
+
+def chunks(text: str) -> list[str]:
+    return [text[offset : offset + CHUNK_SIZE] for offset in range(0, len(text), CHUNK_SIZE)]
+
+
+def bench_parser(text_chunks: list[str]) -> float:
+    parser = ANSIParser()
+    start = perf_counter()
+    for chunk in text_chunks:
+        for _ in parser.feed(chunk):
+            pass
+    return perf_counter() - start
+
+
+def bench_stream(text_chunks: list[str]) -> float:
+    stream = ANSIStream()
+    start = perf_counter()
+    for chunk in text_chunks:
+        for _ in stream.feed(chunk):
+            pass
+    return perf_counter() - start
+
+
+def bench_terminal(text_chunks: list[str]) -> float:
+    async def write_stdin(text: str) -> None:
+        pass
+
+    async def run() -> float:
+        state = TerminalState(write_stdin, width=120, height=40)
+        start = perf_counter()
+        for chunk in text_chunks:
+            await state.write(chunk)
+        return perf_counter() - start
+
+    return asyncio.run(run())
+
+
+STAGES: dict[str, Callable[[list[str]], float]] = {
+    "parser": bench_parser,
+    "stream": bench_stream,
+    "terminal": bench_terminal,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ANSI processing")
+    parser.add_argument("--size", type=float, default=4, help="MB of text per workload")
+    parser.add_argument(
+        "--workload", choices=list(WORKLOADS), action="append", help="Workload(s) to run"
+    )
+    parser.add_argument(
+        "--stage", choices=list(STAGES), action="append", help="Stage(s) to run"
+    )
+    args = parser.parse_args()
+    size = int(args.size * 1024 * 1024)
+
+    print(f"{'workload':<10}{'stage':<10}{'MB/s':>10}")
+    for workload in args.workload or list(WORKLOADS):
+        text = WORKLOADS[workload](size)
+        text_chunks = chunks(text)
+        megabytes = len(text) / 1024 / 1024
+        for stage in args.stage or list(STAGES):
+            elapsed = STAGES[stage](text_chunks)
+            print(f"{workload:<10}{stage:<10}{megabytes / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
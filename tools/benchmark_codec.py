@@ -0,0 +1,94 @@
+"""
+Benchmark the JSON codecs on a recorded agent session.
+
+Reports messages per second to decode and re-encode every "[agent]" line in an agent
+log (as written to the Toad logs directory). If no log is given, a synthetic session is used.
+
+Run with:
+
+    uv run python tools/benchmark_codec.py [LOG]
+"""
+
+import sys
+from time import perf_counter
+
+from toad import json_codec
+
+
+def load_session(path: str | None) -> list[bytes]:
+    """Load the agent messages from a log file, or generate a synthetic session."""
+    if path is not None:
+        frames: list[bytes] = []
+        with open(path, "rb") as log_file:
+            for line in log_file:
+                sender, _, json_line = line.partition(b" ")
+                if sender == b"[agent]" and json_line.strip():
+                    frames.append(json_line.strip())
+        return frames
+
+    codec = json_codec.StdlibCodec()
+    chunk = codec.encode(
+        {
+            "jsonrpc": "2.0",
+            "method": "session/update",
+            "params": {
+                "sessionId": "sess-1",
+                "update": {
+                    "sessionUpdate": "agent_message_chunk",
+                    "content": {"type": "text", "text": "Hello, World! "},
+                },
+            },
+        }
+    )
+    diff_lines = "\n".join(f"line {line_no}" for line_no in range(2000))
+    tool_call = codec.encode(
+        {
+            "jsonrpc": "2.0",
+            "method": "session/update",
+            "params": {
+                "sessionId": "sess-1",
+                "update": {
+                    "sessionUpdate": "tool_call_update",
+                    "toolCallId": "call-1",
+                    "content": [
+                        {
+                            "type": "diff",
+                            "path": "foo.py",
+                            "oldText": diff_lines,
+                            "newText": diff_lines + "\nnew line",
+                        }
+                    ],
+                },
+            },
+        }
+    )
+    return ([chunk] * 49 + [tool_call]) * 200
+
+
+def benchmark(codec: json_codec.Codec, frames: list[bytes]) -> float:
+    """Decode and re-encode all frames, and return messages per second."""
+    decode = codec.decode
+    encode = codec.encode
+    start = perf_counter()
+    for frame in frames:
+        encode(decode(frame))
+    elapsed = perf_counter() - start
+    return len(frames) / elapsed
+
+
+def main() -> None:
+    frames = load_session(sys.argv[1] if len(sys.argv) > 1 else None)
+    byte_count = sum(len(frame) for frame in frames)
+    print(f"{len(frames):,} messages, {byte_count / 1024 / 1024:.1f} MB")
+    for name, codec_type in json_codec.CODECS.items():
+        try:
+            codec = codec_type()
+        except ImportError:
+            print(f"{name:>8}: not installed")
+            continue
+        messages_per_second = benchmark(codec, frames)
+        print(f"{name:>8}: {messages_per_second:12,.0f} messages/s")
+
+
+if __name__ == "__main__":
+    main()
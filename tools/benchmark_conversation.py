@@ -0,0 +1,192 @@
+"""
+End to end benchmark of the conversation, driven by the synthetic load agent.
+
+Runs Toad headless (with the Textual pilot) against `tools/load_agent.py`, submits
+prompts as a user would, and reports:
+
+- agent frames and messages per second
+- screen update (frame) times
+- event loop lag
+- resident memory of Toad and the agent
+
+Arguments after `--` are passed to the load agent. Run with:
+
+    uv run python tools/benchmark_conversation.py --prompts 3 -- --tokens 20000
+"""
+
+import argparse
+import asyncio
+from contextlib import contextmanager
+from pathlib import Path
+import shlex
+import statistics
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Iterator
+
+import psutil
+from textual.message import Message
+from textual.screen import Screen
+
+from toad.app import ToadApp
+from toad.agent_schema import Agent as AgentData
+from toad.acp.messages import AgentMessage
+from toad.messages import UserInputSubmitted
+from toad.widgets.conversation import Conversation
+
+LOAD_AGENT = Path(__file__).parent / "load_agent.py"
+
+
+def get_agent_data(agent_args: list[str]) -> AgentData:
+    command = shlex.join([sys.executable, str(LOAD_AGENT), *agent_args])
+    return {
+        "identity": "load.benchmark.batrachian.ai",
+        "name": "Load",
+        "short_name": "load",
+        "url": "https://github.com/batrachianai/toad",
+        "protocol": "acp",
+        "type": "coding",
+        "author_name": "Toad",
+        "author_url": "https://github.com/batrachianai/toad",
+        "publisher_name": "Toad",
+        "publisher_url": "https://github.com/batrachianai/toad",
+        "description": "Synthetic load agent",
+        "tags": [],
+        "help": "",
+        "run_command": {"*": command},
+        "actions": {},
+    }
+
+
+@contextmanager
+def record_frame_times() -> Iterator[list[float]]:
+    """Record the time taken by each screen update."""
+    frame_times: list[float] = []
+    on_timer_update = Screen._on_timer_update
+
+    def timed_update(self: Screen) -> None:
+        start = perf_counter()
+        on_timer_update(self)
+        frame_times.append(perf_counter() - start)
+
+    Screen._on_timer_update = timed_update
+    try:
+        yield frame_times
+    finally:
+        Screen._on_timer_update = on_timer_update
+
+
+async def measure_loop_lag(lags: list[float], interval: float = 0.01) -> None:
+    """Record how late the event loop wakes a sleeping task."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - start - interval))
+
+
+async def wait_for(condition, timeout: float = 60.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def get_rss(process: psutil.Process) -> int:
+    try:
+        return process.memory_info().rss
+    except psutil.Error:
+        return 0
+
+
+async def run(prompt_count: int, agent_args: list[str], size: tuple[int, int]) -> None:
+    with TemporaryDirectory() as project_dir:
+        app = ToadApp(agent_data=get_agent_data(agent_args), project_dir=project_dir)
+        with record_frame_times() as frame_times:
+            async with app.run_test(size=size) as pilot:
+                conversation = app.screen.query_one(Conversation)
+                await wait_for(lambda: conversation.agent_ready)
+                agent = conversation.agent
+                assert agent is not None
+
+                lags: list[float] = []
+                lag_task = asyncio.create_task(measure_loop_lag(lags))
+                frame_times.clear()
+                message_count = 0
+                post_message = conversation.post_message
+
+                def count_post_message(message: Message) -> bool:
+                    nonlocal message_count
+                    if isinstance(message, AgentMessage):
+                        message_count += 1
+                    return post_message(message)
+
+                # The agent posts to its message target
+                conversation.post_message = count_post_message  # type: ignore[method-assign]
+                frames_start = agent.reader.statistics.frame_count if agent.reader else 0
+
+                start_time = perf_counter()
+                for prompt_index in range(prompt_count):
+                    conversation.post_message(
+                        UserInputSubmitted(f"Prompt {prompt_index + 1}", False)
+                    )
+                    await wait_for(lambda: conversation.turn == "agent")
+                    await wait_for(lambda: conversation.turn == "client", timeout=600)
+                    await pilot.pause()
+                elapsed = perf_counter() - start_time
+                lag_task.cancel()
+
+                frame_count = (
+                    agent.reader.statistics.frame_count if agent.reader else 0
+                ) - frames_start
+                # Measure memory before the agent is stopped
+                toad_rss = get_rss(psutil.Process())
+                agent_rss = sum(
+                    get_rss(child) for child in psutil.Process().children(recursive=True)
+                )
+
+    print(f"prompts:           {prompt_count} in {elapsed:.2f}s")
+    print(f"agent frames/s:    {frame_count / elapsed:,.0f}")
+    print(f"agent messages/s:  {message_count / elapsed:,.0f}")
+    if frame_times:
+        print(
+            "frame time (ms):   "
+            f"mean {statistics.mean(frame_times) * 1000:.2f}  "
+            f"p95 {percentile(frame_times, 0.95) * 1000:.2f}  "
+            f"max {max(frame_times) * 1000:.2f}  "
+            f"({len(frame_times)} frames)"
+        )
+    if lags:
+        print(
+            "loop lag (ms):     "
+            f"mean {statistics.mean(lags) * 1000:.2f}  "
+            f"p95 {percentile(lags, 0.95) * 1000:.2f}  "
+            f"max {max(lags) * 1000:.2f}"
+        )
+    print(f"toad RSS:          {toad_rss / 1024 / 1024:.1f} MB")
+    print(f"agent RSS:         {agent_rss / 1024 / 1024:.1f} MB")
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    agent_args: list[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, agent_args = argv[:split], argv[split + 1 :]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--prompts", type=int, default=1, help="Number of prompts")
+    parser.add_argument("--width", type=int, default=120)
+    parser.add_argument("--height", type=int, default=40)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.prompts, agent_args, (args.width, args.height)))
+
+
+if __name__ == "__main__":
+    main()
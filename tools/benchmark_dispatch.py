@@ -0,0 +1,91 @@
+"""
+Benchmark JSONRPC dispatch of ACP `session/update` notifications.
+
+Reports calls per second for each of the server validation modes.
+
+Run with:
+
+    uv run python tools/benchmark_dispatch.py
+"""
+
+import asyncio
+from time import perf_counter
+from typing import Any
+
+from toad import jsonrpc
+from toad.acp import protocol
+
+
+CALL_COUNT = 20_000
+
+
+def make_calls() -> list[jsonrpc.JSONObject]:
+    """Make a mix of calls resembling a busy agent turn."""
+    message_chunk: jsonrpc.JSONObject = {
+        "jsonrpc": "2.0",
+        "method": "session/update",
+        "params": {
+            "sessionId": "sess-1",
+            "update": {
+                "sessionUpdate": "agent_message_chunk",
+                "content": {"type": "text", "text": "Hello, World! "},
+            },
+        },
+    }
+    diff_lines = "\n".join(f"line {line_no}" for line_no in range(2000))
+    tool_call_update: jsonrpc.JSONObject = {
+        "jsonrpc": "2.0",
+        "method": "session/update",
+        "params": {
+            "sessionId": "sess-1",
+            "update": {
+                "sessionUpdate": "tool_call_update",
+                "toolCallId": "call-1",
+                "status": "in_progress",
+                "content": [
+                    {
+                        "type": "diff",
+                        "path": "foo.py",
+                        "oldText": diff_lines,
+                        "newText": diff_lines + "\nnew line",
+                    }
+                ],
+                "locations": [{"path": "foo.py", "line": line} for line in range(50)],
+            },
+        },
+    }
+    calls = [message_chunk] * 9 + [tool_call_update]
+    return calls * (CALL_COUNT // len(calls))
+
+
+class Handler:
+    @jsonrpc.expose("session/update")
+    def session_update(
+        self,
+        sessionId: str,
+        update: protocol.SessionUpdate,
+        _meta: dict[str, Any] | None = None,
+    ) -> None:
+        pass
+
+
+async def benchmark(validation: jsonrpc.ValidationMode) -> float:
+    """Dispatch the calls and return calls per second."""
+    server = jsonrpc.Server(validation=validation)
+    server.expose_instance(Handler())
+    calls = make_calls()
+    start = perf_counter()
+    for call in calls:
+        await server.call(call)
+    elapsed = perf_counter() - start
+    return len(calls) / elapsed
+
+
+async def main() -> None:
+    for validation in ("full", "sampled", "trusted"):
+        calls_per_second = await benchmark(validation)
+        print(f"{validation:>8}: {calls_per_second:12,.0f} calls/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""
+Check that prompt resources keep within the per-prompt byte budget, with and without
+the resource cache.
+
+Each prompt is built twice: once with a fresh cache shared between prompts (as the
+app does), and once without a cache. The resources included must be the same.
+
+Run with:
+
+    uv run python tools/check_prompt_resources.py
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from toad.acp import prompt
+from toad.prompt.resource import ResourceCache
+
+MAX_SIZE = 80_000
+
+
+def resource_sizes(blocks: list) -> list[int]:
+    """Get the size (in bytes) of each resource in a prompt."""
+    return [
+        len(block["resource"]["text"].encode("utf-8"))
+        for block in blocks
+        if block["type"] == "resource"
+    ]
+
+
+def check_prompts(project_path: Path, prompts: list[str]) -> None:
+    """Build a sequence of prompts, and check the cache doesn't change the resources."""
+    cache = ResourceCache()
+    for prompt_text in prompts:
+        cached = resource_sizes(
+            prompt.build(project_path, prompt_text, MAX_SIZE, cache=cache)
+        )
+        uncached = resource_sizes(
+            prompt.build(project_path, prompt_text, MAX_SIZE, cache=None)
+        )
+        print(f"{prompt_text!r:<24} cached={cached} uncached={uncached}")
+        assert cached == uncached, f"{prompt_text!r}: {cached} != {uncached}"
+
+
+def main() -> None:
+    with TemporaryDirectory() as temp_dir:
+        project_path = Path(temp_dir)
+        (project_path / "a.txt").write_text(("a" * 99 + "\n") * 500)
+        (project_path / "big.txt").write_text(("b" * 99 + "\n") * 600)
+
+        # A file cached in full must still be truncated when less of the budget remains
+        check_prompts(project_path, ["@big.txt", "@a.txt @big.txt"])
+        # A truncated file must not be returned when more of the budget is available
+        check_prompts(project_path, ["@a.txt @big.txt", "@big.txt"])
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
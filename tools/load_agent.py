@@ -0,0 +1,294 @@
+"""
+A synthetic ACP agent, which generates configurable load for Toad.
+
+Every prompt runs the same scenario: a plan, a thought, message chunks streamed at a
+fixed rate, tool calls with large diffs, permission requests, and terminals with heavy
+output. Only the standard library is required.
+
+Run it as an agent:
+
+    toad acp "python tools/load_agent.py --tokens 5000 --tokens-per-second 2000"
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from itertools import count
+import json
+import shlex
+import sys
+from typing import Any
+
+WORDS = (
+    "the quick brown fox jumps over the lazy dog while toads sing in the "
+    "moonlight `code` **bold** and _italic_ text appears"
+).split()
+
+
+class LoadAgent:
+    """Speaks ACP over stdio."""
+
+    def __init__(self, options: argparse.Namespace) -> None:
+        self.options = options
+        self._request_ids = count(1)
+        self._pending: dict[int, asyncio.Future[Any]] = {}
+        self._session_count = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    def send(self, message: dict[str, Any]) -> None:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+    def notify(self, method: str, params: dict[str, Any]) -> None:
+        self.send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    async def request(self, method: str, params: dict[str, Any]) -> Any:
+        request_id = next(self._request_ids)
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.send(
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        )
+        return await future
+
+    def update(self, session_id: str, update: dict[str, Any]) -> None:
+        self.notify("session/update", {"sessionId": session_id, "update": update})
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=64 * 1024 * 1024)
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+        )
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            message = json.loads(line)
+            if "method" not in message:
+                if (future := self._pending.pop(message.get("id"), None)) is not None:
+                    if "error" in message:
+                        future.set_exception(RuntimeError(message["error"]))
+                    else:
+                        future.set_result(message.get("result"))
+                continue
+            task = asyncio.create_task(self.handle(message))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def handle(self, message: dict[str, Any]) -> None:
+        method = message["method"]
+        params = message.get("params") or {}
+        request_id = message.get("id")
+        try:
+            if method == "initialize":
+                result: Any = {
+                    "protocolVersion": params.get("protocolVersion", 1),
+                    "agentCapabilities": {"loadSession": False},
+                }
+            elif method == "session/new":
+                self._session_count += 1
+                result = {"sessionId": f"load-{self._session_count}"}
+            elif method == "session/prompt":
+                await self.run_scenario(params["sessionId"])
+                result = {"stopReason": "end_turn"}
+            elif method == "session/cancel":
+                return
+            else:
+                raise RuntimeError(f"Method not supported: {method}")
+        except Exception as error:
+            if request_id is not None:
+                self.send(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": request_id,
+                        "error": {"code": -32603, "message": str(error)},
+                    }
+                )
+            return
+        if request_id is not None:
+            self.send({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+    async def run_scenario(self, session_id: str) -> None:
+        options = self.options
+        plan = [
+            {"content": f"Step {index + 1}", "priority": "medium", "status": "pending"}
+            for index in range(options.plan_entries)
+        ]
+        if plan:
+            self.update(session_id, {"sessionUpdate": "plan", "entries": plan})
+
+        self.update(
+            session_id,
+            {
+                "sessionUpdate": "agent_thought_chunk",
+                "content": {"type": "text", "text": "Generating synthetic load..."},
+            },
+        )
+
+        await self.stream_tokens(session_id)
+
+        for index in range(options.tool_calls):
+            await self.tool_call(session_id, index)
+            if plan:
+                plan[index % len(plan)]["status"] = "completed"
+                self.update(session_id, {"sessionUpdate": "plan", "entries": plan})
+
+        for index in range(options.permissions):
+            await self.request(
+                "session/request_permission",
+                {
+                    "sessionId": session_id,
+                    "options": [
+                        {"kind": "allow_once", "name": "Allow", "optionId": "allow"},
+                        {"kind": "reject_once", "name": "Reject", "optionId": "reject"},
+                    ],
+                    "toolCall": {
+                        "toolCallId": f"permission-{index}",
+                        "title": f"Synthetic permission {index + 1}",
+                        "kind": "edit",
+                    },
+                },
+            )
+
+        for index in range(options.terminals):
+            await self.terminal(session_id, index)
+
+    async def stream_tokens(self, session_id: str) -> None:
+        options = self.options
+        chunk_tokens = max(1, options.chunk_tokens)
+        interval = chunk_tokens / options.tokens_per_second
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        for chunk_index, token_index in enumerate(
+            range(0, options.tokens, chunk_tokens)
+        ):
+            tokens = [
+                WORDS[index % len(WORDS)]
+                for index in range(
+                    token_index, min(options.tokens, token_index + chunk_tokens)
+                )
+            ]
+            text = " ".join(tokens) + " "
+            if chunk_index % 40 == 39:
+                text += "\n\n"
+            self.update(
+                session_id,
+                {
+                    "sessionUpdate": "agent_message_chunk",
+                    "content": {"type": "text", "text": text},
+                },
+            )
+            # Sleep against an absolute schedule, so the rate doesn't drift
+            delay = start_time + (chunk_index + 1) * interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def tool_call(self, session_id: str, index: int) -> None:
+        diff_lines = self.options.diff_lines
+        old_text = "\n".join(f"line {line} = {line * 2}" for line in range(diff_lines))
+        new_text = "\n".join(
+            f"line {line} = {line * 3}" if line % 3 == 0 else f"line {line} = {line * 2}"
+            for line in range(diff_lines)
+        )
+        tool_call_id = f"tool-{index}"
+        self.update(
+            session_id,
+            {
+                "sessionUpdate": "tool_call",
+                "toolCallId": tool_call_id,
+                "title": f"Edit synthetic_{index}.py",
+                "kind": "edit",
+                "status": "pending",
+            },
+        )
+        self.update(
+            session_id,
+            {
+                "sessionUpdate": "tool_call_update",
+                "toolCallId": tool_call_id,
+                "status": "completed",
+                "content": [
+                    {
+                        "type": "diff",
+                        "path": f"synthetic_{index}.py",
+                        "oldText": old_text,
+                        "newText": new_text,
+                    }
+                ],
+            },
+        )
+
+    async def terminal(self, session_id: str, index: int) -> None:
+        script = (
+            f"for n in range({self.options.terminal_lines}): "
+            f"print(f'\\x1b[3{{n % 8}}moutput line {{n}}\\x1b[0m ' + 'x' * 60)"
+        )
+        response = await self.request(
+            "terminal/create",
+            {
+                "sessionId": session_id,
+                "command": sys.executable,
+                "args": ["-c", script],
+            },
+        )
+        terminal_id = response["terminalId"]
+        tool_call_id = f"terminal-tool-{index}"
+        self.update(
+            session_id,
+            {
+                "sessionUpdate": "tool_call",
+                "toolCallId": tool_call_id,
+                "title": shlex.join(["python", "-c", "..."]),
+                "kind": "execute",
+                "status": "in_progress",
+                "content": [{"type": "terminal", "terminalId": terminal_id}],
+            },
+        )
+        await self.request(
+            "terminal/wait_for_exit",
+            {"sessionId": session_id, "terminalId": terminal_id},
+        )
+        self.update(
+            session_id,
+            {
+                "sessionUpdate": "tool_call_update",
+                "toolCallId": tool_call_id,
+                "status": "completed",
+            },
+        )
+        await self.request(
+            "terminal/release",
+            {"sessionId": session_id, "terminalId": terminal_id},
+        )
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Synthetic ACP load agent")
+    parser.add_argument("--tokens", type=int, default=2000, help="Tokens per prompt")
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=1000, help="Rate to stream tokens"
+    )
+    parser.add_argument(
+        "--chunk-tokens", type=int, default=4, help="Tokens per message chunk"
+    )
+    parser.add_argument("--tool-calls", type=int, default=5, help="Tool calls per prompt")
+    parser.add_argument(
+        "--diff-lines", type=int, default=500, help="Lines in each tool call diff"
+    )
+    parser.add_argument(
+        "--terminals", type=int, default=1, help="Terminals to create per prompt"
+    )
+    parser.add_argument(
+        "--terminal-lines", type=int, default=5000, help="Lines of terminal output"
+    )
+    parser.add_argument("--plan-entries", type=int, default=5, help="Entries in the plan")
+    parser.add_argument(
+        "--permissions", type=int, default=0, help="Permission requests per prompt"
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(LoadAgent(get_parser().parse_args()).run())